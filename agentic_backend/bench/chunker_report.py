@@ -0,0 +1,185 @@
+# bench/chunker_report.py → Document Chunker Speed vs Retrieval Quality Report
+# Role: Compares the local chunker with the LLM segmenter (documents.chunker.type in profiles.yaml) on the same documents.
+
+# Responsibilities:
+
+# Load .md / .txt documents, or generate synthetic multi-topic ones
+
+# Chunk every document with each chunker, timing it and counting chat / embedding requests
+
+# Score retrieval on the resulting chunks: sampled sentences are the queries, and a hit is a top-k chunk
+# that contains the sentence (hit@k, MRR)
+
+# Dependencies:
+
+# modules/doc_chunker.py, modules/embedding.py, bench/fake_llm_server.py
+
+# Usage (from the repository root):
+
+# python -m agentic_backend.bench.chunker_report --docs agentic_backend/documents       (local Ollama)
+# python -m agentic_backend.bench.chunker_report --fake                                 (offline: speed only,
+#                                                                                        fake embeddings carry no meaning)
+
+# bench/chunker_report.py
+
+from typing import Any, Callable, Dict, List, Optional
+from pathlib import Path
+import argparse
+import random
+import time
+import numpy as np
+
+from agentic_backend.modules.doc_chunker import DEFAULT_CHUNKER, LocalChunker, llm_segment, split_units
+from agentic_backend.modules.embedding import EmbeddingClient
+from agentic_backend.bench.fake_llm_server import FakeLLMServer
+
+TOPICS = {
+    "Cricket": (["batsman", "bowler", "wicket", "innings", "umpire", "captain", "pitch", "stadium"],
+                ["defended", "struck", "appealed against", "chased", "celebrated", "reviewed"]),
+    "Monetary policy": (["central bank", "inflation rate", "bond yield", "interest rate", "currency", "treasury"],
+                        ["raised", "tightened", "stabilised", "lowered", "forecast", "targeted"]),
+    "Gardening": (["tomato plant", "compost heap", "seedling", "greenhouse", "rose bush", "soil"],
+                  ["watered", "pruned", "fertilised", "transplanted", "mulched", "harvested"]),
+    "Neural networks": (["transformer", "gradient", "attention head", "training run", "embedding", "optimizer"],
+                        ["converged", "normalised", "overfitted", "quantised", "distilled", "fine-tuned"]),
+    "Real estate": (["apartment", "mortgage", "developer", "tenant", "land parcel", "valuation"],
+                    ["appreciated", "leased", "refinanced", "renovated", "listed", "appraised"]),
+}
+TIMES = ["in the morning", "last season", "after the review", "before the deadline", "during the storm", "this quarter"]
+
+
+def synthetic_documents(count: int, sections: int, sentences: int, seed: int) -> List[str]:
+    """Documents of several topic sections; half of the topic changes have no heading."""
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        parts = []
+        for s in range(sections):
+            topic = rng.choice(list(TOPICS))
+            nouns, verbs = TOPICS[topic]
+            body = " ".join(
+                f"The {rng.choice(nouns)} {rng.choice(verbs)} the {rng.choice(nouns)} {rng.choice(TIMES)} "
+                f"(note {rng.randrange(10_000)})."
+                for _ in range(sentences)
+            )
+            parts.append(f"## {topic}\n\n{body}" if s == 0 or rng.random() < 0.5 else body)
+        docs.append("\n\n".join(parts))
+    return docs
+
+
+def load_documents(directory: Path) -> List[str]:
+    return [p.read_text(errors="ignore") for p in sorted(directory.glob("*.*")) if p.suffix.lower() in (".md", ".txt")]
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class CountingEmbedder:
+    def __init__(self, client: EmbeddingClient):
+        self.client = client
+        self.calls = 0
+        self.texts = 0
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        self.texts += len(texts)
+        vectors = np.stack(self.client.embed_many_sync(texts)).astype(np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def sample_queries(docs: List[str], count: int, seed: int) -> List[str]:
+    sentences = [normalize(u.text) for doc in docs for u in split_units(doc) if not u.heading and u.words >= 6]
+    rng = random.Random(seed)
+    return rng.sample(sentences, min(count, len(sentences)))
+
+
+def score(chunks: List[str], queries: List[str], query_vectors: np.ndarray, embed: Callable, k: int) -> Dict[str, float]:
+    chunk_vectors = embed(chunks)
+    normalized = [normalize(c) for c in chunks]
+    similarity = query_vectors @ chunk_vectors.T
+    hits, reciprocal = 0, 0.0
+    for q, query in enumerate(queries):
+        ranked = np.argsort(-similarity[q])[:k]
+        for rank, c in enumerate(ranked):
+            if query in normalized[c]:
+                hits += 1
+                reciprocal += 1.0 / (rank + 1)
+                break
+    return {"hit@k": hits / len(queries), "mrr": reciprocal / len(queries)}
+
+
+def run_chunker(name: str, chunk: Callable[[str], List[str]], docs: List[str], chat_counter: Callable[[], int],
+                embedder: CountingEmbedder) -> Dict[str, Any]:
+    chat_before, embed_before = chat_counter(), embedder.calls
+    t0 = time.perf_counter()
+    chunks = [c for doc in docs for c in chunk(doc) if c.strip()]
+    seconds = time.perf_counter() - t0
+    words = [len(c.split()) for c in chunks]
+    return {
+        "chunker": name,
+        "seconds": seconds,
+        "docs_per_s": len(docs) / seconds if seconds else float("inf"),
+        "chat_calls": chat_counter() - chat_before,
+        "embed_calls": embedder.calls - embed_before,
+        "chunks": len(chunks),
+        "mean_words": float(np.mean(words)) if words else 0.0,
+        "_chunks": chunks,
+    }
+
+
+def print_report(rows: List[Dict[str, Any]], k: int):
+    header = f"{'chunker':<8} {'seconds':>9} {'docs/s':>8} {'chat':>6} {'embed':>6} {'chunks':>7} {'words':>6} {f'hit@{k}':>7} {'mrr':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['chunker']:<8} {r['seconds']:>9.2f} {r['docs_per_s']:>8.2f} {r['chat_calls']:>6} {r['embed_calls']:>6} "
+              f"{r['chunks']:>7} {r['mean_words']:>6.0f} {r['hit@k']:>7.3f} {r['mrr']:>6.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local chunker vs LLM segmenter: speed and retrieval quality")
+    parser.add_argument("--docs", help="directory of .md / .txt documents (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=20, help="synthetic document count")
+    parser.add_argument("--fake", action="store_true", help="run against bench/fake_llm_server.py instead of Ollama")
+    parser.add_argument("--ollama", default="http://localhost:11434")
+    parser.add_argument("--chat-model", default="phi4:latest")
+    parser.add_argument("--embed-model", default="nomic-embed-text")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--skip-llm", action="store_true", help="only run the local chunker")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs = load_documents(Path(args.docs)) if args.docs else synthetic_documents(args.synthetic, 6, 12, args.seed)
+    if not docs:
+        raise SystemExit(f"No .md / .txt documents in {args.docs}")
+
+    server: Optional[FakeLLMServer] = FakeLLMServer(seed=args.seed).start() if args.fake else None
+    base = server.url if server else args.ollama.rstrip("/")
+    chat_calls = (lambda: server.llm.counts.get("chat", 0)) if server else (lambda: 0)
+    try:
+        embedder = CountingEmbedder(EmbeddingClient(f"{base}/api/embeddings", args.embed_model, max_batch=64))
+        chunkers = [("local", LocalChunker(embedder, DEFAULT_CHUNKER))]
+        if not args.skip_llm:
+            chunkers.append(("llm", lambda doc: llm_segment(doc, f"{base}/api/chat", args.chat_model,
+                                                            int(DEFAULT_CHUNKER["max_words"]))))
+
+        queries = sample_queries(docs, args.queries, args.seed)
+        query_vectors = embedder(queries)
+        rows = []
+        for name, chunk in chunkers:
+            row = run_chunker(name, chunk, docs, chat_calls, embedder)
+            row.update(score(row.pop("_chunks"), queries, query_vectors, embedder, args.k))
+            rows.append(row)
+    finally:
+        if server:
+            server.stop()
+
+    print(f"{len(docs)} documents, {sum(len(d.split()) for d in docs)} words, {len(queries)} queries"
+          + (" (chat calls not counted against a real server)" if not server else ""))
+    print_report(rows, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# bench/fake_llm_server.py → Local Stand-in LLM Server
+# Role: Lets AgentLoop run end-to-end offline, without Gemini or a GPU Ollama box.
+
+# Responsibilities:
+
+# Serve the Ollama endpoints the agent uses: /api/generate, /api/chat, /api/embeddings (+ batch /api/embed)
+
+# Answer from a script of (regex → response) rules, with configurable latency distributions
+
+# Return deterministic pseudo-embeddings (same text → same vector)
+
+# Provide a Gemini-shaped client so ModelManager can run in "gemini" mode against this server
+
+# Dependencies:
+
+# standard library only
+
+# Usage:
+
+# python agentic_backend/bench/fake_llm_server.py --port 11434 --script my_script.json
+
+# Script format (JSON):
+# {
+#   "latency": {"generate": {"dist": "lognormal", "median_ms": 400, "sigma": 0.4},
+#               "embeddings": {"dist": "uniform", "min_ms": 5, "max_ms": 20}},
+#   "rules": [{"match": "regex on prompt", "response": "text"}],
+#   "default": "FINAL_ANSWER: [unknown]",
+#   "embedding_dim": 768
+# }
+
+# bench/fake_llm_server.py
+
+from typing import Any, Dict, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.request
+
+
+# Responses shaped after the prompts in modules/perception.py and modules/decision.py,
+# so the sample queries in agent.py walk through perception → plan → tool → final answer.
+DEFAULT_SCRIPT: Dict[str, Any] = {
+    "latency": {
+        "generate": {"dist": "lognormal", "median_ms": 350, "sigma": 0.35},
+        "chat": {"dist": "lognormal", "median_ms": 350, "sigma": 0.35},
+        "embeddings": {"dist": "uniform", "min_ms": 10, "max_ms": 30},
+    },
+    "rules": [
+        # Perception
+        {"match": r"(?s)extracts structured facts.*(ASCII|INDIA)",
+         "response": '{"intent": "compute exponential sum of ASCII values", "entities": ["INDIA", "ASCII"], "tool_hint": "strings_to_chars_to_int"}'},
+        {"match": r"(?s)extracts structured facts.*https?://",
+         "response": '{"intent": "summarize a webpage", "entities": ["webpage"], "tool_hint": "fetch_content"}'},
+        {"match": r"(?s)extracts structured facts",
+         "response": '{"intent": "look up information", "entities": [], "tool_hint": "search_documents"}'},
+        # Planning — after a tool result, answer
+        {"match": r"(?s)reasoning-driven AI agent.*Your last tool produced this result",
+         "response": "FINAL_ANSWER: [answer assembled from the tool result]"},
+        {"match": r"(?s)reasoning-driven AI agent.*User input: \"[^\"]*INDIA",
+         "response": "FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA"},
+        {"match": r"(?s)reasoning-driven AI agent.*User input: \"[^\"]*https?://",
+         "response": "FUNCTION_CALL: fetch_content|url=\"https://theschoolof.ai/\""},
+        {"match": r"(?s)reasoning-driven AI agent",
+         "response": "FUNCTION_CALL: search_documents|query=\"benchmark query\""},
+        # Document segmenter (mcp_server_2.semantic_merge) — single topic
+        {"match": r"markdown document segmenter", "response": ""},
+    ],
+    "default": "FINAL_ANSWER: [unknown]",
+    "embedding_dim": 768,
+}
+
+
+def sample_latency(spec: Optional[Dict[str, Any]], rng: random.Random) -> float:
+    """Seconds to wait for one request, drawn from a latency spec."""
+    if not spec:
+        return 0.0
+    dist = spec.get("dist", "constant")
+    if dist == "constant":
+        ms = spec.get("ms", 0)
+    elif dist == "uniform":
+        ms = rng.uniform(spec.get("min_ms", 0), spec.get("max_ms", 0))
+    elif dist == "normal":
+        ms = max(0.0, rng.gauss(spec.get("mean_ms", 0), spec.get("stddev_ms", 0)))
+    elif dist == "lognormal":
+        ms = spec.get("median_ms", 0) * math.exp(rng.gauss(0, spec.get("sigma", 0.5)))
+    else:
+        raise ValueError(f"Unknown latency distribution: {dist}")
+    return ms / 1000.0
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector for `text`."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+class FakeLLM:
+    def __init__(self, script: Optional[Dict[str, Any]] = None, seed: Optional[int] = None):
+        self.script = {**DEFAULT_SCRIPT, **(script or {})}
+        self.rules = [(re.compile(r["match"]), r["response"]) for r in self.script["rules"]]
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def respond(self, prompt: str) -> str:
+        for pattern, response in self.rules:
+            if pattern.search(prompt):
+                return response
+        return self.script["default"]
+
+    def respond_structured(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Scripted reply shaped as JSON, as a model constrained by `format`/`response_schema` would answer."""
+        response = self.respond(prompt)
+        try:
+            json.loads(response)
+            return response
+        except json.JSONDecodeError:
+            pass
+
+        properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
+        if "action" in properties:  # decision.PlanResult
+            line = response.strip()
+            if line.startswith("FUNCTION_CALL:"):
+                tool_name, _, arguments = line.split(":", 1)[1].strip().partition("|")
+                return json.dumps({"action": "FUNCTION_CALL", "tool_name": tool_name, "arguments": arguments})
+            answer = line.split(":", 1)[1].strip() if line.startswith("FINAL_ANSWER:") else line
+            return json.dumps({"action": "FINAL_ANSWER", "answer": answer})
+        return json.dumps({"text": response})
+
+    def embed(self, text: str) -> List[float]:
+        return fake_embedding(text, int(self.script["embedding_dim"]))
+
+    def wait(self, endpoint: str) -> None:
+        with self.rng_lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            delay = sample_latency(self.script["latency"].get(endpoint), self.rng)
+        time.sleep(delay)
+
+
+def make_handler(llm: FakeLLM):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass  # keep benchmark output clean
+
+        def _reply(self, payload: Dict[str, Any], status: int = 200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                req = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return self._reply({"error": "invalid JSON"}, status=400)
+
+            model = req.get("model", "fake")
+            if self.path == "/api/generate":
+                llm.wait("generate")
+                prompt = req.get("prompt", "")
+                schema = req.get("format")
+                text = llm.respond_structured(prompt, schema) if schema else llm.respond(prompt)
+                return self._reply({"model": model, "response": text, "done": True})
+
+            if self.path == "/api/chat":
+                llm.wait("chat")
+                prompt = "\n".join(m.get("content", "") for m in req.get("messages", []))
+                return self._reply({
+                    "model": model,
+                    "message": {"role": "assistant", "content": llm.respond(prompt)},
+                    "done": True
+                })
+
+            if self.path == "/api/embeddings":
+                llm.wait("embeddings")
+                return self._reply({"embedding": llm.embed(req.get("prompt", ""))})
+
+            if self.path == "/api/embed":
+                llm.wait("embeddings")
+                inputs = req.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                return self._reply({"model": model, "embeddings": [llm.embed(t) for t in inputs]})
+
+            self._reply({"error": f"unknown endpoint {self.path}"}, status=404)
+
+    return Handler
+
+
+class FakeLLMServer:
+    """Runs the fake on a background thread: `with FakeLLMServer() as server: server.url`."""
+
+    def __init__(self, script: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1", port: int = 0,
+                 seed: Optional[int] = None):
+        self.llm = FakeLLM(script, seed=seed)
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.llm))
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeGeminiClient:
+    """
+    Gemini-shaped adapter: exposes `client.models.generate_content(model=..., contents=...)`
+    like `google.genai.Client`, but answers through the fake server's /api/generate.
+    Install it with `ModelManager(client=FakeGeminiClient(url))`.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.models = self
+
+    def generate_content(self, model: str, contents: Any, config: Any = None):
+        prompt = contents if isinstance(contents, str) else json.dumps(contents, default=str)
+        payload = {"model": model, "prompt": prompt, "stream": False}
+
+        schema = (config or {}).get("response_schema") if isinstance(config, dict) else None
+        if schema is not None:
+            payload["format"] = schema.model_json_schema() if hasattr(schema, "model_json_schema") else schema
+
+        req = urllib.request.Request(
+            f"{self.base_url}/api/generate",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as resp:
+            text = json.loads(resp.read())["response"]
+        return SimpleNamespace(text=text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--script", help="JSON file with latency/rules overrides")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    script = json.loads(open(args.script).read()) if args.script else None
+    server = FakeLLMServer(script, host=args.host, port=args.port, seed=args.seed)
+    print(f"Fake LLM server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
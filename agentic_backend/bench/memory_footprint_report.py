@@ -0,0 +1,105 @@
+# bench/memory_footprint_report.py → Memory Footprint Report
+# Role: Measures bytes per memory item for the column store against the old object-per-item layout.
+
+# Responsibilities:
+
+# Generate agent-like memory items (tool outputs shared across a few sessions, tools and queries)
+
+# Load them into a MemoryManager (column store) and into the previous layout (MemoryItem list + vector list + flat FAISS index)
+
+# Report tracemalloc-measured bytes per item for both, plus the column store's own breakdown
+
+# Dependencies:
+
+# modules/memory.py, modules/memory_columns.py
+
+# Usage (from the repository root):
+
+# python -m agentic_backend.bench.memory_footprint_report --count 20000 --dim 768
+
+# bench/memory_footprint_report.py
+
+from typing import List, Tuple
+import argparse
+import gc
+import random
+import tracemalloc
+import numpy as np
+import faiss
+
+from agentic_backend.modules.memory import MemoryItem, MemoryManager
+
+TOOLS = ["search_documents", "fetch_content", "strings_to_chars_to_int", "int_list_to_exponential_sum"]
+
+
+def make_items(count: int, dim: int, text_chars: int, seed: int) -> Tuple[List[MemoryItem], np.ndarray]:
+    rng = random.Random(seed)
+    queries = [f"sample question number {i} about some topic" for i in range(max(1, count // 4))]
+    items = [
+        MemoryItem(
+            text=f"Output {i}: " + "x" * rng.randint(text_chars // 2, text_chars),
+            type="tool_output",
+            tool_name=rng.choice(TOOLS),
+            user_query=queries[i // 4],
+            tags=[rng.choice(TOOLS)],
+            session_id=f"session-{i // 8}",
+            namespace=f"user-{i % 50}",
+        )
+        for i in range(count)
+    ]
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return items, vectors
+
+
+def measure(build) -> Tuple[object, int]:
+    """Object returned by `build()` and the Python heap bytes it still holds."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def legacy_layout(items: List[MemoryItem], vectors: np.ndarray):
+    data = [item.model_copy() for item in items]
+    embeddings = [np.array(v) for v in vectors]
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(np.stack(embeddings))
+    return data, embeddings, index
+
+
+def column_layout(items: List[MemoryItem], vectors: np.ndarray) -> MemoryManager:
+    manager = MemoryManager("http://localhost:11434/api/embeddings", defer_embedding=False)
+    manager._insert_many(items, list(vectors))
+    return manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes per memory item: column store vs object-per-item")
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--text-chars", type=int, default=400, help="max text length (tool outputs are trimmed by the budget)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items, vectors = make_items(args.count, args.dim, args.text_chars, args.seed)
+
+    (_, _, legacy_index), legacy_heap = measure(lambda: legacy_layout(items, vectors))
+    legacy_total = legacy_heap + legacy_index.ntotal * legacy_index.d * 4  # FAISS storage is outside tracemalloc
+    manager, column_heap = measure(lambda: column_layout(items, vectors))
+    breakdown = manager.footprint()
+
+    print(f"Memory footprint: {args.count} items × {args.dim} dims, text ≤ {args.text_chars} chars")
+    print(f"{'layout':<28} {'MB':>8} {'bytes/item':>11}")
+    print(f"{'MemoryItem + list + flat index':<28} {legacy_total / 1e6:>8.1f} {legacy_total / args.count:>11.0f}")
+    print(f"{'column store':<28} {column_heap / 1e6:>8.1f} {column_heap / args.count:>11.0f}")
+    print("column store breakdown (bytes/item): " + ", ".join(
+        f"{key} {breakdown[key] / args.count:.0f}" for key in ("vectors", "text", "fields", "strings", "postings", "lexical")
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# bench/memory_index_report.py → Memory Index Recall vs Latency Report
+# Role: Shows what each memory.index setting in profiles.yaml costs in recall, latency, build time and size.
+
+# Responsibilities:
+
+# Load vectors from a memory store (vectors.f32) or generate clustered synthetic ones
+
+# Compute exact top-k with the flat index as ground truth
+
+# Build hnsw / ivf_flat / ivf_pq over a grid of efSearch / nprobe values and report recall@k and query latency
+
+# Dependencies:
+
+# modules/memory_index.py; the memory store's vectors.f32 / meta.json layout (modules/memory_store.py), read without opening the store
+
+# Usage (from the repository root):
+
+# python -m agentic_backend.bench.memory_index_report --count 100000 --dim 768
+# python -m agentic_backend.bench.memory_index_report --store agentic_backend/memory_store
+
+# bench/memory_index_report.py
+
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse
+import copy
+import json
+import time
+import numpy as np
+import faiss
+
+from agentic_backend.modules.memory_index import build_index, configure_search, resolve_index_config
+
+
+def synthetic_vectors(count: int, dim: int, seed: int = 0, clusters: int = 256) -> np.ndarray:
+    """Gaussian clusters, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, float]:
+    """Recall@k and per-query latency (single-query searches, as MemoryManager issues them)."""
+    found = np.empty((len(queries), k), dtype=np.int64)
+    times = []
+    for i, query in enumerate(queries):
+        t0 = time.perf_counter()
+        _, I = index.search(query.reshape(1, -1), k)
+        times.append((time.perf_counter() - t0) * 1000)
+        found[i] = I[0]
+    return {
+        "recall": recall_at_k(found, truth),
+        "mean_ms": float(np.mean(times)),
+        "p99_ms": float(np.percentile(times, 99)),
+    }
+
+
+def index_bytes(index: faiss.Index) -> int:
+    return len(faiss.serialize_index(index))
+
+
+def run_report(vectors: np.ndarray, queries: np.ndarray, k: int, base: Dict[str, Any],
+               ef_values: List[int], nprobe_values: List[int]) -> List[Dict[str, Any]]:
+    dim = vectors.shape[1]
+    rows: List[Dict[str, Any]] = []
+
+    t0 = time.perf_counter()
+    flat = build_index("flat", dim, base)
+    flat.add(vectors)
+    build_s = time.perf_counter() - t0
+    _, truth = flat.search(queries, k)
+    rows.append({"index": "flat", "setting": "exact", "build_s": build_s, "bytes": index_bytes(flat),
+                 **measure(flat, queries, truth, k)})
+
+    for kind in ("hnsw", "ivf_flat", "ivf_pq"):
+        t0 = time.perf_counter()
+        try:
+            index = build_index(kind, dim, base, vectors)
+        except ValueError as e:
+            print(f"[report] skipping {kind}: {e}")
+            continue
+        index.add(vectors)
+        build_s = time.perf_counter() - t0
+        size = index_bytes(index)
+
+        if kind == "hnsw":
+            grid = [("ef_search", ef, {"hnsw": {**base["hnsw"], "ef_search": ef}}) for ef in ef_values]
+        else:
+            grid = [("nprobe", n, {"ivf": {**base["ivf"], "nprobe": n}}) for n in nprobe_values]
+
+        for name, value, override in grid:
+            config = copy.deepcopy(base)
+            config.update(override)
+            configure_search(index, config)
+            rows.append({"index": kind, "setting": f"{name}={value}", "build_s": build_s, "bytes": size,
+                         **measure(index, queries, truth, k)})
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]], count: int, dim: int, k: int) -> str:
+    lines = [
+        f"Memory index report: {count} vectors × {dim} dims, recall@{k}",
+        f"{'index':<10} {'setting':<16} {'recall':>7} {'mean ms':>8} {'p99 ms':>8} {'build s':>8} {'MB':>8}",
+    ]
+    for r in rows:
+        lines.append(
+            f"{r['index']:<10} {r['setting']:<16} {r['recall']:>7.3f} {r['mean_ms']:>8.3f} "
+            f"{r['p99_ms']:>8.3f} {r['build_s']:>8.2f} {r['bytes'] / 1e6:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def load_store_vectors(path: str) -> Optional[np.ndarray]:
+    """The store's vectors, read-only: MemoryStore.load() may repair (rewrite) the logs of a store in use."""
+    meta_path = Path(path) / "meta.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    generation, dim = meta.get("generation", 0), meta.get("dim")
+    vectors_path = Path(path) / (f"vectors.{generation}.f32" if generation else "vectors.f32")
+    if not dim or not vectors_path.exists() or vectors_path.stat().st_size < dim * 4:
+        return None
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode="r")
+    return np.array(vectors[: (len(vectors) // dim) * dim].reshape(-1, dim))  # a record mid-append is ignored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of the memory index backends")
+    parser.add_argument("--store", help="memory store directory to read vectors.f32 from (default: synthetic)")
+    parser.add_argument("--count", type=int, default=100_000, help="synthetic vector count")
+    parser.add_argument("--dim", type=int, default=768, help="synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="16,32,64,128", help="HNSW efSearch values")
+    parser.add_argument("--nprobe", default="1,4,16,64", help="IVF nprobe values")
+    parser.add_argument("--pq-m", type=int, help="PQ sub-quantizers (must divide the dimension)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = load_store_vectors(args.store) if args.store else None
+    if vectors is None:
+        if args.store:
+            print(f"[report] {args.store} has no vectors, using synthetic data")
+        vectors = synthetic_vectors(args.count, args.dim, args.seed)
+
+    rng = np.random.default_rng(args.seed + 1)
+    # Queries are perturbed copies of stored vectors, like a follow-up question about a remembered fact
+    picks = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = (vectors[picks] + 0.1 * rng.standard_normal((len(picks), vectors.shape[1]))).astype(np.float32)
+
+    base = resolve_index_config({"pq": {"m": args.pq_m}} if args.pq_m else None)
+    rows = run_report(
+        np.ascontiguousarray(vectors, dtype=np.float32), queries, args.k, base,
+        [int(v) for v in args.ef.split(",")], [int(v) for v in args.nprobe.split(",")],
+    )
+    print(format_report(rows, len(vectors), vectors.shape[1], args.k))
+
+
+if __name__ == "__main__":
+    main()
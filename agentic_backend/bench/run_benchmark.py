@@ -0,0 +1,202 @@
+# bench/run_benchmark.py → Offline End-to-End Agent Benchmark
+# Role: Drives the sample queries from agent.py through the full AgentLoop against the fake LLM server.
+
+# Responsibilities:
+
+# Start bench/fake_llm_server.py and point the config (LLM + memory embeddings) at it
+
+# Run each sample query through AgentLoop (perception → memory → plan → tool → memory)
+
+# Report per-stage and end-to-end latency percentiles
+
+# Dependencies:
+
+# bench/fake_llm_server.py, core/loop.py, core/config.py
+
+# Usage (from the repository root):
+
+# python -m agentic_backend.bench.run_benchmark --repeat 5 --concurrency 2
+# python -m agentic_backend.bench.run_benchmark --backend ollama --script my_script.json
+
+# bench/run_benchmark.py
+
+from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from pathlib import Path
+import argparse
+import asyncio
+import contextlib
+import copy
+import io
+import json
+import random
+import time
+
+from agentic_backend.bench.fake_llm_server import FakeLLMServer, FakeGeminiClient, sample_latency
+from agentic_backend.core.config import AppConfig, ROOT, get_config, set_config
+from agentic_backend.modules.model_manager import ModelManager, set_model_manager
+from agentic_backend.modules.memory import set_memory_manager
+
+AGENT_PY = ROOT / "agent.py"
+
+# Canned MCP tool results: (description, result text)
+BENCH_TOOLS: Dict[str, Any] = {
+    "strings_to_chars_to_int": ("Return the ASCII values of the characters in a word. Usage: strings_to_chars_to_int|input={\"string\": \"INDIA\"}",
+                                '{"ascii_values": [73, 78, 68, 73, 65]}'),
+    "int_list_to_exponential_sum": ("Return sum of exponentials of numbers in a list. Usage: int_list_to_exponential_sum|input={\"int_list\": [73, 78]}",
+                                    '{"result": 7.59982224609308e+33}'),
+    "search_documents": ("Search indexed documents for relevant content. Usage: search_documents|query=\"india Current GDP\"",
+                         "Benchmark document chunk about the requested entity. " * 40),
+    "fetch_content": ("Fetch and parse content from a webpage URL.",
+                      "Benchmark web page text. " * 400),
+}
+
+
+def load_sample_queries(path: Path = AGENT_PY) -> List[str]:
+    """The sample queries are the comment lines at the bottom of agent.py."""
+    lines = path.read_text(encoding="utf-8").splitlines()
+    start = max(i for i, line in enumerate(lines) if "asyncio.run(" in line) + 1
+    return [
+        line.lstrip("#").strip()
+        for line in lines[start:]
+        if line.startswith("#") and line.lstrip("#").strip()
+    ]
+
+
+class BenchDispatcher:
+    """Stands in for MultiMCP: same `get_all_tools()` / `call_tool()` surface, canned results."""
+
+    def __init__(self, latency: Optional[Dict[str, Any]] = None, seed: Optional[int] = None):
+        self.latency = latency or {"dist": "uniform", "min_ms": 50, "max_ms": 150}
+        self.rng = random.Random(seed)
+        self.tools = [
+            SimpleNamespace(name=name, description=desc, parameters={})
+            for name, (desc, _) in BENCH_TOOLS.items()
+        ]
+
+    def get_all_tools(self) -> List[Any]:
+        return self.tools
+
+    async def call_tool(self, tool_name: str, arguments: dict) -> Any:
+        if tool_name not in BENCH_TOOLS:
+            raise ValueError(f"Tool '{tool_name}' not found on any server.")
+        await asyncio.sleep(sample_latency(self.latency, self.rng))
+        return SimpleNamespace(content=SimpleNamespace(text=BENCH_TOOLS[tool_name][1]))
+
+
+def bench_config(base_url: str, backend: str, keep_rate_limits: bool = False) -> AppConfig:
+    """Copy of the process config with the LLM and the memory embeddings pointed at the fake server."""
+    config = copy.deepcopy(get_config())
+    config.profile["memory"]["embedding_url"] = f"{base_url}/api/embeddings"
+    # Fake vectors must never land in the real embedding cache
+    config.profile["memory"].setdefault("embedding_client", {})["cache_dir"] = "embedding_cache/bench"
+    config.profile["memory"]["persist_dir"] = None  # in-process memory only
+
+    if not keep_rate_limits:
+        # Provider quotas (e.g. Gemini's 15 RPM) would dominate the measurement otherwise
+        for info in config.models["models"].values():
+            info.pop("rate_limits", None)
+
+    if backend == "ollama":
+        config.models["models"]["bench-ollama"] = {
+            "type": "ollama",
+            "model": "bench",
+            "url": {"generate": f"{base_url}/api/generate", "embed": f"{base_url}/api/embeddings"},
+        }
+        config.profile["llm"]["text_generation"] = "bench-ollama"
+    return config
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+def format_report(stage_times: Dict[str, List[float]]) -> str:
+    rows = [f"{'stage':<16}{'n':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for stage, values in stage_times.items():
+        ms = [v * 1000 for v in values]
+        rows.append(
+            f"{stage:<16}{len(ms):>6}{percentile(ms, 50):>10.1f}{percentile(ms, 90):>10.1f}"
+            f"{percentile(ms, 99):>10.1f}{max(ms):>10.1f}"
+        )
+    return "\n".join(rows)
+
+
+async def run_benchmark(queries: List[str], dispatcher: Any, repeat: int, concurrency: int,
+                        verbose: bool = False) -> tuple[Dict[str, List[float]], List[int]]:
+    from agentic_backend.core.loop import AgentLoop
+
+    stage_times: Dict[str, List[float]] = {}
+    steps: List[int] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query: str):
+        async with semaphore:
+            agent = AgentLoop(user_input=query, dispatcher=dispatcher)
+            t0 = time.perf_counter()
+            answer = await agent.run()
+            elapsed = time.perf_counter() - t0
+            for stage, values in agent.context.stage_times.items():
+                stage_times.setdefault(stage, []).extend(values)
+            stage_times.setdefault("end_to_end", []).append(elapsed)
+            steps.append(agent.context.step + 1)
+            return answer
+
+    jobs = [one(q) for _ in range(repeat) for q in queries]
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink:
+        await asyncio.gather(*jobs)
+    return stage_times, steps
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline AgentLoop benchmark against a fake LLM server")
+    parser.add_argument("--backend", choices=["gemini", "ollama"], default="gemini",
+                        help="ModelManager path to exercise (gemini uses the Gemini-shaped adapter)")
+    parser.add_argument("--script", help="JSON file with fake server latency/rules overrides")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-tools", action="store_true",
+                        help="Call the MCP servers from profiles.yaml instead of canned tool results")
+    parser.add_argument("--keep-rate-limits", action="store_true",
+                        help="Apply the rate_limits from models.json to the fake backend too")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's own logging")
+    args = parser.parse_args()
+
+    script = json.loads(Path(args.script).read_text()) if args.script else None
+    queries = load_sample_queries()
+
+    with FakeLLMServer(script, seed=args.seed) as server:
+        config = bench_config(server.url, args.backend, args.keep_rate_limits)
+        set_config(config)
+        client = FakeGeminiClient(server.url) if args.backend == "gemini" else None
+        set_model_manager(ModelManager(config, client=client))
+        set_memory_manager(None)
+
+        if args.real_tools:
+            from agentic_backend.core.session import MultiMCP
+            dispatcher = MultiMCP(server_configs=config.section("mcp_servers", []))
+            await dispatcher.initialize()
+        else:
+            dispatcher = BenchDispatcher(seed=args.seed)
+
+        t0 = time.perf_counter()
+        stage_times, steps = await run_benchmark(queries, dispatcher, args.repeat, args.concurrency, args.verbose)
+        wall = time.perf_counter() - t0
+
+    runs = len(steps)
+    print(f"Backend: {args.backend} | queries: {len(queries)} x {args.repeat} | concurrency: {args.concurrency}")
+    print(f"Fake server calls: {server.llm.counts}")
+    print(f"Average steps per query: {sum(steps) / max(runs, 1):.2f}")
+    print(format_report(stage_times))
+    print(f"Wall time: {wall:.2f}s ({runs / wall:.2f} queries/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
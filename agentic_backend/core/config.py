@@ -0,0 +1,66 @@
+# core/config.py → Central Configuration
+# Role: Loads config/profiles.yaml and config/models.json once per process.
+
+# Responsibilities:
+
+# Parse the agent profile and model registry on first use
+
+# Hand the same config object to every layer (context, model manager, agent)
+
+# Allow a different config to be installed (e.g. for benchmarks)
+
+# Dependencies:
+
+# config/profiles.yaml, config/models.json
+
+# Used by: context.py, agent.py, modules/model_manager.py
+
+# core/config.py
+
+from typing import Any, Dict, Optional
+from pathlib import Path
+import threading
+import json
+import yaml
+
+ROOT = Path(__file__).parent.parent
+PROFILE_YAML = ROOT / "config" / "profiles.yaml"
+MODELS_JSON = ROOT / "config" / "models.json"
+
+
+class AppConfig:
+    def __init__(self, profile_path: Path = PROFILE_YAML, models_path: Path = MODELS_JSON):
+        self.profile_path = Path(profile_path)
+        self.models_path = Path(models_path)
+        self.profile: Dict[str, Any] = yaml.safe_load(self.profile_path.read_text())
+        self.models: Dict[str, Any] = json.loads(self.models_path.read_text())
+
+    def section(self, name: str, default: Any = None) -> Any:
+        return self.profile.get(name, default)
+
+    def model_info(self, key: str) -> Dict[str, Any]:
+        return self.models["models"][key]
+
+    def __repr__(self):
+        return f"<AppConfig {self.profile_path.name} + {self.models_path.name}>"
+
+
+_config: Optional[AppConfig] = None
+_lock = threading.Lock()
+
+
+def get_config() -> AppConfig:
+    """Process-wide config, loaded on first use."""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                _config = AppConfig()
+    return _config
+
+
+def set_config(config: Optional[AppConfig]) -> None:
+    """Install a config (or `None` to reload from disk on next use)."""
+    global _config
+    with _lock:
+        _config = config
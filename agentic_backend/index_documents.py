@@ -0,0 +1,63 @@
+# index_documents.py → Document Indexer CLI
+# Role: Builds and refreshes the document index outside the doc server (mcp_server_2.py), e.g. ahead of time or
+# instead of the server's background indexer (documents.indexer.background, off by default).
+
+# Responsibilities:
+
+# One-shot: index new / modified documents, purge deleted ones, write the index snapshot, exit
+
+# Watch: keep the index open and repeat that pass every few seconds (a pass over an unchanged directory is a stat per file)
+
+# Hold the index directory's lock, so a second indexer never writes the same store
+
+# Usage (from agentic_backend/):
+
+# python index_documents.py            # one pass
+# python index_documents.py --watch    # keep indexing changes; interval from profiles.yaml documents.indexer
+# python index_documents.py --retry-failed   # also retry documents that failed before and have not changed since
+
+# index_documents.py
+
+import argparse
+import sys
+import time
+
+from mcp_server_2 import DOC_CONFIG, ROOT, DocumentIndexer, indexer_lock, mcp_log
+
+
+def main():
+    indexer_config = DOC_CONFIG.get("indexer", {})
+    parser = argparse.ArgumentParser(description="Index documents/ into faiss_index/ for the document server")
+    parser.add_argument("--watch", action="store_true", help="keep running and index changes as they appear")
+    parser.add_argument("--interval", type=float, default=float(indexer_config.get("watch_interval", 5.0)),
+                        help="seconds between passes in watch mode")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="retry documents that failed to index, even if they have not changed since")
+    args = parser.parse_args()
+
+    with indexer_lock(ROOT / "faiss_index") as acquired:
+        if not acquired:
+            mcp_log("ERROR", "Another indexer holds faiss_index/indexer.lock; exiting")
+            sys.exit(1)
+
+        indexer = DocumentIndexer()
+        if args.retry_failed:
+            indexer.store.clear_failures()
+        try:
+            t0 = time.perf_counter()
+            if not indexer.sync():
+                mcp_log("INFO", "Index is up to date")
+            mcp_log("INFO", f"Pass finished in {time.perf_counter() - t0:.1f}s")
+            while args.watch:
+                time.sleep(args.interval)
+                indexer.sync()
+        except KeyboardInterrupt:
+            mcp_log("INFO", "Stopping indexer")
+        finally:
+            if indexer.unsaved:
+                indexer.save()
+            indexer.close()
+
+
+if __name__ == "__main__":
+    main()
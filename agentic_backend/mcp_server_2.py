@@ -1,423 +1,687 @@
-from mcp.server.fastmcp import FastMCP, Image
-from mcp.server.fastmcp.prompts import base
-from mcp.types import TextContent
-from mcp import types
-from PIL import Image as PILImage
-import math
-import sys
-import os
-import json
-import faiss
-import numpy as np
-from pathlib import Path
-import requests
-from markitdown import MarkItDown
-import time
-from models import AddInput, AddOutput, SqrtInput, SqrtOutput, StringsToIntsInput, StringsToIntsOutput, ExpSumInput, ExpSumOutput, PythonCodeInput, PythonCodeOutput, UrlInput, FilePathInput, MarkdownInput, MarkdownOutput, ChunkListOutput
-from tqdm import tqdm
-import hashlib
-from pydantic import BaseModel
-import subprocess
-import sqlite3
-import trafilatura
-import pymupdf4llm
-import re
-import base64 # ollama needs base64-encoded-image
-
-
-mcp = FastMCP("Calculator")
-
-EMBED_URL = "http://localhost:11434/api/embeddings"
-OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
-OLLAMA_URL = "http://localhost:11434/api/generate"
-EMBED_MODEL = "nomic-embed-text"
-GEMMA_MODEL = "gemma3:12b"
-PHI_MODEL = "phi4:latest"
-CHUNK_SIZE = 256
-CHUNK_OVERLAP = 40
-MAX_CHUNK_LENGTH = 512  # characters
-TOP_K = 3  # FAISS top-K matches
-ROOT = Path(__file__).parent.resolve()
-
-
-def get_embedding(text: str) -> np.ndarray:
-    response = requests.post(EMBED_URL, json={"model": EMBED_MODEL, "prompt": text})
-    response.raise_for_status()
-    return np.array(response.json()["embedding"], dtype=np.float32)
-
-def chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
-    words = text.split()
-    for i in range(0, len(words), size - overlap):
-        yield " ".join(words[i:i+size])
-
-def mcp_log(level: str, message: str) -> None:
-    sys.stderr.write(f"{level}: {message}\n")
-    sys.stderr.flush()
-
-# === CHUNKING ===
-
-
-
-
-
-def are_related(chunk1: str, chunk2: str, index: int) -> bool:
-    prompt = f"""
-You are helping to segment a document into topic-based chunks. Unfortunately, the sentences are mixed up.
-
-CHUNK 1: "{chunk1}"
-CHUNK 2: "{chunk2}"
-
-Should these two chunks appear in the **same paragraph or flow of writing**?
-
-Even if the subject changes slightly (e.g., One person to another), treat them as related **if they belong to the same broader context or topic** (like cricket, AI, or real estate). 
-
-Also consider cues like continuity words (e.g., "However", "But", "Also") or references that link the sentences.
-
-Answer with:
-Yes – if the chunks should appear together in the same paragraph or section  
-No – if they are about different topics and should be separated
-
-Just respond in one word (Yes or No), and do not provide any further explanation.
-"""
-    print(f"\n🔍 Comparing chunk {index} and {index+1}")
-    print(f"  Chunk {index} → {chunk1[:60]}{'...' if len(chunk1) > 60 else ''}")
-    print(f"  Chunk {index+1} → {chunk2[:60]}{'...' if len(chunk2) > 60 else ''}")
-
-    response = requests.post(OLLAMA_CHAT_URL, json={
-        "model": PHI_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "stream": False
-    })
-    response.raise_for_status()
-    reply = response.json().get("message", {}).get("content", "").strip().lower()
-    print(f"  ✅ Model reply: {reply}")
-    return reply.startswith("yes")
-
-
-
-@mcp.tool()
-def search_documents(query: str) -> list[str]:
-    """Search indexed documents for relevant content. Usage: search_documents|query="india Current GDP" """
-    ensure_faiss_ready()
-    mcp_log("SEARCH", f"Query: {query}")
-    try:
-        index = faiss.read_index(str(ROOT / "faiss_index" / "index.bin"))
-        metadata = json.loads((ROOT / "faiss_index" / "metadata.json").read_text())
-        query_vec = get_embedding(query).reshape(1, -1)
-        D, I = index.search(query_vec, k=5)
-        results = []
-        for idx in I[0]:
-            data = metadata[idx]
-            results.append(f"{data['chunk']}\n[Source: {data['doc']}, ID: {data['chunk_id']}]")
-        return results
-    except Exception as e:
-        return [f"ERROR: Failed to search: {str(e)}"]
-
-
-def caption_image(img_url_or_path: str) -> str:
-    mcp_log("CAPTION", f"🖼️ Attempting to caption image: {img_url_or_path}")
-
-    full_path = Path(__file__).parent / "documents" / img_url_or_path
-    full_path = full_path.resolve()
-
-    if not full_path.exists():
-        mcp_log("ERROR", f"❌ Image file not found: {full_path}")
-        return f"[Image file not found: {img_url_or_path}]"
-
-    try:
-        if img_url_or_path.startswith("http"): # for extract_web_pages
-            response = requests.get(img_url_or_path)
-            encoded_image = base64.b64encode(response.content).decode("utf-8")
-        else:
-            with open(full_path, "rb") as img_file:
-                encoded_image = base64.b64encode(img_file.read()).decode("utf-8")
-
-        # Set stream=True to get the full generator-style output
-        with requests.post(OLLAMA_URL, json={
-            "model": GEMMA_MODEL,
-            "prompt": "If there is lot of text in the image, then ONLY reply back with exact text in the image, else Describe the image such that your response can replace 'alt-text' for it. Only explain the contents of the image and provide no further explaination.",
-            "images": [encoded_image],
-            "stream": True
-        }, stream=True) as response:
-
-            caption_parts = []
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    caption_parts.append(data.get("response", ""))
-                    if data.get("done", False):
-                        break
-                except json.JSONDecodeError:
-                    continue  # silently skip malformed lines
-
-            caption = "".join(caption_parts).strip()
-            mcp_log("CAPTION", f"✅ Caption generated: {caption}")
-            return caption if caption else "[No caption returned]"
-
-    except Exception as e:
-        mcp_log("ERROR", f"⚠️ Failed to caption image {img_url_or_path}: {e}")
-        return f"[Image could not be processed: {img_url_or_path}]"
-
-
-
-
-
-def replace_images_with_captions(markdown: str) -> str:
-    def replace(match):
-        alt, src = match.group(1), match.group(2)
-        try:
-            caption = caption_image(src)
-            # Attempt to delete only if local and file exists
-            if not src.startswith("http"):
-                img_path = Path(__file__).parent / "documents" / src
-                if img_path.exists():
-                    img_path.unlink()
-                    mcp_log("INFO", f"🗑️ Deleted image after captioning: {img_path}")
-            return f"**Image:** {caption}"
-        except Exception as e:
-            mcp_log("WARN", f"Image deletion failed: {e}")
-            return f"[Image could not be processed: {src}]"
-
-    return re.sub(r'!\[(.*?)\]\((.*?)\)', replace, markdown)
-
-
-@mcp.tool()
-def extract_webpage(input: UrlInput) -> MarkdownOutput:
-    """Extract and convert webpage content to markdown. Usage: extract_webpage|input={"url": "https://example.com"}"""
-
-    downloaded = trafilatura.fetch_url(input.url)
-    if not downloaded:
-        return MarkdownOutput(markdown="Failed to download the webpage.")
-
-    markdown = trafilatura.extract(
-        downloaded,
-        include_comments=False,
-        include_tables=True,
-        include_images=True,
-        output_format='markdown'
-    ) or ""
-
-    markdown = replace_images_with_captions(markdown)
-    return MarkdownOutput(markdown=markdown)
-
-@mcp.tool()
-def extract_pdf(input: FilePathInput) -> MarkdownOutput:
-    """Convert PDF file content to markdown format. Usage: extract_pdf|input={"file_path": "documents/dlf.pdf"}"""
-
-    if not os.path.exists(input.file_path):
-        return MarkdownOutput(markdown=f"File not found: {input.file_path}")
-
-    ROOT = Path(__file__).parent.resolve()
-    global_image_dir = ROOT / "documents" / "images"
-    global_image_dir.mkdir(parents=True, exist_ok=True)
-
-    # Actual markdown with relative image paths
-    markdown = pymupdf4llm.to_markdown(
-        input.file_path,
-        write_images=True,
-        image_path=str(global_image_dir)
-    )
-
-    # Re-point image links in the markdown
-    markdown = re.sub(
-        r'!\[\]\((.*?/images/)([^)]+)\)',
-        r'![](images/\2)',
-        markdown.replace("\\", "/")
-    )
-
-    markdown = replace_images_with_captions(markdown)
-    return MarkdownOutput(markdown=markdown)
-
-
-def semantic_merge(text: str) -> list[str]:
-    """Splits text semantically using LLM: detects second topic and reuses leftover intelligently."""
-    WORD_LIMIT = 512
-    words = text.split()
-    i = 0
-    final_chunks = []
-
-    while i < len(words):
-        # 1. Take next chunk of words (and prepend leftovers if any)
-        chunk_words = words[i:i + WORD_LIMIT]
-        chunk_text = " ".join(chunk_words).strip()
-
-        prompt = f"""
-You are a markdown document segmenter.
-
-Here is a portion of a markdown document:
-
----
-{chunk_text}
----
-
-If this chunk clearly contains **more than one distinct topic or section**, reply ONLY with the **second part**, starting from the first sentence or heading of the new topic.
-
-If it's only one topic, reply with NOTHING.
-
-Keep markdown formatting intact.
-"""
-
-        try:
-            response = requests.post(OLLAMA_CHAT_URL, json={
-                "model": PHI_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "stream": False
-            })
-            reply = response.json().get("message", {}).get("content", "").strip()
-
-            if reply:
-                # If LLM returned second part, separate it
-                split_point = chunk_text.find(reply)
-                if split_point != -1:
-                    first_part = chunk_text[:split_point].strip()
-                    second_part = reply.strip()
-
-                    final_chunks.append(first_part)
-
-                    # Get remaining words from second_part and re-use them in next batch
-                    leftover_words = second_part.split()
-                    words = leftover_words + words[i + WORD_LIMIT:]
-                    i = 0  # restart loop with leftover + remaining
-                    continue
-                else:
-                    # fallback: if split point not found
-                    final_chunks.append(chunk_text)
-            else:
-                final_chunks.append(chunk_text)
-
-        except Exception as e:
-            mcp_log("ERROR", f"Semantic chunking LLM error: {e}")
-            final_chunks.append(chunk_text)
-
-        i += WORD_LIMIT
-
-    return final_chunks
-
-
-
-
-
-
-
-def process_documents():
-    """Process documents and create FAISS index using unified multimodal strategy."""
-    mcp_log("INFO", "Indexing documents with unified RAG pipeline...")
-    ROOT = Path(__file__).parent.resolve()
-    DOC_PATH = ROOT / "documents"
-    INDEX_CACHE = ROOT / "faiss_index"
-    INDEX_CACHE.mkdir(exist_ok=True)
-    INDEX_FILE = INDEX_CACHE / "index.bin"
-    METADATA_FILE = INDEX_CACHE / "metadata.json"
-    CACHE_FILE = INDEX_CACHE / "doc_index_cache.json"
-
-    def file_hash(path):
-        return hashlib.md5(Path(path).read_bytes()).hexdigest()
-
-    CACHE_META = json.loads(CACHE_FILE.read_text()) if CACHE_FILE.exists() else {}
-    metadata = json.loads(METADATA_FILE.read_text()) if METADATA_FILE.exists() else []
-    index = faiss.read_index(str(INDEX_FILE)) if INDEX_FILE.exists() else None
-
-    for file in DOC_PATH.glob("*.*"):
-        fhash = file_hash(file)
-        if file.name in CACHE_META and CACHE_META[file.name] == fhash:
-            mcp_log("SKIP", f"Skipping unchanged file: {file.name}")
-            continue
-
-        mcp_log("PROC", f"Processing: {file.name}")
-        try:
-            ext = file.suffix.lower()
-            markdown = ""
-
-            if ext == ".pdf":
-                mcp_log("INFO", f"Using MuPDF4LLM to extract {file.name}")
-                markdown = extract_pdf(FilePathInput(file_path=str(file))).markdown
-
-            elif ext in [".html", ".htm", ".url"]:
-                mcp_log("INFO", f"Using Trafilatura to extract {file.name}")
-                markdown = extract_webpage(UrlInput(url=file.read_text().strip())).markdown
-
-            else:
-                # Fallback to MarkItDown for other formats
-                converter = MarkItDown()
-                mcp_log("INFO", f"Using MarkItDown fallback for {file.name}")
-                markdown = converter.convert(str(file)).text_content
-
-            if not markdown.strip():
-                mcp_log("WARN", f"No content extracted from {file.name}")
-                continue
-
-            if len(markdown.split()) < 10:
-                mcp_log("WARN", f"Content too short for semantic merge in {file.name} → Skipping chunking.")
-                chunks = [markdown.strip()]
-            else:
-                mcp_log("INFO", f"Running semantic merge on {file.name} with {len(markdown.split())} words")
-                chunks = semantic_merge(markdown)
-
-
-            embeddings_for_file = []
-            new_metadata = []
-            for i, chunk in enumerate(tqdm(chunks, desc=f"Embedding {file.name}")):
-                embedding = get_embedding(chunk)
-                embeddings_for_file.append(embedding)
-                new_metadata.append({
-                    "doc": file.name,
-                    "chunk": chunk,
-                    "chunk_id": f"{file.stem}_{i}"
-                })
-
-            if embeddings_for_file:
-                if index is None:
-                    dim = len(embeddings_for_file[0])
-                    index = faiss.IndexFlatL2(dim)
-                index.add(np.stack(embeddings_for_file))
-                metadata.extend(new_metadata)
-                CACHE_META[file.name] = fhash
-
-                # ✅ Immediately save index and metadata
-                CACHE_FILE.write_text(json.dumps(CACHE_META, indent=2))
-                METADATA_FILE.write_text(json.dumps(metadata, indent=2))
-                faiss.write_index(index, str(INDEX_FILE))
-                mcp_log("SAVE", f"Saved FAISS index and metadata after processing {file.name}")
-
-        except Exception as e:
-            mcp_log("ERROR", f"Failed to process {file.name}: {e}")
-
-
-
-def ensure_faiss_ready():
-    from pathlib import Path
-    index_path = ROOT / "faiss_index" / "index.bin"
-    meta_path = ROOT / "faiss_index" / "metadata.json"
-    if not (index_path.exists() and meta_path.exists()):
-        mcp_log("INFO", "Index not found — running process_documents()...")
-        process_documents()
-    else:
-        mcp_log("INFO", "Index already exists. Skipping regeneration.")
-
-
-if __name__ == "__main__":
-    print("STARTING THE SERVER AT AMAZING LOCATION")
-
-    if len(sys.argv) > 1 and sys.argv[1] == "dev":
-        mcp.run() # Run without transport for dev server
-    else:
-        # Start the server in a separate thread
-        import threading
-        server_thread = threading.Thread(target=lambda: mcp.run(transport="stdio"))
-        server_thread.daemon = True
-        server_thread.start()
-        
-        # Wait a moment for the server to start
-        time.sleep(2)
-        
-        # Process documents after server is running
-        process_documents()
-        
-        # Keep the main thread alive
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\nShutting down...")
+from mcp.server.fastmcp import FastMCP, Image
+from mcp.server.fastmcp.prompts import base
+from mcp.types import TextContent
+from mcp import types
+from PIL import Image as PILImage
+import io
+import math
+import sys
+import os
+import json
+import faiss
+import numpy as np
+from pathlib import Path
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from markitdown import MarkItDown
+import time
+from modules.embedding_cache import EmbeddingCache
+from modules.doc_index import DocumentIndex, file_signature, indexer_lock, new_index, publish_snapshot, reconcile_index
+from modules.chunk_store import ChunkStore
+from modules.ingest import ExtractorPool, IngestPipeline
+from modules.caption_cache import CaptionCache
+from modules.doc_chunker import DEFAULT_CHUNKER, LocalChunker, llm_segment
+from modules.doc_select import DEFAULT_SELECTION, fit_budget, select
+from core.config import get_config
+from models import AddInput, AddOutput, SqrtInput, SqrtOutput, StringsToIntsInput, StringsToIntsOutput, ExpSumInput, ExpSumOutput, PythonCodeInput, PythonCodeOutput, UrlInput, FilePathInput, MarkdownInput, MarkdownOutput, ChunkListOutput
+import hashlib
+from pydantic import BaseModel
+import subprocess
+import sqlite3
+import trafilatura
+import pymupdf4llm
+import re
+import base64 # ollama needs base64-encoded-image
+
+
+mcp = FastMCP("Calculator")
+
+EMBED_URL = "http://localhost:11434/api/embeddings"
+OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
+OLLAMA_URL = "http://localhost:11434/api/generate"
+EMBED_BATCH_URL = "http://localhost:11434/api/embed"
+EMBED_MODEL = "nomic-embed-text"
+EMBED_BATCH_SIZE = 64  # texts per /api/embed request
+EMBED_CONCURRENCY = 4  # /api/embed requests in flight at once
+EMBED_BATCH_SUPPORTED = True  # cleared the first time the server answers /api/embed with 404/405
+GEMMA_MODEL = "gemma3:12b"
+PHI_MODEL = "phi4:latest"
+CHUNK_SIZE = 256
+CHUNK_OVERLAP = 40
+MAX_CHUNK_LENGTH = 512  # characters
+TOP_K = 3  # FAISS top-K matches
+ROOT = Path(__file__).parent.resolve()
+EMBED_CACHE = EmbeddingCache(ROOT / "faiss_index" / "embedding_cache", EMBED_MODEL)  # (model, text hash) → vector
+INDEX_SNAPSHOT_SECONDS = 30  # while indexing, rewrite index.bin at most this often (and once at the end)
+DOC_COMPACT_DEAD_RATIO = 0.3  # compact the chunk store once this fraction of its vectors belongs to removed chunks
+INGEST_EXTRACT_WORKERS = None  # extraction processes (None = CPU count - 1, at most 4)
+INGEST_CHUNK_WORKERS = 4  # chunking threads (waiting on the LLM or the embedding server)
+INGEST_EMBED_WORKERS = 2  # embedding threads
+INGEST_QUEUE_SIZE = 8  # documents buffered between pipeline stages
+INGEST_COMMIT_DOCS = 8  # documents per store transaction / index add
+INGEST_INLINE_MAX = 2  # passes with at most this many changed documents extract in-process (no worker start-up)
+INGEST_POOL_IDLE_SECONDS = 300  # extraction workers are kept this long between passes
+DOC_CONFIG = get_config().section("documents", {}) or {}  # profiles.yaml → documents
+CHUNKER_CONFIG = {**DEFAULT_CHUNKER, **DOC_CONFIG.get("chunker", {})}
+_budget = get_config().section("budget", {}) or {}
+SEARCH_CONFIG = {  # results share the agent's tool-result budget (budget.tool_result_tokens) unless set explicitly
+    **DEFAULT_SELECTION,
+    "char_budget": int(_budget.get("tool_result_tokens", 1000) * _budget.get("chars_per_token", 4)),
+    **DOC_CONFIG.get("search", {}),
+}
+CAPTION_CONFIG = {"workers": 4, "min_side": 48, "min_bytes": 2048, **DOC_CONFIG.get("captions", {})}  # per extraction process
+CAPTION_PROMPT = "If there is lot of text in the image, then ONLY reply back with exact text in the image, else Describe the image such that your response can replace 'alt-text' for it. Only explain the contents of the image and provide no further explaination."
+CAPTION_CACHE = CaptionCache(ROOT / "faiss_index" / "caption_cache.db", GEMMA_MODEL, CAPTION_PROMPT)  # image hash → caption
+DOC_INDEX = DocumentIndex(ROOT / "faiss_index" / "index.bin", ROOT / "faiss_index")  # resident, hot-swapped
+EXTRACT_POOL = ExtractorPool(INGEST_EXTRACT_WORKERS, INGEST_POOL_IDLE_SECONDS)  # kept across indexing passes, started lazily
+_http_local = threading.local()
+
+LOCAL_CHUNKER = LocalChunker(lambda texts: get_embeddings(texts), CHUNKER_CONFIG)  # embeds sentences, not LLM calls
+
+
+def get_embedding(text: str) -> np.ndarray:
+    return get_embeddings([text])[0]
+
+
+def get_embeddings(texts: list[str]) -> np.ndarray:
+    """
+    Unit-length embeddings for `texts`, one row each. Cache misses go to /api/embed in batches of
+    EMBED_BATCH_SIZE, up to EMBED_CONCURRENCY requests at a time.
+    """
+    vectors = EMBED_CACHE.get_many(texts)
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    batches = [missing[i:i + EMBED_BATCH_SIZE] for i in range(0, len(missing), EMBED_BATCH_SIZE)]
+    if len(batches) > 1:
+        with ThreadPoolExecutor(min(EMBED_CONCURRENCY, len(batches))) as pool:
+            embedded = list(pool.map(lambda batch: _embed_batch([texts[i] for i in batch]), batches))
+    else:
+        embedded = [_embed_batch([texts[i] for i in batch]) for batch in batches]
+    for batch, batch_vectors in zip(batches, embedded):
+        EMBED_CACHE.put_many([texts[i] for i in batch], batch_vectors)
+        for i, vector in zip(batch, batch_vectors):
+            vectors[i] = vector
+    return _unit_rows(np.stack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    # /api/embed returns unit vectors, /api/embeddings doesn't: normalize so both paths (and the cache) agree
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+
+def _http() -> requests.Session:
+    if not hasattr(_http_local, "session"):
+        _http_local.session = requests.Session()  # keep-alive per thread
+    return _http_local.session
+
+
+def _embed_batch(texts: list[str]) -> list[np.ndarray]:
+    global EMBED_BATCH_SUPPORTED
+    if EMBED_BATCH_SUPPORTED:
+        response = _http().post(EMBED_BATCH_URL, json={"model": EMBED_MODEL, "input": texts})
+        if response.status_code in (404, 405):
+            EMBED_BATCH_SUPPORTED = False
+            mcp_log("WARN", "Embedding server has no /api/embed; falling back to one request per text")
+        else:
+            response.raise_for_status()
+            return [np.array(v, dtype=np.float32) for v in response.json()["embeddings"]]
+    embedded = []
+    for text in texts:
+        response = _http().post(EMBED_URL, json={"model": EMBED_MODEL, "prompt": text})
+        response.raise_for_status()
+        embedded.append(np.array(response.json()["embedding"], dtype=np.float32))
+    return embedded
+
+def chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    words = text.split()
+    for i in range(0, len(words), size - overlap):
+        yield " ".join(words[i:i+size])
+
+def mcp_log(level: str, message: str) -> None:
+    sys.stderr.write(f"{level}: {message}\n")
+    sys.stderr.flush()
+
+# === CHUNKING ===
+
+
+
+
+
+def are_related(chunk1: str, chunk2: str, index: int) -> bool:
+    prompt = f"""
+You are helping to segment a document into topic-based chunks. Unfortunately, the sentences are mixed up.
+
+CHUNK 1: "{chunk1}"
+CHUNK 2: "{chunk2}"
+
+Should these two chunks appear in the **same paragraph or flow of writing**?
+
+Even if the subject changes slightly (e.g., One person to another), treat them as related **if they belong to the same broader context or topic** (like cricket, AI, or real estate). 
+
+Also consider cues like continuity words (e.g., "However", "But", "Also") or references that link the sentences.
+
+Answer with:
+Yes – if the chunks should appear together in the same paragraph or section  
+No – if they are about different topics and should be separated
+
+Just respond in one word (Yes or No), and do not provide any further explanation.
+"""
+    print(f"\n🔍 Comparing chunk {index} and {index+1}")
+    print(f"  Chunk {index} → {chunk1[:60]}{'...' if len(chunk1) > 60 else ''}")
+    print(f"  Chunk {index+1} → {chunk2[:60]}{'...' if len(chunk2) > 60 else ''}")
+
+    response = requests.post(OLLAMA_CHAT_URL, json={
+        "model": PHI_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": False
+    })
+    response.raise_for_status()
+    reply = response.json().get("message", {}).get("content", "").strip().lower()
+    print(f"  ✅ Model reply: {reply}")
+    return reply.startswith("yes")
+
+
+
+@mcp.tool()
+def search_documents(query: str) -> list[str]:
+    """Search indexed documents for relevant content. Usage: search_documents|query="india Current GDP" """
+    mcp_log("SEARCH", f"Query: {query}")
+    try:
+        return _search_documents([query])
+    except Exception as e:
+        return [f"ERROR: Failed to search: {str(e)}"]
+
+
+@mcp.tool()
+def search_documents_many(queries: list[str]) -> list[str]:
+    """Search indexed documents for several phrasings at once (one embedding request, one index search). Usage: search_documents_many|queries=["india GDP 2024", "india economy size"]"""
+    mcp_log("SEARCH", f"Queries: {queries}")
+    try:
+        return _search_documents(queries)
+    except Exception as e:
+        return [f"ERROR: Failed to search: {str(e)}"]
+
+
+def _search_documents(queries: list[str]) -> list[str]:
+    # Always the last complete snapshot; indexing never runs inside a query
+    snapshot = DOC_INDEX.current()
+    if snapshot is None:
+        ensure_faiss_ready()
+        return ["ERROR: Document index is not available yet; documents are being indexed in the background, try again shortly"]
+    if not queries:
+        return []
+    query_vectors = get_embeddings(queries)
+    fetch = int(SEARCH_CONFIG["k"]) * int(SEARCH_CONFIG["overfetch"])
+    D, I = snapshot.index.search(query_vectors, k=min(fetch, snapshot.index.ntotal))
+    # Best distance per chunk across all queries, so a chunk matched by several phrasings appears once
+    best = {}
+    for distances, ids in zip(D, I):
+        for distance, idx in zip(distances, ids):
+            if idx >= 0 and distance < best.get(int(idx), np.inf):
+                best[int(idx)] = distance
+    rows = snapshot.store.get(list(best))
+    ranked = sorted((i for i in best if i in rows), key=best.get)  # chunks removed since the snapshot drop out
+    if not ranked:
+        return [snapshot.status()]
+    candidates = [rows[i] for i in ranked]
+    texts = [data["chunk"] for data in candidates]
+    try:
+        vectors = snapshot.store.vectors_for(ranked)
+    except (KeyError, OSError, ValueError):  # vector file compacted under this snapshot; re-embed the candidates
+        vectors = get_embeddings(texts)
+    # Near-duplicates dropped, MMR-diversified, then cut to the character budget
+    chosen = select(query_vectors, vectors, texts, SEARCH_CONFIG)
+    results = [(candidates[i]["chunk"], f"[Source: {candidates[i]['doc']}, ID: {candidates[i]['chunk_id']}]") for i in chosen]
+    status = snapshot.status()
+    results = fit_budget(results, int(SEARCH_CONFIG["char_budget"]) - len(status), int(SEARCH_CONFIG["min_chars"]))
+    mcp_log("SEARCH", f"{len(ranked)} candidates → {len(chosen)} selected → {len(results)} within budget")
+    return results + [status]
+
+
+def load_image(img_url_or_path: str) -> bytes:
+    if img_url_or_path.startswith("http"): # for extract_web_pages
+        response = requests.get(img_url_or_path, timeout=30)
+        response.raise_for_status()
+        return response.content
+    full_path = (Path(__file__).parent / "documents" / img_url_or_path).resolve()
+    if not full_path.exists():
+        raise FileNotFoundError(f"Image file not found: {full_path}")
+    return full_path.read_bytes()
+
+
+def is_decorative(image: bytes) -> bool:
+    """Icons, rules, spacers: too small to be worth a model call."""
+    if len(image) < int(CAPTION_CONFIG["min_bytes"]):
+        return True
+    try:
+        width, height = PILImage.open(io.BytesIO(image)).size  # reads the header only
+    except Exception:
+        return False  # unknown format: let the model decide
+    return min(width, height) < int(CAPTION_CONFIG["min_side"])
+
+
+def caption_bytes(image: bytes, label: str = "image") -> str:
+    """Caption from the vision model (streamed), cached by image content hash."""
+    key = CAPTION_CACHE.key(image)
+    cached = CAPTION_CACHE.get_many([key]).get(key)
+    if cached is not None:
+        return cached
+
+    encoded_image = base64.b64encode(image).decode("utf-8")
+    # Set stream=True to get the full generator-style output
+    with requests.post(OLLAMA_URL, json={
+        "model": GEMMA_MODEL,
+        "prompt": CAPTION_PROMPT,
+        "images": [encoded_image],
+        "stream": True
+    }, stream=True) as response:
+
+        caption_parts = []
+        for line in response.iter_lines():
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+                caption_parts.append(data.get("response", ""))
+                if data.get("done", False):
+                    break
+            except json.JSONDecodeError:
+                continue  # silently skip malformed lines
+
+    caption = "".join(caption_parts).strip()
+    mcp_log("CAPTION", f"✅ Caption generated for {label}: {caption}")
+    if caption:
+        CAPTION_CACHE.put(key, caption)
+    return caption if caption else "[No caption returned]"
+
+
+def caption_image(img_url_or_path: str) -> str:
+    mcp_log("CAPTION", f"🖼️ Attempting to caption image: {img_url_or_path}")
+    try:
+        return caption_bytes(load_image(img_url_or_path), img_url_or_path)
+    except FileNotFoundError as e:
+        mcp_log("ERROR", f"❌ {e}")
+        return f"[Image file not found: {img_url_or_path}]"
+    except Exception as e:
+        mcp_log("ERROR", f"⚠️ Failed to caption image {img_url_or_path}: {e}")
+        return f"[Image could not be processed: {img_url_or_path}]"
+
+
+def replace_images_with_captions(markdown: str, source: str = "document") -> str:
+    """
+    Replace image links with captions: decorative images are dropped without a model call, cached
+    captions are reused, and the rest are captioned CAPTION_CONFIG["workers"] at a time.
+    """
+    matches = list(re.finditer(r'!\[(.*?)\]\((.*?)\)', markdown))
+    if not matches:
+        return markdown
+    t0 = time.perf_counter()
+    sources = list(dict.fromkeys(m.group(2) for m in matches))
+    captions, images = {}, {}
+    skipped = 0
+    for src in sources:
+        try:
+            image = load_image(src)
+        except Exception as e:
+            mcp_log("WARN", f"Could not load image {src}: {e}")
+            captions[src] = f"[Image could not be processed: {src}]"
+            continue
+        if is_decorative(image):
+            captions[src] = None
+            skipped += 1
+        else:
+            images[src] = image
+
+    keys = {src: CAPTION_CACHE.key(image) for src, image in images.items()}
+    cached = CAPTION_CACHE.get_many(list(keys.values()))
+    missing = [src for src in images if keys[src] not in cached]
+    for src in images:
+        if keys[src] in cached:
+            captions[src] = cached[keys[src]]
+
+    def caption_one(src):
+        try:
+            return caption_bytes(images[src], src)
+        except Exception as e:
+            mcp_log("ERROR", f"⚠️ Failed to caption image {src}: {e}")
+            return f"[Image could not be processed: {src}]"
+
+    if missing:
+        with ThreadPoolExecutor(max(1, min(int(CAPTION_CONFIG["workers"]), len(missing)))) as pool:
+            for src, caption in zip(missing, pool.map(caption_one, missing)):
+                captions[src] = caption
+
+    # Attempt to delete only if local and file exists
+    for src in sources:
+        if not src.startswith("http"):
+            img_path = Path(__file__).parent / "documents" / src
+            try:
+                if img_path.exists():
+                    img_path.unlink()
+            except Exception as e:
+                mcp_log("WARN", f"Image deletion failed: {e}")
+
+    mcp_log("CAPTION", f"{source}: {len(sources)} images → {len(images) - len(missing)} cached, {len(missing)} captioned, "
+                       f"{skipped} decorative skipped in {time.perf_counter() - t0:.1f}s")
+
+    def replace(match):
+        caption = captions.get(match.group(2))
+        return f"**Image:** {caption}" if caption is not None else ""
+
+    return re.sub(r'!\[(.*?)\]\((.*?)\)', replace, markdown)
+
+
+@mcp.tool()
+def extract_webpage(input: UrlInput) -> MarkdownOutput:
+    """Extract and convert webpage content to markdown. Usage: extract_webpage|input={"url": "https://example.com"}"""
+
+    downloaded = trafilatura.fetch_url(input.url)
+    if not downloaded:
+        return MarkdownOutput(markdown="Failed to download the webpage.")
+
+    markdown = trafilatura.extract(
+        downloaded,
+        include_comments=False,
+        include_tables=True,
+        include_images=True,
+        output_format='markdown'
+    ) or ""
+
+    markdown = replace_images_with_captions(markdown, input.url)
+    return MarkdownOutput(markdown=markdown)
+
+@mcp.tool()
+def extract_pdf(input: FilePathInput) -> MarkdownOutput:
+    """Convert PDF file content to markdown format. Usage: extract_pdf|input={"file_path": "documents/dlf.pdf"}"""
+
+    if not os.path.exists(input.file_path):
+        return MarkdownOutput(markdown=f"File not found: {input.file_path}")
+
+    ROOT = Path(__file__).parent.resolve()
+    global_image_dir = ROOT / "documents" / "images"
+    global_image_dir.mkdir(parents=True, exist_ok=True)
+
+    # Actual markdown with relative image paths
+    markdown = pymupdf4llm.to_markdown(
+        input.file_path,
+        write_images=True,
+        image_path=str(global_image_dir)
+    )
+
+    # Re-point image links in the markdown
+    markdown = re.sub(
+        r'!\[\]\((.*?/images/)([^)]+)\)',
+        r'![](images/\2)',
+        markdown.replace("\\", "/")
+    )
+
+    markdown = replace_images_with_captions(markdown, Path(input.file_path).name)
+    return MarkdownOutput(markdown=markdown)
+
+
+def semantic_merge(text: str) -> list[str]:
+    """Splits text semantically using LLM: detects second topic and reuses leftover intelligently."""
+    return llm_segment(text, OLLAMA_CHAT_URL, PHI_MODEL, word_limit=int(CHUNKER_CONFIG["max_words"]))
+
+
+def extract_document(path: str) -> str:
+    """Markdown for one document (runs in the ingest process pool, so it must stay a top-level function)."""
+    file = Path(path)
+    ext = file.suffix.lower()
+    t0 = time.perf_counter()
+    if ext == ".pdf":
+        mcp_log("INFO", f"Using MuPDF4LLM to extract {file.name}")
+        markdown = extract_pdf(FilePathInput(file_path=str(file))).markdown
+    elif ext in [".html", ".htm", ".url"]:
+        mcp_log("INFO", f"Using Trafilatura to extract {file.name}")
+        markdown = extract_webpage(UrlInput(url=file.read_text().strip())).markdown
+    else:
+        # Fallback to MarkItDown for other formats
+        mcp_log("INFO", f"Using MarkItDown fallback for {file.name}")
+        markdown = MarkItDown().convert(str(file)).text_content
+    mcp_log("INFO", f"Extracted {file.name} in {time.perf_counter() - t0:.1f}s (captioning included)")
+    return markdown
+
+
+def chunk_document(file: Path, markdown: str) -> list[str]:
+    if len(markdown.split()) < 10:
+        mcp_log("WARN", f"Content too short for semantic merge in {file.name} → Skipping chunking.")
+        return [markdown.strip()]
+    if CHUNKER_CONFIG["type"] == "llm":
+        mcp_log("INFO", f"Running semantic merge on {file.name} with {len(markdown.split())} words")
+        return semantic_merge(markdown)
+    mcp_log("INFO", f"Running local chunker on {file.name} with {len(markdown.split())} words")
+    return LOCAL_CHUNKER(markdown)
+
+
+def embed_chunks(chunks: list[str]) -> np.ndarray:
+    return get_embeddings(chunks)
+
+
+class DocumentIndexer:
+    """
+    Incremental indexer over documents/. Keeps the chunk store and index open between passes, so a
+    watch loop only stats the directory when nothing changed. One indexer per index directory at a time
+    (see indexer_lock).
+    """
+
+    def __init__(self, root: Path = ROOT):
+        self.doc_path = root / "documents"
+        self.index_dir = root / "faiss_index"
+        self.index_dir.mkdir(exist_ok=True)
+        self.index_file = self.index_dir / "index.bin"
+        METADATA_FILE = self.index_dir / "metadata.json"  # legacy; imported into the chunk store once
+        CACHE_FILE = self.index_dir / "doc_index_cache.json"  # legacy; imported into the chunk store's docs table once
+
+        self.store = ChunkStore(self.index_dir)
+        imported = self.store.import_legacy(METADATA_FILE, self.index_file)
+        if imported:
+            mcp_log("INFO", f"Imported {imported} chunks from metadata.json into the chunk store")
+        stale = self.store.import_legacy_hashes(CACHE_FILE)
+        if stale:
+            mcp_log("INFO", f"Removed {stale} chunks left behind by earlier re-indexing of modified files")
+
+        if self.store.normalize_vectors():
+            mcp_log("INFO", "Normalized stored chunk vectors to unit length; rebuilding the index")
+            self.index_file.unlink(missing_ok=True)
+
+        # Chunks committed after the last index snapshot (e.g. an interrupted run) are re-added from the store,
+        # removed ones dropped; a legacy positional index is rebuilt as an id-mapped one
+        index = faiss.read_index(str(self.index_file)) if self.index_file.exists() else None
+        self.index, changed = reconcile_index(index, self.store)
+        self.unsaved = False
+        self.last_snapshot = time.monotonic()
+        published = self.store.snapshot_info()
+        if self.index is not None and (changed or published is None or published[1] != file_signature(self.index_file)):
+            self.save()  # also versions a snapshot an interrupted run wrote but never recorded
+
+    def scan(self):
+        """(pending {file: (size, mtime_ns, md5)}, deleted names); size + mtime first, so only changed files are read."""
+        known = self.store.documents()
+        failed = self.store.failures()  # retried once the file changes (or after index_documents.py --retry-failed)
+        on_disk = {file.name: file for file in self.doc_path.glob("*.*") if file.is_file()}
+        gone = [name for name in failed if name not in on_disk]
+        if gone:
+            self.store.clear_failures(gone)
+        pending = {}
+        for name, file in on_disk.items():
+            stat = file.stat()
+            record = known.get(name)
+            if record is not None and (record.size, record.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            failure = failed.get(name)
+            if failure is not None and failure[:2] == (stat.st_size, stat.st_mtime_ns):
+                continue
+            fhash = hashlib.md5(file.read_bytes()).hexdigest()
+            if record is not None and record.md5 == fhash:
+                self.store.update_stat(name, stat.st_size, stat.st_mtime_ns, fhash)  # touched, not changed
+                mcp_log("SKIP", f"Skipping unchanged file: {name}")
+                continue
+            if failure is not None and failure[2] == fhash:
+                self.store.record_failure(name, stat.st_size, stat.st_mtime_ns, fhash, "unchanged since the failure")
+                continue
+            mcp_log("PROC", f"{'Re-indexing modified' if record is not None else 'Processing'}: {name}")
+            pending[file] = (stat.st_size, stat.st_mtime_ns, fhash)
+        return pending, [name for name in known if name not in on_disk]
+
+    def sync(self) -> bool:
+        """One indexing pass; returns True if the index changed."""
+        pending, deleted = self.scan()
+        if not pending and not deleted:
+            return False
+        mcp_log("INFO", f"Indexing documents with unified RAG pipeline: {len(pending)} new/modified, {len(deleted)} deleted")
+        self.store.set_indexing_status({"pending": len(pending) + len(deleted), "since": time.time()})
+        try:
+            self._sync(pending, deleted)
+        finally:
+            self.store.set_indexing_status(None)
+        return True
+
+    def _sync(self, pending, deleted):
+        if deleted:
+            removed = self.store.remove_documents(deleted)
+            if self.index is not None and len(removed):
+                self.index.remove_ids(removed)
+                self.unsaved = True
+            mcp_log("INFO", f"Removed {len(deleted)} deleted documents ({len(removed)} chunks)")
+
+        if pending:
+            pipeline = IngestPipeline(
+                extract_document, chunk_document, embed_chunks, lambda batch: self._commit(batch, pending),
+                fail=lambda file, error: self.store.record_failure(file.name, *pending[file], error),
+                extract_workers=INGEST_EXTRACT_WORKERS,
+                chunk_workers=INGEST_CHUNK_WORKERS,
+                embed_workers=INGEST_EMBED_WORKERS,
+                queue_size=INGEST_QUEUE_SIZE,
+                commit_docs=INGEST_COMMIT_DOCS,
+                pool=EXTRACT_POOL,
+                inline_max=INGEST_INLINE_MAX,
+            )
+            stats = pipeline.run(list(pending))
+            mcp_log("INFO", stats.report())
+
+        if self.unsaved:
+            self.save()
+
+        # Ids never change, so compaction only rewrites the store's vector file; the index is unaffected
+        if self.store.dead_ratio() >= DOC_COMPACT_DEAD_RATIO:
+            reclaimed = self.store.compact()
+            mcp_log("INFO", f"Compacted the chunk store ({reclaimed} vector slots reclaimed)")
+
+    def _commit(self, batch, pending):
+        # One store transaction and one index update for the whole batch; a modified document's old chunks go with it
+        documents, vectors = [], []
+        for file, chunks, embeddings in batch:
+            rows = [{"chunk": chunk, "chunk_id": f"{file.stem}_{i}"} for i, chunk in enumerate(chunks)]
+            documents.append((file.name, pending[file], rows))
+            if rows:  # a document without text is recorded with no chunks, so it is not re-extracted every pass
+                vectors.append(embeddings)
+        vectors = np.concatenate(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        ids, removed = self.store.commit_documents(documents, vectors)
+        if len(removed) and self.index is not None:
+            self.index.remove_ids(removed)
+        if len(ids):
+            if self.index is None:
+                self.index = new_index(vectors.shape[1])
+            self.index.add_with_ids(vectors, ids)
+        if len(removed) or len(ids):
+            self.unsaved = True
+
+        # ✅ Snapshot the index now and then; the search side hot-swaps to it
+        if self.unsaved and time.monotonic() - self.last_snapshot >= INDEX_SNAPSHOT_SECONDS:
+            self.save()
+            mcp_log("SAVE", f"Saved FAISS index after processing {', '.join(f.name for f, _, _ in batch)}")
+
+    def save(self):
+        version = publish_snapshot(self.index_file, self.index, self.store)
+        self.last_snapshot, self.unsaved = time.monotonic(), False
+        mcp_log("SAVE", f"Saved FAISS index v{version} ({self.index.ntotal} chunks)")
+
+    def close(self):
+        self.store.close()
+
+
+def process_documents():
+    """Process documents and create FAISS index using unified multimodal strategy (one incremental pass)."""
+    with indexer_lock(ROOT / "faiss_index") as acquired:
+        if not acquired:
+            mcp_log("INFO", "Another indexer is running; skipping this pass")
+            return
+        indexer = DocumentIndexer()
+        try:
+            indexer.sync()
+        finally:
+            indexer.close()
+
+
+class BackgroundIndexer:
+    """
+    Polls documents/ from a daemon thread and indexes changes incrementally. Searches keep using the last
+    published snapshot meanwhile. The indexer lock is taken per pass, not for the life of the process, so
+    `index_documents.py --watch` and other server processes get their turn; a pass that finds the lock
+    held is simply skipped.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.thread = None
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                self.wake.set()  # run a pass now
+                return
+            self.thread = threading.Thread(target=self._run, name="doc-indexer", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            with indexer_lock(ROOT / "faiss_index") as acquired:
+                if acquired:
+                    self._index_pass()
+            self._sleep()
+
+    def _index_pass(self):
+        # Opened per pass: another indexer may have changed the store since the last one
+        try:
+            indexer = DocumentIndexer()
+        except Exception as e:
+            mcp_log("ERROR", f"Background indexer could not open the index: {e}")
+            return
+        try:
+            indexer.sync()
+        except Exception as e:
+            mcp_log("ERROR", f"Background indexing pass failed: {e}")
+        finally:
+            indexer.close()
+
+    def _sleep(self):
+        self.wake.wait(self.interval)
+        self.wake.clear()
+
+
+BACKGROUND_INDEXER = BackgroundIndexer(float(DOC_CONFIG.get("indexer", {}).get("watch_interval", 5.0)))
+
+
+def ensure_faiss_ready():
+    """Never blocks: called when there is no snapshot at all; starts the background indexer to build one."""
+    mcp_log("INFO", "No document index snapshot yet — indexing documents in the background")
+    BACKGROUND_INDEXER.start()
+
+
+if __name__ == "__main__":
+    # No indexing before serving: the latest snapshot is served right away, and changes are indexed by
+    # `python index_documents.py [--watch]`. MultiMCP spawns this server per call, so polling from every
+    # process is opt-in (documents.indexer.background); without a snapshot the first search starts it.
+    mcp_log("INFO", "STARTING THE SERVER AT AMAZING LOCATION")
+    DOC_INDEX.current()  # load the existing index once, before the first query
+    if DOC_CONFIG.get("indexer", {}).get("background", False):
+        BACKGROUND_INDEXER.start()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "dev":
+        mcp.run() # Run without transport for dev server
+    else:
+        mcp.run(transport="stdio")
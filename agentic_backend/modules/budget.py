@@ -0,0 +1,107 @@
+# modules/budget.py → Token Budget Manager
+# Role: Keeps prompt size (and so latency/cost) per step flat, however large a tool result is.
+
+# Responsibilities:
+
+# Estimate prompt/response tokens for each LLM stage (perception, plan, memory)
+
+# Record per-stage usage for the current query
+
+# Trim tool results and compact memory items to fit configured budgets
+
+# Dependencies:
+
+# config/profiles.yaml (budget section)
+
+# Used by: context.py, loop.py, perception.py, decision.py
+
+# modules/budget.py
+
+from typing import Dict, List, Optional, Any
+import math
+
+
+DEFAULT_BUDGET = {
+    "chars_per_token": 4,        # rough estimate, no tokenizer dependency
+    "tool_result_tokens": 1000,  # max tokens of a tool result injected into the next query
+    "memory_item_tokens": 200,   # max tokens per memory item shown to the planner
+    "memory_tokens": 600,        # max tokens of all memory items shown to the planner
+}
+
+
+class StageUsage:
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+
+    def __repr__(self):
+        return f"<StageUsage calls={self.calls} prompt={self.prompt_tokens} response={self.response_tokens}>"
+
+
+class TokenBudget:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_BUDGET, **(config or {})}
+        self.chars_per_token = float(self.config["chars_per_token"])
+        self.usage: Dict[str, StageUsage] = {}
+
+    def count(self, text: Optional[str]) -> int:
+        """Estimated token count of `text`."""
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def record(self, stage: str, prompt: str, response: str = "") -> None:
+        usage = self.usage.setdefault(stage, StageUsage())
+        usage.calls += 1
+        usage.prompt_tokens += self.count(prompt)
+        usage.response_tokens += self.count(response)
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """
+        Cut `text` down to at most `max_tokens` (trim marker included), keeping the head and the
+        tail (results usually lead with the answer and end with sources/totals).
+        """
+        if max_tokens <= 0 or self.count(text) <= max_tokens:
+            return text
+
+        budget_chars = int(max_tokens * self.chars_per_token)
+        max_chars = budget_chars - len(f"\n... [{self.count(text)} tokens trimmed] ...\n")  # marker's widest form
+        if max_chars <= 0:
+            return text[:budget_chars]
+        head = text[: (max_chars * 2) // 3].rstrip()
+        tail = text[len(text) - max_chars // 3:].lstrip()
+        dropped = self.count(text) - self.count(head) - self.count(tail)
+        return f"{head}\n... [{dropped} tokens trimmed] ...\n{tail}"
+
+    def trim_tool_result(self, text: str) -> str:
+        return self.trim(text, int(self.config["tool_result_tokens"]))
+
+    def fit_memory(self, texts: List[str]) -> List[str]:
+        """
+        Compact memory texts for prompt injection: each item is capped at
+        `memory_item_tokens`, and items are kept in order until `memory_tokens` is spent.
+        """
+        per_item = int(self.config["memory_item_tokens"])
+        remaining = int(self.config["memory_tokens"])
+
+        fitted = []
+        for text in texts:
+            if remaining <= 0:
+                break
+            compact = self.trim(text, min(per_item, remaining))
+            fitted.append(compact)
+            remaining -= self.count(compact)
+        return fitted
+
+    def total(self) -> int:
+        return sum(u.prompt_tokens + u.response_tokens for u in self.usage.values())
+
+    def summary(self) -> str:
+        if not self.usage:
+            return "no LLM usage recorded"
+        stages = ", ".join(
+            f"{stage}: {u.calls}x {u.prompt_tokens}→{u.response_tokens}"
+            for stage, u in self.usage.items()
+        )
+        return f"{stages} | total≈{self.total()} tokens"
@@ -0,0 +1,66 @@
+# modules/caption_cache.py → Image Caption Cache
+# Role: Remembers image captions by image content hash, so re-ingesting a document never recaptions the same image.
+
+# Responsibilities:
+
+# Key captions by (caption model, prompt, SHA-256 of the image bytes)
+
+# Keep them in SQLite (WAL), so the ingest process pool's workers can share one cache file
+
+# Dependencies:
+
+# sqlite3 (imported by mcp_server_2.py as modules.caption_cache, so no agentic_backend imports)
+
+# Used by: mcp_server_2.py
+
+# modules/caption_cache.py
+
+from typing import Dict, List, Optional
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captions (
+    key TEXT PRIMARY KEY,        -- sha256(model, prompt, image bytes)
+    caption TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+class CaptionCache:
+    def __init__(self, path, model: str, prompt: str):
+        self.path = Path(path)
+        self.namespace = hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).digest()
+        self.lock = threading.Lock()
+        self.conn: Optional[sqlite3.Connection] = None  # opened on first use (the module is imported in every worker)
+
+    def key(self, image: bytes) -> str:
+        return hashlib.sha256(self.namespace + image).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")  # ingest worker processes share the file
+            self.conn.executescript(SCHEMA)
+        return self.conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self.lock:
+            rows = self._connection().execute(
+                f"SELECT key, caption FROM captions WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        return dict(rows)
+
+    def put(self, key: str, caption: str):
+        with self.lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO captions VALUES (?, ?, ?)", (key, caption, time.time()))
+            conn.commit()
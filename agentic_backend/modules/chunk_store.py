@@ -0,0 +1,407 @@
+# modules/chunk_store.py → Document Chunk Store
+# Role: Keeps document chunk text/metadata in SQLite and chunk vectors in an append-only file, both addressed by FAISS id.
+
+# Responsibilities:
+
+# Commit a batch of documents in one transaction: new chunks get fresh ids, the document's previous chunks are removed
+
+# Track each indexed document (size, mtime, md5, id range) so unchanged files are skipped without being read
+
+# Remember documents that failed to index (by size, mtime, md5), so they are retried only once the file changes
+
+# Never reuse an id, so an index snapshot that still holds removed ids can only miss rows, never return the wrong one
+
+# Point-look up the handful of rows a search returns instead of loading every chunk
+
+# Record the published index snapshot (version + file signature) and whether an indexing pass is running
+
+# Compact the vector file once enough of it belongs to removed chunks (ids stay the same; only vector slots move)
+
+# Import the legacy metadata.json / index.bin pair and doc_index_cache.json once, and normalize pre-/api/embed
+# vectors to unit length once
+
+# Dependencies:
+
+# sqlite3, numpy, faiss (imported by mcp_server_2.py as modules.chunk_store, so no agentic_backend imports)
+
+# Used by: mcp_server_2.py, modules/doc_index.py
+
+# modules/chunk_store.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import faiss
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,      -- FAISS id, never reused
+    doc TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    chunk TEXT NOT NULL,
+    slot INTEGER                 -- row of the vector file
+);
+CREATE INDEX IF NOT EXISTS chunks_doc ON chunks (doc);
+CREATE TABLE IF NOT EXISTS docs (
+    doc TEXT PRIMARY KEY,
+    size INTEGER,                -- NULL until the file has been stat'ed once (legacy imports)
+    mtime_ns INTEGER,
+    md5 TEXT,
+    first_id INTEGER NOT NULL,   -- the document's chunks are ids first_id .. first_id + chunks - 1
+    chunks INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failures (
+    doc TEXT PRIMARY KEY,        -- a document whose last indexing attempt failed; its previous chunks (if any) stay
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    md5 TEXT NOT NULL,
+    error TEXT NOT NULL,
+    failed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class DocumentRecord:
+    __slots__ = ("size", "mtime_ns", "md5", "first_id", "chunks")
+
+    def __init__(self, size: Optional[int], mtime_ns: Optional[int], md5: Optional[str], first_id: int, chunks: int):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.md5 = md5
+        self.first_id = first_id
+        self.chunks = chunks
+
+
+class ChunkStore:
+    def __init__(self, directory, readonly: bool = False):
+        self.dir = Path(directory)
+        self.db_path = self.dir / "chunks.db"
+        self.readonly = readonly
+        self.lock = threading.Lock()  # one connection shared by the server's worker threads
+
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")  # the server keeps reading while the indexer writes
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self._migrate()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _migrate(self):
+        """Stores written before slots / next_id existed: vector slot = id, next id = max id + 1."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        if "slot" not in columns:
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN slot INTEGER")
+            self.conn.execute("UPDATE chunks SET slot = id")
+        if self._meta("next_id") is None:
+            next_id = self.conn.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM chunks").fetchone()[0]
+            self._set_meta("next_id", next_id)
+            self._set_meta("slots", next_id)
+        self.conn.commit()
+
+    @property
+    def vectors_path(self) -> Path:
+        generation = int(self._meta("vectors_generation") or 0)
+        return self.dir / ("vectors.f32" if generation == 0 else f"vectors.{generation}.f32")
+
+    # --- reads ---
+
+    def next_id(self) -> int:
+        """One past the highest id ever assigned; an index holding only ids below this is backed by the store."""
+        with self.lock:
+            value = self._meta("next_id")
+            if value is None:  # store from before next_id was tracked, opened read-only
+                return self.conn.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM chunks").fetchone()[0]
+            return int(value)
+
+    def count(self) -> int:
+        """Live chunks."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def get(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Rows for `ids` (FAISS ids), keyed by id; missing (removed) ids are simply absent."""
+        ids = [int(i) for i in ids if i >= 0]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, doc, chunk_id, chunk FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {row[0]: {"doc": row[1], "chunk_id": row[2], "chunk": row[3]} for row in rows}
+
+    def dim(self) -> Optional[int]:
+        with self.lock:
+            value = self._meta("dim")
+        return int(value) if value else None
+
+    def documents(self) -> Dict[str, DocumentRecord]:
+        with self.lock:
+            rows = self.conn.execute("SELECT doc, size, mtime_ns, md5, first_id, chunks FROM docs").fetchall()
+        return {row[0]: DocumentRecord(*row[1:]) for row in rows}
+
+    def failures(self) -> Dict[str, Tuple[int, int, str]]:
+        """{document: (size, mtime_ns, md5)} of failed attempts."""
+        with self.lock:
+            rows = self.conn.execute("SELECT doc, size, mtime_ns, md5 FROM failures").fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def live_ids(self) -> np.ndarray:
+        with self.lock:
+            rows = self.conn.execute("SELECT id FROM chunks ORDER BY id").fetchall()
+        return np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+
+    def vectors_for(self, ids: np.ndarray) -> np.ndarray:
+        """Vectors of live chunks `ids`, in the given order."""
+        dim = self.dim()
+        ids = np.asarray(ids, dtype=np.int64)
+        if not dim or len(ids) == 0:
+            return np.zeros((0, dim or 0), dtype=np.float32)
+        with self.lock:
+            path = self.vectors_path
+            if len(ids) <= 500:  # a search's candidates; a rebuild reads every slot anyway
+                wanted = [int(i) for i in ids]
+                slot_of = dict(self.conn.execute(
+                    f"SELECT id, slot FROM chunks WHERE id IN ({','.join('?' * len(wanted))})", wanted
+                ).fetchall())
+            else:
+                slot_of = dict(self.conn.execute("SELECT id, slot FROM chunks").fetchall())
+        slots = np.fromiter((slot_of[int(i)] for i in ids), dtype=np.int64, count=len(ids))
+        vectors = np.memmap(path, dtype=np.float32, mode="r").reshape(-1, dim)
+        return np.array(vectors[slots])
+
+    def dead_ratio(self) -> float:
+        """Fraction of the vector file that belongs to removed chunks."""
+        with self.lock:
+            slots = int(self._meta("slots") or 0)
+            live = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return (slots - live) / slots if slots else 0.0
+
+    def snapshot_info(self) -> Optional[Tuple[int, Tuple[int, int]]]:
+        """(version, (mtime_ns, size)) of the last index snapshot an indexer published, if any."""
+        with self.lock:
+            value = self._meta("snapshot")
+        if value is None:
+            return None
+        info = json.loads(value)
+        return info["version"], tuple(info["signature"])
+
+    def indexing_status(self) -> Optional[Dict[str, Any]]:
+        """{"pending": documents, "since": epoch seconds} while an indexing pass is running, else None."""
+        with self.lock:
+            value = self._meta("indexing")
+        return json.loads(value) if value else None
+
+    # --- writes ---
+
+    def record_snapshot(self, version: int, signature: Tuple[int, int]):
+        with self.lock:
+            self._set_meta("snapshot", json.dumps({"version": version, "signature": list(signature)}))
+            self.conn.commit()
+
+    def set_indexing_status(self, status: Optional[Dict[str, Any]]):
+        with self.lock:
+            if status is None:
+                self.conn.execute("DELETE FROM meta WHERE key = 'indexing'")
+            else:
+                self._set_meta("indexing", json.dumps(status))
+            self.conn.commit()
+
+    def commit_documents(self, documents: List[Tuple[str, Tuple[Any, Any, Any], List[Dict[str, Any]]]],
+                         vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Replace a batch of documents in one transaction. `documents` is [(name, (size, mtime_ns, md5), rows)],
+        with `vectors` holding all their rows in order. Returns (new ids, removed ids). Vectors are appended
+        (and fsync'd) before the rows commit, so every committed row has its vector on disk.
+        """
+        total = sum(len(rows) for _, _, rows in documents)
+        with self.lock:
+            start = int(self._meta("next_id"))
+            slots = int(self._meta("slots"))
+            if total:  # documents without text are recorded with no chunks (and no vectors)
+                vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(total, -1)
+                dim = self._meta("dim")
+                if dim is None:
+                    self._set_meta("dim", vectors.shape[1])
+                elif int(dim) != vectors.shape[1]:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store ({dim})")
+
+                path = self.vectors_path
+                with open(path, "r+b" if path.exists() else "wb") as f:
+                    f.truncate(slots * vectors.shape[1] * 4)  # drop vectors of rows that never committed
+                    f.seek(0, os.SEEK_END)
+                    f.write(vectors.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            removed = self._remove([name for name, _, _ in documents])
+            next_id, next_slot = start, slots
+            for name, (size, mtime_ns, md5), rows in documents:
+                self.conn.executemany(
+                    "INSERT INTO chunks (id, doc, chunk_id, chunk, slot) VALUES (?, ?, ?, ?, ?)",
+                    [(next_id + i, name, row["chunk_id"], row["chunk"], next_slot + i) for i, row in enumerate(rows)]
+                )
+                self.conn.execute("INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?, ?)",
+                                  (name, size, mtime_ns, md5, next_id, len(rows)))
+                next_id += len(rows)
+                next_slot += len(rows)
+            self._set_meta("next_id", next_id)
+            self._set_meta("slots", next_slot)
+            self.conn.commit()
+            return np.arange(start, next_id, dtype=np.int64), removed
+
+    def remove_documents(self, names: List[str]) -> np.ndarray:
+        """Forget deleted documents; returns the ids of their chunks (to remove from the index)."""
+        with self.lock:
+            removed = self._remove(names)
+            self.conn.commit()
+            return removed
+
+    def record_failure(self, name: str, size: int, mtime_ns: int, md5: str, error: str):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?, ?, ?)",
+                              (name, size, mtime_ns, md5, error[:500], time.time()))
+            self.conn.commit()
+
+    def clear_failures(self, names: Optional[List[str]] = None):
+        """Forget failed attempts (all of them, or `names`), so the next pass retries those documents."""
+        with self.lock:
+            if names is None:
+                self.conn.execute("DELETE FROM failures")
+            else:
+                self.conn.executemany("DELETE FROM failures WHERE doc = ?", [(name,) for name in names])
+            self.conn.commit()
+
+    def update_stat(self, name: str, size: int, mtime_ns: int, md5: str):
+        """Record a new size / mtime for a document whose content did not change."""
+        with self.lock:
+            self.conn.execute("UPDATE docs SET size = ?, mtime_ns = ?, md5 = ? WHERE doc = ?",
+                              (size, mtime_ns, md5, name))
+            self.conn.commit()
+
+    def compact(self) -> int:
+        """
+        Rewrite the vector file with live chunks only and VACUUM the database. Ids are unchanged, so
+        index snapshots stay valid. Returns the number of vector slots reclaimed.
+        """
+        with self.lock:
+            dim = self._meta("dim")
+            slots = int(self._meta("slots") or 0)
+            if not dim or not slots:
+                return 0
+            dim = int(dim)
+            rows = self.conn.execute("SELECT id, slot FROM chunks ORDER BY id").fetchall()
+            old_path = self.vectors_path
+            generation = int(self._meta("vectors_generation") or 0) + 1
+            new_path = self.dir / f"vectors.{generation}.f32"
+
+            old = np.memmap(old_path, dtype=np.float32, mode="r").reshape(-1, dim)
+            live = np.array(old[[slot for _, slot in rows]], dtype=np.float32)
+            del old
+            with open(new_path, "wb") as f:
+                f.write(live.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.conn.executemany("UPDATE chunks SET slot = ? WHERE id = ?", [(i, row[0]) for i, row in enumerate(rows)])
+            self._set_meta("slots", len(rows))
+            self._set_meta("vectors_generation", generation)
+            self.conn.commit()
+            old_path.unlink(missing_ok=True)
+            self.conn.execute("VACUUM")
+            return slots - len(rows)
+
+    def normalize_vectors(self) -> bool:
+        """
+        One-time rewrite of stored vectors to unit length (vectors from /api/embeddings are not,
+        those from /api/embed are). Returns True if the vectors changed and the index needs a rebuild.
+        """
+        with self.lock:
+            if self._meta("unit_vectors") is not None:
+                return False
+            dim = self._meta("dim")
+            changed = False
+            path = self.vectors_path
+            if dim and path.exists() and path.stat().st_size:
+                vectors = np.memmap(path, dtype=np.float32, mode="r+").reshape(-1, int(dim))
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                changed = bool(np.any(np.abs(norms - 1.0) > 1e-3))
+                if changed:
+                    vectors /= np.where(norms > 0, norms, 1.0)
+                    vectors.flush()
+                del vectors
+            self._set_meta("unit_vectors", 1)
+            self.conn.commit()
+            return changed
+
+    def import_legacy(self, metadata_path: Path, index_path: Path) -> int:
+        """One-time import of metadata.json + index.bin (flat index) into an empty store."""
+        if self.next_id() or not (metadata_path.exists() and index_path.exists()):
+            return 0
+        metadata = json.loads(metadata_path.read_text())
+        index = faiss.read_index(str(index_path))
+        if index.ntotal != len(metadata) or not metadata:
+            return 0
+        vectors = index.reconstruct_n(0, index.ntotal)
+        docs: Dict[str, List[int]] = {}
+        for i, row in enumerate(metadata):
+            docs.setdefault(row["doc"], []).append(i)
+        order = [i for positions in docs.values() for i in positions]
+        self.commit_documents(
+            [(doc, (None, None, None), [metadata[i] for i in positions]) for doc, positions in docs.items()],
+            vectors[order]
+        )
+        return len(metadata)
+
+    def import_legacy_hashes(self, cache_path: Path) -> int:
+        """
+        One-time import of doc_index_cache.json (file → md5) into the docs table. Chunks that an earlier
+        re-index of a modified file left behind (every copy but the newest) are removed; returns how many.
+        """
+        with self.lock:
+            if self._meta("docs_imported") is not None:
+                return 0
+            hashes = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+            removed = 0
+            for doc, in self.conn.execute("SELECT DISTINCT doc FROM chunks").fetchall():
+                # The newest copy starts at the document's last "<stem>_0" chunk
+                start = self.conn.execute(
+                    "SELECT MAX(id) FROM chunks WHERE doc = ? AND chunk_id LIKE '%\\_0' ESCAPE '\\'", (doc,)
+                ).fetchone()[0]
+                if start is not None:
+                    removed += self.conn.execute("DELETE FROM chunks WHERE doc = ? AND id < ?", (doc, start)).rowcount
+                first_id, chunks = self.conn.execute("SELECT MIN(id), COUNT(*) FROM chunks WHERE doc = ?", (doc,)).fetchone()
+                self.conn.execute("INSERT OR REPLACE INTO docs VALUES (?, NULL, NULL, ?, ?, ?)",
+                                  (doc, hashes.get(doc), first_id, chunks))
+            self._set_meta("docs_imported", 1)
+            self.conn.commit()
+            return removed
+
+    def _remove(self, names: List[str]) -> np.ndarray:
+        removed: List[int] = []
+        for name in names:
+            removed += [row[0] for row in self.conn.execute("SELECT id FROM chunks WHERE doc = ?", (name,))]
+            self.conn.execute("DELETE FROM chunks WHERE doc = ?", (name,))
+            self.conn.execute("DELETE FROM docs WHERE doc = ?", (name,))
+            self.conn.execute("DELETE FROM failures WHERE doc = ?", (name,))
+        return np.array(removed, dtype=np.int64)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
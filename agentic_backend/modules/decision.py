@@ -1,97 +1,140 @@
-from typing import List, Optional
-from agentic_backend.modules.perception import PerceptionResult
-from agentic_backend.modules.memory import MemoryItem
-from agentic_backend.modules.model_manager import ModelManager
-from dotenv import load_dotenv
-from google import genai
-import os
-import asyncio
-
-# Optional: import logger if available
-try:
-    from agentic_backend.agent import log
-except ImportError:
-    import datetime
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[{now}] [{stage}] {msg}")
-
-model = ModelManager()
-
-
-async def generate_plan(
-    perception: PerceptionResult,
-    memory_items: List[MemoryItem],
-    tool_descriptions: Optional[str] = None,
-    step_num: int = 1,
-    max_steps: int = 3
-) -> str:
-    """Generates the next step plan for the agent: either tool usage or final answer."""
-
-    memory_texts = "\n".join(f"- {m.text}" for m in memory_items) or "None"
-    tool_context = f"\nYou have access to the following tools:\n{tool_descriptions}" if tool_descriptions else ""
-
-    prompt = f"""
-You are a reasoning-driven AI agent with access to tools and memory.
-Your job is to solve the user's request step-by-step by reasoning through the problem, selecting a tool if needed, and continuing until the FINAL_ANSWER is produced.
-
-Respond in **exactly one line** using one of the following formats:
-
-- FUNCTION_CALL: tool_name|param1=value1|param2=value2
-- FINAL_ANSWER: [your final result] *(Not description, but actual final answer)
-
-🧠 Context:
-- Step: {step_num} of {max_steps}
-- Memory: 
-{memory_texts}
-{tool_context}
-
-🎯 Input Summary:
-- User input: "{perception.user_input}"
-- Intent: {perception.intent}
-- Entities: {', '.join(perception.entities)}
-- Tool hint: {perception.tool_hint or 'None'}
-
-✅ Examples:
-- FUNCTION_CALL: add|a=5|b=3
-- FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA
-- FUNCTION_CALL: int_list_to_exponential_sum|input.int_list=[73,78,68,73,65]
-- FINAL_ANSWER: [42] → Always mention final answer to the query, not that some other description.
-
-✅ Examples:
-- User asks: "What’s the relationship between Cricket and Sachin Tendulkar"
-  - FUNCTION_CALL: search_documents|query="relationship between Cricket and Sachin Tendulkar"
-  - [receives a detailed document]
-  - FINAL_ANSWER: [Sachin Tendulkar is widely regarded as the "God of Cricket" due to his exceptional skills, longevity, and impact on the sport in India. He is the leading run-scorer in both Test and ODI cricket, and the first to score 100 centuries in international cricket. His influence extends beyond his statistics, as he is seen as a symbol of passion, perseverance, and a national icon. ]
-
----
-
-📏 IMPORTANT Rules:
-
-- 🚫 Do NOT invent tools. Use only the tools listed above. Tool description has useage pattern, only use that.
-- 📄 If the question may relate to public/factual knowledge (like companies, people, places), use the `search_documents` tool to look for the answer.
-- 🧮 If the question is mathematical, use the appropriate math tool.
-- 🔁 Analyze that whether you have already got a good factual result from a tool, do NOT search again — summarize and respond with FINAL_ANSWER.
-- ❌ NEVER repeat tool calls with the same parameters unless the result was empty. When searching rely on first reponse from tools, as that is the best response probably.
-- ❌ NEVER output explanation text — only structured FUNCTION_CALL or FINAL_ANSWER.
-- ✅ Use nested keys like `input.string` or `input.int_list`, and square brackets for lists.
-- 💡 If no tool fits or you're unsure, end with: FINAL_ANSWER: [unknown]
-- ⏳ You have 3 attempts. Final attempt must end with FINAL_ANSWER.
-"""
-
-
-
-    try:
-        raw = (await model.generate_text(prompt)).strip()
-        log("plan", f"LLM output: {raw}")
-
-        for line in raw.splitlines():
-            if line.strip().startswith("FUNCTION_CALL:") or line.strip().startswith("FINAL_ANSWER:"):
-                return line.strip()
-
-        return "FINAL_ANSWER: [unknown]"
-
-    except Exception as e:
-        log("plan", f"⚠️ Planning failed: {e}")
-        return "FINAL_ANSWER: [unknown]"
-
+from typing import List, Literal, Optional
+import json
+from pydantic import BaseModel, ValidationError
+from agentic_backend.modules.perception import PerceptionResult
+from agentic_backend.modules.memory import MemoryItem
+from agentic_backend.modules.model_manager import get_model_manager
+from agentic_backend.modules.budget import TokenBudget
+
+# Optional: import logger if available
+try:
+    from agentic_backend.agent import log
+except ImportError:
+    import datetime
+    def log(stage: str, msg: str):
+        now = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{now}] [{stage}] {msg}")
+
+
+class PlanResult(BaseModel):
+    """Structured-output form of the one-line plan (FUNCTION_CALL / FINAL_ANSWER)."""
+    action: Literal["FUNCTION_CALL", "FINAL_ANSWER"]
+    tool_name: Optional[str] = None
+    arguments: Optional[str] = None  # "param1=value1|param2=value2"
+    answer: Optional[str] = None
+
+    def to_line(self) -> str:
+        if self.action == "FUNCTION_CALL" and self.tool_name:
+            args = (self.arguments or "").strip().strip("|")
+            return f"FUNCTION_CALL: {self.tool_name.strip()}|{args}" if args else f"FUNCTION_CALL: {self.tool_name.strip()}"
+        answer = (self.answer or "unknown").strip()
+        if not answer.startswith("["):
+            answer = f"[{answer}]"
+        return f"FINAL_ANSWER: {answer}"
+
+
+STRUCTURED_PLAN_NOTE = """
+🧾 Output fields (JSON):
+- action: FUNCTION_CALL or FINAL_ANSWER
+- tool_name: the tool to call (FUNCTION_CALL only)
+- arguments: the `param1=value1|param2=value2` part of the call (FUNCTION_CALL only)
+- answer: the final answer (FINAL_ANSWER only)
+"""
+
+
+async def generate_plan(
+    perception: PerceptionResult,
+    memory_items: List[MemoryItem],
+    tool_descriptions: Optional[str] = None,
+    step_num: int = 1,
+    max_steps: int = 3,
+    budget: Optional[TokenBudget] = None
+) -> str:
+    """Generates the next step plan for the agent: either tool usage or final answer."""
+
+    texts = [m.text for m in memory_items]
+    if budget:
+        texts = budget.fit_memory(texts)
+    memory_texts = "\n".join(f"- {t}" for t in texts) or "None"
+    tool_context = f"\nYou have access to the following tools:\n{tool_descriptions}" if tool_descriptions else ""
+
+    prompt = f"""
+You are a reasoning-driven AI agent with access to tools and memory.
+Your job is to solve the user's request step-by-step by reasoning through the problem, selecting a tool if needed, and continuing until the FINAL_ANSWER is produced.
+
+Respond in **exactly one line** using one of the following formats:
+
+- FUNCTION_CALL: tool_name|param1=value1|param2=value2
+- FINAL_ANSWER: [your final result] *(Not description, but actual final answer)
+
+🧠 Context:
+- Step: {step_num} of {max_steps}
+- Memory: 
+{memory_texts}
+{tool_context}
+
+🎯 Input Summary:
+- User input: "{perception.user_input}"
+- Intent: {perception.intent}
+- Entities: {', '.join(perception.entities)}
+- Tool hint: {perception.tool_hint or 'None'}
+
+✅ Examples:
+- FUNCTION_CALL: add|a=5|b=3
+- FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA
+- FUNCTION_CALL: int_list_to_exponential_sum|input.int_list=[73,78,68,73,65]
+- FINAL_ANSWER: [42] → Always mention final answer to the query, not that some other description.
+
+✅ Examples:
+- User asks: "What’s the relationship between Cricket and Sachin Tendulkar"
+  - FUNCTION_CALL: search_documents|query="relationship between Cricket and Sachin Tendulkar"
+  - [receives a detailed document]
+  - FINAL_ANSWER: [Sachin Tendulkar is widely regarded as the "God of Cricket" due to his exceptional skills, longevity, and impact on the sport in India. He is the leading run-scorer in both Test and ODI cricket, and the first to score 100 centuries in international cricket. His influence extends beyond his statistics, as he is seen as a symbol of passion, perseverance, and a national icon. ]
+
+---
+
+📏 IMPORTANT Rules:
+
+- 🚫 Do NOT invent tools. Use only the tools listed above. Tool description has useage pattern, only use that.
+- 📄 If the question may relate to public/factual knowledge (like companies, people, places), use the `search_documents` tool to look for the answer.
+- 🧮 If the question is mathematical, use the appropriate math tool.
+- 🔁 Analyze that whether you have already got a good factual result from a tool, do NOT search again — summarize and respond with FINAL_ANSWER.
+- ❌ NEVER repeat tool calls with the same parameters unless the result was empty. When searching rely on first reponse from tools, as that is the best response probably.
+- ❌ NEVER output explanation text — only structured FUNCTION_CALL or FINAL_ANSWER.
+- ✅ Use nested keys like `input.string` or `input.int_list`, and square brackets for lists.
+- 💡 If no tool fits or you're unsure, end with: FINAL_ANSWER: [unknown]
+- ⏳ You have 3 attempts. Final attempt must end with FINAL_ANSWER.
+"""
+
+
+
+    manager = get_model_manager()
+
+    # Schema-constrained reply, rendered back into the one-line format the loop expects
+    if manager.structured_output:
+        try:
+            result = await manager.generate_structured(prompt + STRUCTURED_PLAN_NOTE, PlanResult, priority=step_num)
+            line = result.to_line()
+            if budget:
+                budget.record("plan", prompt + STRUCTURED_PLAN_NOTE, result.model_dump_json())
+            log("plan", f"LLM output: {line}")
+            return line
+        except (ValidationError, json.JSONDecodeError) as e:  # bad reply only; transport / quota errors propagate
+            log("plan", f"⚠️ Structured output failed, falling back to text: {e}")
+
+    try:
+        raw = (await manager.generate_text(prompt, priority=step_num)).strip()
+        if budget:
+            budget.record("plan", prompt, raw)
+        log("plan", f"LLM output: {raw}")
+
+        for line in raw.splitlines():
+            if line.strip().startswith("FUNCTION_CALL:") or line.strip().startswith("FINAL_ANSWER:"):
+                return line.strip()
+
+        return "FINAL_ANSWER: [unknown]"
+
+    except Exception as e:
+        log("plan", f"⚠️ Planning failed: {e}")
+        return "FINAL_ANSWER: [unknown]"
+
@@ -0,0 +1,247 @@
+# modules/doc_chunker.py → Document Chunkers
+# Role: Splits extracted markdown into retrieval chunks for the document index.
+
+# Responsibilities:
+
+# Local chunker: split on markdown structure (headings, paragraphs, lists, tables, code) and sentence boundaries,
+# then merge adjacent sentences whose embeddings stay similar (NumPy, no generative-LLM calls)
+
+# LLM segmenter: the original per-window "is there a second topic?" chat prompt, kept selectable
+
+# Dependencies:
+
+# numpy, requests (imported by mcp_server_2.py as modules.doc_chunker and by bench/ as agentic_backend.modules.*,
+# so no package-relative imports)
+
+# Used by: mcp_server_2.py, bench/chunker_report.py
+
+# modules/doc_chunker.py
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import re
+import sys
+import numpy as np
+import requests
+
+DEFAULT_CHUNKER: Dict[str, Any] = {
+    "type": "local",              # local | llm
+    "max_words": 512,             # hard cap per chunk (the LLM segmenter's window size)
+    "min_words": 40,              # topic breaks are ignored until a chunk has this many words
+    "breakpoint_percentile": 20,  # break where adjacent-sentence similarity is in the document's lowest N%
+}
+
+HEADING_RE = re.compile(r"^#{1,6}\s")
+LIST_ITEM_RE = re.compile(r"^\s*([-*+]|\d+[.)])\s+")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+
+
+def _log(level: str, message: str):
+    sys.stderr.write(f"{level}: {message}\n")  # stdout carries the MCP stdio transport
+    sys.stderr.flush()
+
+
+# --- local chunker ---
+
+class Unit:
+    """A sentence-sized piece of the document and where it sits in the markdown structure."""
+    __slots__ = ("text", "words", "section", "heading", "joiner")
+
+    def __init__(self, text: str, section: int, heading: bool, joiner: str):
+        self.text = text
+        self.words = len(text.split())
+        self.section = section
+        self.heading = heading
+        self.joiner = joiner  # separator from the previous unit when both land in one chunk
+
+
+def _blocks(markdown: str) -> List[Tuple[str, str]]:
+    """(kind, text) blocks: heading, code, table, list, paragraph."""
+    blocks: List[Tuple[str, str]] = []
+    lines = markdown.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+        elif stripped.startswith("```"):
+            j = i + 1
+            while j < len(lines) and not lines[j].strip().startswith("```"):
+                j += 1
+            blocks.append(("code", "\n".join(lines[i:j + 1])))
+            i = j + 1
+        elif HEADING_RE.match(stripped):
+            blocks.append(("heading", stripped))
+            i += 1
+        else:
+            j = i
+            while j < len(lines) and lines[j].strip() and not HEADING_RE.match(lines[j].strip()) \
+                    and not lines[j].strip().startswith("```"):
+                j += 1
+            block = lines[i:j]
+            if all(l.strip().startswith("|") for l in block):
+                blocks.append(("table", "\n".join(block)))
+            elif all(LIST_ITEM_RE.match(l) or l.startswith((" ", "\t")) for l in block):
+                blocks.append(("list", "\n".join(block)))
+            else:
+                blocks.append(("paragraph", " ".join(l.strip() for l in block)))
+            i = j
+    return blocks
+
+
+def _split_words(text: str, max_words: int) -> List[str]:
+    words = text.split()
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)] or [text]
+
+
+def split_units(markdown: str, max_words: int = 512) -> List[Unit]:
+    units: List[Unit] = []
+    section = 0
+    for kind, text in _blocks(markdown):
+        if kind == "heading":
+            section += 1
+            units.append(Unit(text, section, True, "\n\n"))
+            continue
+        if kind in ("code", "table"):
+            pieces = [text] if len(text.split()) <= max_words else _split_words(text, max_words)
+        elif kind == "list":
+            pieces = [l.strip() for l in text.splitlines() if l.strip()]
+        else:
+            pieces = [s for s in SENTENCE_END_RE.split(text) if s.strip()]
+        for n, piece in enumerate(pieces):
+            for m, part in enumerate(_split_words(piece, max_words) if len(piece.split()) > max_words else [piece]):
+                first = n == 0 and m == 0
+                joiner = "\n\n" if first else ("\n" if kind == "list" else " ")
+                units.append(Unit(part, section, False, joiner))
+    return units
+
+
+class LocalChunker:
+    """
+    Structure + sentence splitting, then greedy merging: a chunk ends at a section boundary or at a
+    low-similarity sentence pair (once it has `min_words`), or before it would exceed `max_words`.
+    """
+
+    def __init__(self, embed: Callable[[List[str]], np.ndarray], config: Optional[Dict[str, Any]] = None):
+        self.embed = embed
+        self.config = {**DEFAULT_CHUNKER, **(config or {})}
+
+    def __call__(self, markdown: str) -> List[str]:
+        max_words = int(self.config["max_words"])
+        min_words = int(self.config["min_words"])
+        units = split_units(markdown, max_words)
+        if len(units) <= 1:
+            return [u.text for u in units]
+
+        breaks = self.breakpoints(units)
+        chunks: List[str] = []
+        current: List[Unit] = []
+        words = 0
+        for i, unit in enumerate(units):
+            if current and words + unit.words > max_words and all(u.heading for u in current):
+                # Never leave a heading on its own: it keeps the start of the unit that does not fit
+                head, unit = self._split(unit, max_words - words)
+                if head is not None:
+                    current.append(head)
+                    words += head.words
+            if current and ((breaks[i - 1] and words >= min_words) or words + unit.words > max_words):
+                chunks.append(self._join(current))
+                current, words = [], 0
+            current.append(unit)
+            words += unit.words
+        if current:
+            chunks.append(self._join(current))
+        return chunks
+
+    def breakpoints(self, units: List[Unit]) -> np.ndarray:
+        """breaks[i] → a chunk may end between units i and i + 1."""
+        vectors = np.asarray(self.embed([u.text for u in units]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
+        cutoff = np.percentile(similarity, float(self.config["breakpoint_percentile"]))
+
+        sections = np.fromiter((u.section for u in units), dtype=np.int64, count=len(units))
+        headings = np.fromiter((u.heading for u in units), dtype=bool, count=len(units))
+        breaks = (similarity < cutoff) | (sections[1:] != sections[:-1])
+        breaks &= ~headings[:-1]  # keep a heading with the text under it
+        return breaks
+
+    @staticmethod
+    def _split(unit: Unit, room: int) -> Tuple[Optional[Unit], Unit]:
+        """The first `room` words of a unit (None if there is no room) and the rest, as two units."""
+        words = unit.text.split()
+        if room <= 0:
+            return None, unit
+        head = Unit(" ".join(words[:room]), unit.section, False, unit.joiner)
+        return head, Unit(" ".join(words[room:]), unit.section, False, " ")
+
+    @staticmethod
+    def _join(units: List[Unit]) -> str:
+        return (units[0].text + "".join(u.joiner + u.text for u in units[1:])).strip()
+
+
+# --- LLM segmenter ---
+
+SEGMENT_PROMPT = """
+You are a markdown document segmenter.
+
+Here is a portion of a markdown document:
+
+---
+{chunk_text}
+---
+
+If this chunk clearly contains **more than one distinct topic or section**, reply ONLY with the **second part**, starting from the first sentence or heading of the new topic.
+
+If it's only one topic, reply with NOTHING.
+
+Keep markdown formatting intact.
+"""
+
+
+def llm_segment(text: str, chat_url: str, model: str, word_limit: int = 512) -> List[str]:
+    """Splits text semantically using LLM: detects second topic and reuses leftover intelligently."""
+    words = text.split()
+    i = 0
+    final_chunks = []
+
+    while i < len(words):
+        # 1. Take next chunk of words (and prepend leftovers if any)
+        chunk_words = words[i:i + word_limit]
+        chunk_text = " ".join(chunk_words).strip()
+
+        try:
+            response = requests.post(chat_url, json={
+                "model": model,
+                "messages": [{"role": "user", "content": SEGMENT_PROMPT.format(chunk_text=chunk_text)}],
+                "stream": False
+            })
+            reply = response.json().get("message", {}).get("content", "").strip()
+
+            if reply:
+                # If LLM returned second part, separate it
+                split_point = chunk_text.find(reply)
+                if split_point != -1:
+                    first_part = chunk_text[:split_point].strip()
+                    second_part = reply.strip()
+
+                    final_chunks.append(first_part)
+
+                    # Get remaining words from second_part and re-use them in next batch
+                    leftover_words = second_part.split()
+                    words = leftover_words + words[i + word_limit:]
+                    i = 0  # restart loop with leftover + remaining
+                    continue
+                else:
+                    # fallback: if split point not found
+                    final_chunks.append(chunk_text)
+            else:
+                final_chunks.append(chunk_text)
+
+        except Exception as e:
+            _log("ERROR", f"Semantic chunking LLM error: {e}")
+            final_chunks.append(chunk_text)
+
+        i += word_limit
+
+    return final_chunks
@@ -0,0 +1,236 @@
+# modules/doc_index.py → Resident Document Index
+# Role: Keeps the document FAISS index loaded in the doc server between queries; chunk rows come from the chunk store.
+
+# Responsibilities:
+
+# Load index.bin (memory-mapped where FAISS supports it) once, not per query
+
+# Notice when the indexer replaces it (mtime + size, checked at most once per interval) and load the new one in the background
+
+# Swap the new snapshot in atomically; one holding ids the chunk store has not committed yet is skipped and the old one keeps serving
+
+# Write index snapshots atomically (tmp file + rename) so a reader never maps a partially written file, and
+# number them: the version is recorded in the chunk store next to the file's signature
+
+# Report a snapshot's version and staleness (age, and whether an indexing pass is running)
+
+# Keep writers exclusive: one indexer (CLI or server) holds the index directory's lock at a time
+
+# Dependencies:
+
+# faiss, numpy, modules/chunk_store.py (imported by mcp_server_2.py as modules.doc_index, so no agentic_backend imports)
+
+# Used by: mcp_server_2.py, index_documents.py
+
+# modules/doc_index.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+import os
+import sys
+import threading
+import time
+import faiss
+import numpy as np
+
+from modules.chunk_store import ChunkStore
+
+# Map the vectors instead of reading them into RAM (flat/HNSW codes and IVF lists); falls back to a normal read
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+
+
+try:
+    import fcntl
+
+    def _lock_file(f, wait: bool):
+        fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_file(f, wait: bool):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _log(level: str, message: str):
+    sys.stderr.write(f"{level}: {message}\n")  # stdout carries the MCP stdio transport
+    sys.stderr.flush()
+
+
+def read_index(path: Path) -> faiss.Index:
+    if MMAP_FLAGS:
+        try:
+            return faiss.read_index(str(path), MMAP_FLAGS)
+        except RuntimeError:
+            pass
+    return faiss.read_index(str(path))
+
+
+def write_index(index_path: Path, index: faiss.Index):
+    """Replace index.bin via tmp + rename; readers holding the old (mapped) file keep a consistent view."""
+    tmp = index_path.with_suffix(".tmp")
+    faiss.write_index(index, str(tmp))
+    os.replace(tmp, index_path)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def publish_snapshot(index_path: Path, index: faiss.Index, store: ChunkStore) -> int:
+    """Write a new index snapshot and record its version in the store; returns the version."""
+    info = store.snapshot_info()
+    version = (info[0] if info else 0) + 1
+    write_index(index_path, index)
+    store.record_snapshot(version, file_signature(index_path))
+    return version
+
+
+def new_index(dim: int) -> faiss.Index:
+    """Flat index keyed by chunk-store id, so a document's chunks can be removed when it changes."""
+    return faiss.IndexIDMap(faiss.IndexFlatL2(dim))
+
+
+def index_ids(index: faiss.Index) -> np.ndarray:
+    """The chunk-store ids an index holds (legacy flat indexes: positions)."""
+    if hasattr(index, "id_map"):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+    return np.arange(index.ntotal, dtype=np.int64)
+
+
+def reconcile_index(index: Optional[faiss.Index], store: ChunkStore) -> Tuple[Optional[faiss.Index], bool]:
+    """
+    Bring an index snapshot in line with the chunk store (after an interrupted run, or a legacy
+    positional index): removed chunks are dropped, committed ones missing from it are added.
+    Returns (index, changed).
+    """
+    dim = store.dim()
+    if not dim:
+        return index, False
+    live = store.live_ids()
+    if index is None or not hasattr(index, "id_map") or index.d != dim:
+        index = new_index(dim)
+        index.add_with_ids(store.vectors_for(live), live)
+        return index, True
+    held = index_ids(index)
+    stale = np.setdiff1d(held, live, assume_unique=True)
+    missing = np.setdiff1d(live, held, assume_unique=True)
+    if len(stale):
+        index.remove_ids(stale)
+    if len(missing):
+        index.add_with_ids(store.vectors_for(missing), missing)
+    return index, bool(len(stale) or len(missing))
+
+
+@contextmanager
+def indexer_lock(directory: Path, wait: bool = False):
+    """Exclusive lock on the index directory, so one indexer writes it at a time; yields whether it was acquired."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    f = open(directory / "indexer.lock", "a+")
+    acquired = False
+    try:
+        try:
+            _lock_file(f, wait)
+            acquired = True
+        except OSError:
+            pass
+        yield acquired
+    finally:
+        if acquired:
+            _unlock_file(f)
+        f.close()
+
+
+class DocSnapshot:
+    __slots__ = ("index", "store", "version", "signature", "built_at", "loaded_at")
+
+    def __init__(self, index: faiss.Index, store: ChunkStore, version: int, signature: Tuple):
+        self.index = index
+        self.store = store
+        self.version = version  # published by the indexer; 0 for a snapshot written before versions were recorded
+        self.signature = signature
+        self.built_at = signature[0] / 1e9  # index file mtime
+        self.loaded_at = time.time()
+
+    def status(self) -> str:
+        """Version and staleness, for search results."""
+        age = max(0.0, time.time() - self.built_at)
+        age_text = f"{age:.0f}s" if age < 120 else f"{age / 60:.0f}m" if age < 7200 else f"{age / 3600:.1f}h"
+        status = f"Document index v{self.version}, built {age_text} ago"
+        indexing = self.store.indexing_status()
+        if indexing:
+            status += f"; {indexing['pending']} changed documents are being indexed"
+        return f"[{status}]"
+
+    def chunks(self, ids) -> List[Dict[str, Any]]:
+        """Chunk rows for FAISS ids, in the given order (point lookups, not a full load)."""
+        rows = self.store.get([int(i) for i in ids])
+        return [rows[int(i)] for i in ids if int(i) in rows]
+
+
+class DocumentIndex:
+    def __init__(self, index_path: Path, store_dir: Path, check_interval: float = 1.0):
+        self.index_path = Path(index_path)
+        self.store_dir = Path(store_dir)
+        self.check_interval = check_interval
+        self.snapshot: Optional[DocSnapshot] = None
+        self.store: Optional[ChunkStore] = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()  # one loader at a time
+
+    def _signature(self) -> Optional[Tuple]:
+        return file_signature(self.index_path)
+
+    def current(self) -> Optional[DocSnapshot]:
+        """
+        The latest complete snapshot. Loaded synchronously the first time; afterwards the index
+        file is stat'ed at most every `check_interval` seconds and a change is loaded in the background.
+        """
+        if self.snapshot is None:
+            self.refresh()
+            return self.snapshot
+
+        now = time.monotonic()
+        if now - self.last_check >= self.check_interval:
+            self.last_check = now
+            signature = self._signature()
+            if signature is not None and signature != self.snapshot.signature and not self.lock.locked():
+                threading.Thread(target=self.refresh, daemon=True).start()
+        return self.snapshot
+
+    def refresh(self):
+        with self.lock:
+            signature = self._signature()
+            if signature is None or (self.snapshot is not None and signature == self.snapshot.signature):
+                return
+            try:
+                if self.store is None:
+                    self.store = ChunkStore(self.store_dir, readonly=True)
+                index = read_index(self.index_path)
+                next_id = self.store.next_id()
+                published = self.store.snapshot_info()
+            except Exception as e:
+                _log("WARN", f"Could not load document index snapshot: {e}")
+                return
+            ids = index_ids(index)
+            if (len(ids) and int(ids.max()) >= next_id) or self._signature() != signature:
+                return  # rows not committed yet, or caught mid-replace; the next check retries
+            if published is not None and published[1] != signature:
+                return  # written but not yet recorded by the indexer; the next check picks up its version
+
+            version = published[0] if published else 0
+            self.snapshot = DocSnapshot(index, self.store, version, signature)  # atomic swap for readers
+            _log("INFO", f"Loaded document index v{version}: {index.ntotal} chunks")
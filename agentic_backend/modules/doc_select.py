@@ -0,0 +1,98 @@
+# modules/doc_select.py → Search Result Selection
+# Role: Turns an overfetched list of nearest chunks into a short, non-redundant result set for the agent's prompt.
+
+# Responsibilities:
+
+# Drop near-duplicate chunks (vector cosine or word-shingle Jaccard above a threshold), keeping the more relevant one
+
+# Diversify the rest with maximal marginal relevance (relevance to the query vs similarity to chunks already picked)
+
+# Stop at a character budget, so results fit what the agent carries into its next prompt
+
+# Dependencies:
+
+# numpy (imported by mcp_server_2.py as modules.doc_select, so no agentic_backend imports)
+
+# Used by: mcp_server_2.py
+
+# modules/doc_select.py
+
+from typing import Any, Dict, List, Set, Tuple
+import re
+import numpy as np
+
+DEFAULT_SELECTION: Dict[str, Any] = {
+    "k": 5,                # results returned (at most)
+    "overfetch": 4,        # nearest neighbours fetched per result slot before selection
+    "mmr_lambda": 0.7,     # 1.0 = pure relevance, 0.0 = pure diversity
+    "dup_cosine": 0.95,    # chunks at least this similar to a better one are dropped
+    "dup_jaccard": 0.8,    # ... as are chunks sharing this fraction of their word 5-shingles
+    "shingle_words": 5,
+    "min_chars": 200,      # a result cut to fit the budget must keep at least this much
+}
+
+WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, n: int) -> Set[int]:
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= n:
+        return {hash(tuple(words))}
+    return {hash(tuple(words[i:i + n])) for i in range(len(words) - n + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def select(query_vectors: np.ndarray, vectors: np.ndarray, texts: List[str], config: Dict[str, Any]) -> List[int]:
+    """
+    Indices into the candidates (given best first), in the order to present them: near-duplicates
+    removed, then MMR-ordered up to `k`. Vectors are unit length; relevance is the best cosine over queries.
+    """
+    if len(texts) == 0:
+        return []
+    relevance = (vectors @ query_vectors.T).max(axis=1)
+    similarity = vectors @ vectors.T
+    n = int(config["shingle_words"])
+    shingle_sets = [shingles(t, n) for t in texts]
+
+    kept: List[int] = []
+    for i in range(len(texts)):
+        if any(similarity[i, j] >= config["dup_cosine"] or
+               jaccard(shingle_sets[i], shingle_sets[j]) >= config["dup_jaccard"] for j in kept):
+            continue
+        kept.append(i)
+
+    lam = float(config["mmr_lambda"])
+    chosen: List[int] = []
+    remaining = list(kept)
+    while remaining and len(chosen) < int(config["k"]):
+        if chosen:
+            redundancy = similarity[np.ix_(remaining, chosen)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        scores = lam * relevance[remaining] - (1.0 - lam) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        chosen.append(best)
+        remaining.remove(best)
+    return chosen
+
+
+def fit_budget(results: List[Tuple[str, str]], char_budget: int, min_chars: int) -> List[str]:
+    """
+    (text, source line) pairs joined in order until `char_budget` characters; the first that overflows
+    has its text cut (never its source line) if at least `min_chars` of it still fits.
+    """
+    fitted: List[str] = []
+    used = 0
+    for text, source in results:
+        room = char_budget - used - len(source) - 1
+        if len(text) <= room:
+            fitted.append(f"{text}\n{source}")
+            used += len(text) + len(source) + 1
+            continue
+        if room >= min_chars or not fitted:
+            fitted.append(f"{text[: max(room, min_chars) - 1].rstrip()}…\n{source}")
+        break
+    return fitted
@@ -0,0 +1,244 @@
+# modules/embedding.py → Async Batched Embedding Client
+# Role: Gets embeddings from the local embedding server without blocking the event loop.
+
+# Responsibilities:
+
+# Keep one pooled HTTP client per (url, model) for the whole process
+
+# Coalesce concurrent embed() calls made within a small window into one batch request
+
+# Use Ollama's batch endpoint (/api/embed) and fall back to one-per-text /api/embeddings
+
+# Apply timeouts and retry transient failures with backoff
+
+# Serve repeated texts from the on-disk embedding cache (modules/embedding_cache.py)
+
+# Dependencies:
+
+# httpx, numpy
+
+# Used by: modules/memory.py
+
+# modules/embedding.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import asyncio
+import random
+import threading
+import time
+import httpx
+import numpy as np
+from agentic_backend.modules.embedding_cache import EmbeddingCache
+
+ROOT = Path(__file__).parent.parent
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def batch_url_for(url: str) -> Optional[str]:
+    """Ollama's batch endpoint next to its single-text one (/api/embeddings → /api/embed)."""
+    if url.rstrip("/").endswith("/api/embeddings"):
+        return url.rstrip("/")[: -len("/api/embeddings")] + "/api/embed"
+    return None
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+class EmbeddingClient:
+    def __init__(
+        self,
+        url: str,
+        model: str,
+        batch_url: Optional[str] = None,
+        batch_window: float = 0.005,  # seconds to wait for more texts before sending a batch
+        max_batch: int = 32,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        cache_dir: Optional[str] = None,  # relative paths are under agentic_backend/
+        cache_capacity: int = 50_000,
+    ):
+        self.url = url
+        self.model = model
+        self.batch_url = batch_url or batch_url_for(url)
+        self.batch_supported = self.batch_url is not None
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = EmbeddingCache(ROOT / cache_dir, model, capacity=cache_capacity) if cache_dir else None
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sclient: Optional[httpx.Client] = None
+
+    # --- async, coalesced ---
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one text; concurrent callers within `batch_window` share one request."""
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a list of texts, one request per `max_batch` uncached texts."""
+        vectors, missing = self._from_cache(texts)
+        for i in range(0, len(missing), self.max_batch):
+            batch = missing[i:i + self.max_batch]
+            for j, vector in zip(batch, await self._request_batch([texts[j] for j in batch])):
+                vectors[j] = vector
+        return vectors
+
+    def _from_cache(self, texts: List[str]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """Cached vectors (None where missing) and the positions that still need embedding."""
+        if self.cache is None:
+            return [None] * len(texts), list(range(len(texts)))
+        vectors = self.cache.get_many(texts)
+        return vectors, [i for i, v in enumerate(vectors) if v is None]
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            vectors = await self._request_batch([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    async def _async_client(self) -> httpx.AsyncClient:
+        """The pooled async client, replaced (and the old one closed) when the running loop changes."""
+        loop = asyncio.get_running_loop()
+        if self._aclient is not None and self._aclient_loop is not loop:
+            stale, stale_loop = self._aclient, self._aclient_loop
+            self._aclient = None
+            await self._close_stale(stale, stale_loop)
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(timeout=self.timeout)
+            self._aclient_loop = loop
+        return self._aclient
+
+    @staticmethod
+    async def _close_stale(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a client made on another loop: on that loop if it still runs, else here (its sockets are dead)."""
+        try:
+            if loop is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                await client.aclose()
+        except Exception:
+            pass  # connections bound to a closed loop can fail to close cleanly; they are dropped either way
+
+    async def _request_batch(self, texts: List[str]) -> List[np.ndarray]:
+        client = await self._async_client()
+        if self.batch_supported:
+            try:
+                data = await self._apost(client, self.batch_url, {"model": self.model, "input": texts})
+                return self._remember(texts, data["embeddings"])
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (404, 405):
+                    raise
+                self.batch_supported = False  # server has no batch endpoint
+        results = await asyncio.gather(
+            *(self._apost(client, self.url, {"model": self.model, "prompt": t}) for t in texts)
+        )
+        return self._remember(texts, [r["embedding"] for r in results])
+
+    def _remember(self, texts: List[str], raw_vectors: List[List[float]]) -> List[np.ndarray]:
+        vectors = [np.asarray(v, dtype=np.float32) for v in raw_vectors]
+        if self.cache is not None:
+            self.cache.put_many(texts, vectors)
+        return vectors
+
+    async def _apost(self, client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt == self.max_retries or not _retryable(e):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+
+    # --- blocking, for sync callers ---
+
+    def embed_many_sync(self, texts: List[str]) -> List[np.ndarray]:
+        if self._sclient is None:
+            with _clients_lock:  # called from worker threads; create the shared client once
+                if self._sclient is None:
+                    self._sclient = httpx.Client(timeout=self.timeout)
+
+        vectors, missing = self._from_cache(texts)
+        for i in range(0, len(missing), self.max_batch):
+            positions = missing[i:i + self.max_batch]
+            batch = [texts[j] for j in positions]
+            embedded = None
+            if self.batch_supported:
+                try:
+                    data = self._post(self.batch_url, {"model": self.model, "input": batch})
+                    embedded = self._remember(batch, data["embeddings"])
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in (404, 405):
+                        raise
+                    self.batch_supported = False
+            if embedded is None:
+                embedded = self._remember(batch, [
+                    self._post(self.url, {"model": self.model, "prompt": text})["embedding"] for text in batch
+                ])
+            for j, vector in zip(positions, embedded):
+                vectors[j] = vector
+        return vectors
+
+    def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._sclient.post(url, json=payload)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt == self.max_retries or not _retryable(e):
+                    raise
+                time.sleep(self._backoff(attempt))
+
+    def _backoff(self, attempt: int) -> float:
+        return min(10.0, 0.5 * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+_clients: Dict[Tuple[str, str], EmbeddingClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(url: str, model: str, **options) -> EmbeddingClient:
+    """Process-wide client per (url, model), so connections are pooled across queries."""
+    key = (url, model)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = EmbeddingClient(url, model, **options)
+        return _clients[key]
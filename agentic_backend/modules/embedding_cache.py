@@ -0,0 +1,155 @@
+# modules/embedding_cache.py → Persistent Embedding Cache
+# Role: Content-addressed (model, text hash) → vector cache on local disk, so repeated text is never re-embedded.
+
+# Responsibilities:
+
+# Store vectors in a memory-mapped float32 array, one fixed-size slot per entry
+
+# Keep a hash index (slot → key digest + last-use tick) alongside it, also memory-mapped
+
+# Evict the least recently used slot when full
+
+# Stay safe if two processes share a directory: a slot whose stored key does not match is a miss
+
+# Dependencies:
+
+# numpy only (imported both as agentic_backend.modules.* and by mcp_server_2.py as modules.*)
+
+# Used by: modules/embedding.py (memory), mcp_server_2.py (document search/indexing)
+
+# modules/embedding_cache.py
+
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+import atexit
+import hashlib
+import json
+import re
+import threading
+import numpy as np
+
+KEY_BYTES = 16
+SLOT_DTYPE = np.dtype([("key", "u1", (KEY_BYTES,)), ("tick", "<u8")])  # tick 0 = empty slot
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir, model: str, capacity: int = 50_000, flush_every: int = 64):
+        self.dir = Path(cache_dir)
+        self.model = model
+        self.capacity = capacity
+        self.flush_every = flush_every
+
+        slug = re.sub(r"[^\w.-]+", "_", model)
+        self.meta_path = self.dir / f"{slug}.meta.json"
+        self.vectors_path = self.dir / f"{slug}.vectors.f32"
+        self.slots_path = self.dir / f"{slug}.slots"
+
+        self.lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.vectors: Optional[np.memmap] = None
+        self.slots: Optional[np.memmap] = None
+        self.lru: "OrderedDict[bytes, int]" = OrderedDict()  # key → slot, least recently used first
+        self.free: List[int] = []
+        self.tick = 0
+        self.unflushed = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            self.capacity = meta["capacity"]
+            self._open(meta["dim"], mode="r+")
+        atexit.register(self.flush)
+
+    def _open(self, dim: int, mode: str):
+        self.dim = dim
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        self.slots = np.memmap(self.slots_path, dtype=SLOT_DTYPE, mode=mode, shape=(self.capacity,))
+
+        used = np.nonzero(self.slots["tick"])[0]
+        order = used[np.argsort(self.slots["tick"][used], kind="stable")]
+        self.lru = OrderedDict((self.slots["key"][i].tobytes(), int(i)) for i in order)
+        self.free = sorted(set(range(self.capacity)) - set(self.lru.values()), reverse=True)
+        self.tick = int(self.slots["tick"].max()) if len(used) else 0
+
+    def _create(self, dim: int):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._open(dim, mode="w+")
+        self.meta_path.write_text(json.dumps({"model": self.model, "dim": dim, "capacity": self.capacity}))
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).digest()[:KEY_BYTES]
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        with self.lock:
+            found: List[Optional[np.ndarray]] = []
+            for text in texts:
+                key = self.key(text)
+                slot = self.lru.get(key)
+                vector = None
+                if slot is not None and self.slots["key"][slot].tobytes() == key:
+                    vector = np.array(self.vectors[slot])
+                    if self.slots["key"][slot].tobytes() != key:  # another process reused the slot while we copied
+                        vector = None
+                if vector is None:  # missing, or overwritten by another process
+                    self.misses += 1
+                    found.append(None)
+                    continue
+                self.tick += 1
+                self.slots["tick"][slot] = self.tick
+                self.lru.move_to_end(key)
+                self.hits += 1
+                found.append(vector)
+            return found
+
+    def put(self, text: str, vector: np.ndarray):
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: List[str], vectors: List[np.ndarray]):
+        with self.lock:
+            for text, vector in zip(texts, vectors):
+                if self.vectors is None:
+                    self._create(len(vector))
+                if len(vector) != self.dim:
+                    continue  # model changed dimension; don't mix
+
+                key = self.key(text)
+                slot = self.lru.pop(key, None)
+                if slot is None:
+                    if self.free:
+                        slot = self.free.pop()
+                    else:
+                        _, slot = self.lru.popitem(last=False)  # evict least recently used
+
+                # Unpublish the old key before the vector changes, and publish the new one only after it is
+                # written, so another process never matches a key against a half- or differently-written vector
+                self.tick += 1
+                self.slots["key"][slot] = 0
+                self.vectors[slot] = vector
+                self.slots["key"][slot] = np.frombuffer(key, dtype=np.uint8)
+                self.slots["tick"][slot] = self.tick
+                self.lru[key] = slot
+                self.unflushed += 1
+
+            if self.unflushed >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.vectors is not None and self.unflushed:
+            self.vectors.flush()
+            self.slots.flush()
+        self.unflushed = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.lru), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self.lru)
@@ -0,0 +1,322 @@
+# modules/ingest.py → Pipelined Document Ingestion
+# Role: Runs document indexing as overlapping stages instead of one file at a time.
+
+# Responsibilities:
+
+# Extract documents in a process pool (PDF / HTML / MarkItDown conversion is CPU-bound); the pool can outlive a run,
+# so watch / background passes don't spawn fresh workers (each re-importing the extractor's module) for every change
+
+# Extract in-process when only a few documents changed, where starting workers would cost more than the work
+
+# Chunk and embed on worker threads, with bounded queues between stages for backpressure
+
+# Hand finished documents to the committer in batches (one store transaction + one index add per batch)
+
+# Report throughput (docs/s, chunks/s) and per-stage busy time
+
+# Dependencies:
+
+# concurrent.futures, numpy (imported by mcp_server_2.py as modules.ingest, so no agentic_backend imports)
+
+# Used by: mcp_server_2.py
+
+# modules/ingest.py
+
+from typing import Any, Callable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from pathlib import Path
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import numpy as np
+
+_DONE = object()  # end-of-stream marker passed down the queues
+
+Extracted = Tuple[Path, str]
+Chunked = Tuple[Path, List[str]]
+Embedded = Tuple[Path, List[str], np.ndarray]
+
+
+def _timed(fn: Callable, *args) -> Tuple[Any, float]:
+    """Runs in the worker process, so the time excludes queueing in the pool."""
+    t0 = time.perf_counter()
+    return fn(*args), time.perf_counter() - t0
+
+
+def _log(level: str, message: str):
+    sys.stderr.write(f"{level}: {message}\n")  # stdout carries the MCP stdio transport
+    sys.stderr.flush()
+
+
+class IngestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.docs = 0
+        self.chunks = 0
+        self.failed = 0
+        self.busy = {"extract": 0.0, "chunk": 0.0, "embed": 0.0, "commit": 0.0}  # summed across workers
+        self.lock = threading.Lock()
+
+    def add_busy(self, stage: str, seconds: float):
+        with self.lock:
+            self.busy[stage] += seconds
+
+    def fail(self):
+        with self.lock:
+            self.failed += 1
+
+    def report(self) -> str:
+        elapsed = self.elapsed or (time.perf_counter() - self.started)
+        busy = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in self.busy.items())
+        return (f"Ingested {self.docs} docs / {self.chunks} chunks in {elapsed:.1f}s → "
+                f"{self.docs / elapsed if elapsed else 0:.2f} docs/s, {self.chunks / elapsed if elapsed else 0:.1f} chunks/s "
+                f"(busy: {busy}; failed: {self.failed})")
+
+
+class ExtractorPool:
+    """
+    A spawn process pool shared by pipeline runs. Workers are started on first use and shut down
+    after `idle_seconds` without a run, so an idle server doesn't hold extraction processes.
+    """
+
+    def __init__(self, workers: Optional[int] = None, idle_seconds: float = 300.0):
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.idle_seconds = idle_seconds
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.users = 0
+        self.idle_timer: Optional[threading.Timer] = None
+        self.lock = threading.Lock()
+
+    def acquire(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.idle_timer is not None:
+                self.idle_timer.cancel()
+                self.idle_timer = None
+            if self.pool is None:
+                # spawn, not fork: the server process already runs threads
+                self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            self.users += 1
+            return self.pool
+
+    def release(self, broken: bool = False):
+        with self.lock:
+            self.users -= 1
+            if broken and self.pool is not None:  # e.g. a worker died; start fresh next time
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+            if self.users == 0 and self.pool is not None:
+                self.idle_timer = threading.Timer(self.idle_seconds, self.close)
+                self.idle_timer.daemon = True
+                self.idle_timer.start()
+
+    def close(self):
+        with self.lock:
+            if self.users:
+                return  # a run started after the idle timer fired
+            if self.idle_timer is not None:
+                self.idle_timer.cancel()
+                self.idle_timer = None
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+class IngestPipeline:
+    """
+    extract(path) → markdown      (process pool; must be a picklable top-level function)
+    chunk(path, markdown) → [str] (threads)
+    embed([str]) → vectors        (threads)
+    commit([(path, chunks, vectors), ...])  (caller's thread, in batches of `commit_docs`)
+    fail(path, error)             (optional; any stage, when a document fails to extract / chunk / embed)
+
+    A document with no text is still committed, with no chunks, so the caller can record it as indexed.
+    Extraction uses `pool` if given (else a pool for this run only), or runs in-process for runs of at
+    most `inline_max` documents.
+    """
+
+    def __init__(
+        self,
+        extract: Callable[[str], str],
+        chunk: Callable[[Path, str], List[str]],
+        embed: Callable[[List[str]], np.ndarray],
+        commit: Callable[[List[Embedded]], Any],
+        extract_workers: Optional[int] = None,
+        chunk_workers: int = 4,
+        embed_workers: int = 2,
+        queue_size: int = 8,
+        commit_docs: int = 8,
+        fail: Optional[Callable[[Path, str], Any]] = None,
+        pool: Optional[ExtractorPool] = None,
+        inline_max: int = 0,
+    ):
+        self.extract = extract
+        self.chunk = chunk
+        self.embed = embed
+        self.commit = commit
+        self.extract_workers = extract_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.chunk_workers = chunk_workers
+        self.embed_workers = embed_workers
+        self.queue_size = queue_size
+        self.commit_docs = commit_docs
+        self.fail = fail
+        self.pool = pool
+        self.inline_max = inline_max
+
+    def run(self, files: List[Path]) -> IngestStats:
+        stats = IngestStats()
+        extracted: "queue.Queue" = queue.Queue(self.queue_size)
+        chunked: "queue.Queue" = queue.Queue(self.queue_size)
+        embedded: "queue.Queue" = queue.Queue(self.queue_size)
+
+        threads = [
+            threading.Thread(target=self._extract_stage, args=(files, extracted, stats), daemon=True),
+            *self._stage("chunk", self._chunk_one, extracted, chunked, self.chunk_workers, stats),
+            *self._stage("embed", self._embed_one, chunked, embedded, self.embed_workers, stats),
+        ]
+        for thread in threads:
+            thread.start()
+
+        batch: List[Embedded] = []
+        while True:
+            try:
+                item = embedded.get(timeout=0.5)
+            except queue.Empty:
+                item = None  # idle: commit what we have rather than wait for a full batch
+            if item is not None and item is not _DONE:
+                batch.append(item)
+            if batch and (item is None or item is _DONE or len(batch) >= self.commit_docs):
+                self._commit(batch, stats)
+                batch = []
+            if item is _DONE:
+                break
+
+        for thread in threads:
+            thread.join()
+        stats.elapsed = time.perf_counter() - stats.started
+        return stats
+
+    def _extract_stage(self, files: List[Path], outbox: "queue.Queue", stats: IngestStats):
+        try:
+            if len(files) <= self.inline_max:
+                self._extract_inline(files, outbox, stats)
+            elif self.pool is not None:
+                broken = False
+                try:
+                    broken = self._extract_pooled(self.pool.acquire(), self.pool.workers, files, outbox, stats)
+                finally:
+                    self.pool.release(broken)
+            else:
+                context = multiprocessing.get_context("spawn")  # spawn, not fork: the server process runs threads
+                with ProcessPoolExecutor(self.extract_workers, mp_context=context) as pool:
+                    self._extract_pooled(pool, self.extract_workers, files, outbox, stats)
+        except Exception as e:
+            _log("ERROR", f"Extraction stage failed: {e}")
+        finally:
+            outbox.put(_DONE)
+
+    def _extract_inline(self, files: List[Path], outbox: "queue.Queue", stats: IngestStats):
+        for file in files:
+            try:
+                markdown, seconds = _timed(self.extract, str(file))
+            except Exception as e:
+                self._failed(file, f"extract: {e}", stats)
+                continue
+            stats.add_busy("extract", seconds)
+            outbox.put((file, markdown))
+
+    def _extract_pooled(self, pool: ProcessPoolExecutor, workers: int, files: List[Path],
+                        outbox: "queue.Queue", stats: IngestStats) -> bool:
+        """Returns True if the pool broke (a worker died), so a shared pool can be replaced."""
+        pending = iter(files)
+        in_flight: deque = deque()
+        broken = False
+        # Keep a bounded window of documents in the pool, so extracted text can't pile up ahead of chunking
+        for file in itertools.islice(pending, workers + self.queue_size):
+            in_flight.append((file, pool.submit(_timed, self.extract, str(file))))
+        while in_flight:
+            file, future = in_flight.popleft()
+            try:
+                markdown, seconds = future.result()
+                stats.add_busy("extract", seconds)
+                outbox.put((file, markdown))  # blocks while chunking lags
+            except BrokenProcessPool:
+                # A worker died; which document did it is unknown, so nothing is recorded as failed and
+                # the documents not extracted are simply picked up again by the next pass
+                broken = True
+                stats.fail()
+                _log("ERROR", f"Extraction worker died; {file.name} will be retried on the next pass")
+            except Exception as e:
+                self._failed(file, f"extract: {e}", stats)
+            next_file = None if broken else next(pending, None)
+            if next_file is not None:
+                in_flight.append((next_file, pool.submit(_timed, self.extract, str(next_file))))
+        return broken
+
+    def _stage(self, name: str, work: Callable, inbox: "queue.Queue", outbox: "queue.Queue",
+               workers: int, stats: IngestStats) -> List[threading.Thread]:
+        """`workers` threads mapping inbox → outbox; the last one to finish passes _DONE downstream."""
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def loop():
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    inbox.put(_DONE)  # let sibling workers see it too
+                    break
+                t0 = time.perf_counter()
+                try:
+                    result = work(item)
+                except Exception as e:
+                    self._failed(item[0], f"{name}: {e}", stats)
+                    continue
+                finally:
+                    stats.add_busy(name, time.perf_counter() - t0)
+                if result is not None:
+                    outbox.put(result)
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    outbox.put(_DONE)
+
+        return [threading.Thread(target=loop, daemon=True) for _ in range(workers)]
+
+    def _failed(self, file: Path, error: str, stats: IngestStats):
+        stats.fail()
+        _log("ERROR", f"Failed to {error} ({file.name})")
+        if self.fail is not None:
+            try:
+                self.fail(file, error)
+            except Exception as e:
+                _log("ERROR", f"Could not record the failure of {file.name}: {e}")
+
+    def _chunk_one(self, item: Extracted) -> Chunked:
+        file, markdown = item
+        if not markdown.strip():
+            _log("WARN", f"No content extracted from {file.name}")
+            return file, []
+        return file, [c for c in self.chunk(file, markdown) if c.strip()]
+
+    def _embed_one(self, item: Chunked) -> Embedded:
+        file, chunks = item
+        if not chunks:
+            return file, chunks, np.empty((0, 0), dtype=np.float32)
+        return file, chunks, np.asarray(self.embed(chunks), dtype=np.float32)
+
+    def _commit(self, batch: List[Embedded], stats: IngestStats):
+        t0 = time.perf_counter()
+        try:
+            self.commit(batch)
+            stats.docs += len(batch)
+            stats.chunks += sum(len(chunks) for _, chunks, _ in batch)
+        except Exception as e:
+            stats.failed += len(batch)
+            _log("ERROR", f"Failed to commit {len(batch)} documents: {e}")
+        stats.add_busy("commit", time.perf_counter() - t0)
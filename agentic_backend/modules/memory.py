@@ -1,103 +1,637 @@
-# modules/memory.py → Memory Manager
-# Role: Embedding-based semantic memory using FAISS.
-
-# Responsibilities:
-
-# Store & retrieve MemoryItem objects
-
-# Use local embedding server (e.g., Ollama) to vectorize input
-
-# Filter memory based on type/tags/session
-
-# Dependencies:
-
-# faiss, requests, pydantic
-
-# Used by: context.py, loop.py
-
-# Inputs: Queries and tool outputs
-
-# Outputs: Retrieved memory items for context injection
-
-# modules/memory.py
-
-from typing import List, Optional, Literal
-from pydantic import BaseModel
-from datetime import datetime
-import requests
-import numpy as np
-import faiss
-
-
-class MemoryItem(BaseModel):
-    text: str
-    type: Literal["preference", "tool_output", "fact", "query", "system"] = "fact"
-    timestamp: Optional[str] = datetime.now().isoformat()
-    tool_name: Optional[str] = None
-    user_query: Optional[str] = None
-    tags: List[str] = []
-    session_id: Optional[str] = None
-
-
-class MemoryManager:
-    def __init__(self, embedding_model_url: str, model_name: str = "nomic-embed-text"):
-        self.embedding_model_url = embedding_model_url
-        self.model_name = model_name
-        self.index: Optional[faiss.IndexFlatL2] = None
-        self.data: List[MemoryItem] = []
-        self.embeddings: List[np.ndarray] = []
-
-    def _get_embedding(self, text: str) -> np.ndarray:
-        response = requests.post(
-            self.embedding_model_url,
-            json={"model": self.model_name, "prompt": text}
-        )
-        response.raise_for_status()
-        return np.array(response.json()["embedding"], dtype=np.float32)
-
-    def add(self, item: MemoryItem):
-        embedding = self._get_embedding(item.text)
-        self.embeddings.append(embedding)
-        self.data.append(item)
-
-        # Init or add to index
-        if self.index is None:
-            self.index = faiss.IndexFlatL2(len(embedding))
-        self.index.add(np.stack([embedding]))
-
-    def retrieve(
-        self,
-        query: str,
-        top_k: int = 3,
-        type_filter: Optional[str] = None,
-        tag_filter: Optional[List[str]] = None,
-        session_filter: Optional[str] = None
-    ) -> List[MemoryItem]:
-        if not self.index or len(self.data) == 0:
-            return []
-
-        query_vec = self._get_embedding(query).reshape(1, -1)
-        D, I = self.index.search(query_vec, top_k * 2)  # overfetch for filtering
-
-        results = []
-        for idx in I[0]:
-            if idx >= len(self.data):
-                continue
-            item = self.data[idx]
-
-            if type_filter and item.type != type_filter:
-                continue
-            if tag_filter and not any(tag in item.tags for tag in tag_filter):
-                continue
-            if session_filter and item.session_id != session_filter:
-                continue
-
-            results.append(item)
-            if len(results) >= top_k:
-                break
-
-        return results
-
-    def bulk_add(self, items: List[MemoryItem]):
-        for item in items:
-            self.add(item)
+# modules/memory.py → Memory Manager
+# Role: Embedding-based semantic memory using FAISS.
+
+# Responsibilities:
+
+# Store & retrieve MemoryItem objects
+
+# Use local embedding server (e.g., Ollama) to vectorize input, batched via modules/embedding.py
+
+# Filter memory based on type/tags/session/namespace (per user)
+
+# Persist to disk (modules/memory_store.py) and share one instance per process
+
+# Keep items and vectors in a compact column store (modules/memory_columns.py), building MemoryItem objects only for results
+
+# Defer embedding of new items: add() only enqueues; a background flush (or the next retrieve) embeds them in one batch
+
+# Enforce per-namespace capacity / TTL, evict least recently retrieved items, compact old tool outputs into summaries (modules/memory_retention.py)
+
+# Keep a BM25 index alongside the vectors: fuse both rankings (RRF), or answer rare-term queries without embedding (modules/memory_lexical.py)
+
+# Promote from an exact flat index to the configured ANN index (modules/memory_index.py) as the store grows
+
+# Dependencies:
+
+# faiss, pydantic, modules/embedding.py, modules/memory_store.py, modules/memory_columns.py,
+# modules/memory_retention.py, modules/memory_lexical.py
+
+# Used by: context.py, loop.py
+
+# Inputs: Queries and tool outputs
+
+# Outputs: Retrieved memory items for context injection
+
+# modules/memory.py
+
+from typing import Any, AsyncIterable, Dict, Iterable, Iterator, List, Optional, Literal, Tuple, Union
+from pydantic import BaseModel, Field
+from datetime import datetime
+from pathlib import Path
+from collections import deque
+import asyncio
+import atexit
+import itertools
+import threading
+import time
+import numpy as np
+import faiss
+from agentic_backend.modules.embedding import get_embedding_client
+from agentic_backend.modules.memory_store import MemoryStore
+from agentic_backend.modules.memory_columns import MemoryColumns
+from agentic_backend.modules.memory_lexical import BM25Index, DEFAULT_RETRIEVAL, tokenize, reciprocal_rank_fusion
+from agentic_backend.modules.memory_retention import (
+    RetentionPolicy, expired_ids, over_capacity_ids, compaction_clusters, summarize_cluster
+)
+from agentic_backend.modules.memory_index import (
+    Postings, filtered_search, resolve_index_config, build_index, configure_search, index_kind, TRAINED_TYPES
+)
+
+ROOT = Path(__file__).parent.parent
+
+
+class MemoryItem(BaseModel):
+    text: str
+    type: Literal["preference", "tool_output", "fact", "query", "system"] = "fact"
+    timestamp: Optional[str] = Field(default_factory=lambda: datetime.now().isoformat())
+    tool_name: Optional[str] = None
+    user_query: Optional[str] = None
+    tags: List[str] = []
+    session_id: Optional[str] = None
+    namespace: Optional[str] = None  # e.g. "user-<telegram id>"; memory is shared across that user's sessions
+
+
+class MemoryManager:
+    def __init__(
+        self,
+        embedding_model_url: str,
+        model_name: str = "nomic-embed-text",
+        client_options: Optional[Dict[str, Any]] = None,
+        persist_dir: Optional[str] = None,
+        snapshot_every: int = 50,
+        snapshot_seconds: float = 30.0,
+        index_config: Optional[Dict[str, Any]] = None,
+        defer_embedding: bool = True,
+        flush_delay: float = 0.5,  # seconds after the first deferred add before the background flush
+        retention: Optional[Dict[str, Any]] = None,
+        retrieval: Optional[Dict[str, Any]] = None
+    ):
+        self.embedding_model_url = embedding_model_url
+        self.model_name = model_name
+        self.client = get_embedding_client(embedding_model_url, model_name, **(client_options or {}))
+        self.index: Optional[faiss.Index] = None  # ANN index once promoted; until then searches are exact over self.columns
+        self.columns = MemoryColumns()  # items + the single in-process copy of their vectors; row i = item id i
+        self.postings = Postings()  # filters → exact candidate ids
+        self.retrieval = {**DEFAULT_RETRIEVAL, **(retrieval or {})}
+        self.lexical = self._new_lexical()  # BM25 over item text, same ids
+
+        self.index_config = resolve_index_config(index_config)
+        self.index_lock = threading.RLock()  # guards items/index against background flushes, rebuilds and searches
+        self.trained_at = 0  # item count the current ANN index was built from
+        self.rebuild_thread: Optional[threading.Thread] = None
+        self.rebuild_failed = False
+        self.generation = 0  # bumped when eviction renumbers the items; stale background rebuilds are dropped
+
+        self.retention = RetentionPolicy(retention)
+        self.maintain_thread: Optional[threading.Thread] = None
+        self.maintain_lock = threading.Lock()  # one retention pass at a time (only it renumbers items)
+        self.inserts_since_maintain = 0
+
+        self.defer_embedding = defer_embedding
+        self.flush_delay = flush_delay
+        self.pending: List[MemoryItem] = []  # added but not yet embedded
+        self.pending_lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # one flush at a time, so retrieve waits for an in-flight one
+        self.flush_timer: Optional[threading.Timer] = None
+
+        self.store = MemoryStore(persist_dir) if persist_dir else None
+        self.snapshot_every = snapshot_every  # adds, and
+        self.snapshot_seconds = snapshot_seconds  # seconds, between automatic index snapshots
+        self.unsnapshotted = 0
+        self.last_snapshot = time.monotonic()
+        self.snapshot_lock = threading.Lock()  # one snapshot write at a time
+        self.bulk_imports = 0  # while > 0, automatic snapshots wait for the import to finish
+        if self.store:
+            self._load()
+
+    def _load(self):
+        lines, vectors = self.store.load()
+        rows = [MemoryItem.model_validate_json(line).model_dump() for line in lines]
+        if rows:
+            self.columns.append_many(rows, vectors)
+            self.columns.kill(self.store.deleted(len(rows)))  # deleted before the restart; dropped at the next rewrite
+        for item_id, row in enumerate(rows):
+            self._index_fields(item_id, row)
+
+        if self.index_config["type"] != "flat" and len(rows) >= self.index_config["promote_after"]:
+            self.index = self.store.load_index(vectors)  # None → rebuilt in the background below
+            if index_kind(self.index) == "flat":
+                self.index = None  # an exact snapshot would only duplicate the column store's vectors
+            else:
+                configure_search(self.index, self.index_config)
+                self.trained_at = len(rows)
+        print(f"[memory] Loaded {len(rows)} items from {self.store.path} ({index_kind(self.index)} index)")
+        self._maybe_rebuild()
+        if rows:
+            self._start_maintenance()  # expire / evict whatever aged out while the bot was down
+
+    def snapshot(self, wait: bool = True):
+        """
+        fsync the item/vector logs and atomically rewrite the index snapshot. The index is serialized
+        in memory under the lock and written to disk outside it, so searches and adds are not blocked
+        by the I/O. With `wait=False` a snapshot already in progress makes this a no-op.
+        """
+        if not self.store or not self.snapshot_lock.acquire(blocking=wait):
+            return
+        try:
+            with self.index_lock:
+                self.store.sync_logs()
+                data = faiss.serialize_index(self.index) if self.index is not None else None
+                generation = self.generation
+                self.unsnapshotted = 0
+                self.last_snapshot = time.monotonic()
+            if data is None:
+                return
+            tmp = self.store.write_index(data)
+            with self.index_lock:
+                if generation == self.generation:
+                    self.store.publish_index(tmp)
+                else:
+                    tmp.unlink(missing_ok=True)  # storage was rewritten meanwhile; this index uses the old ids
+        finally:
+            self.snapshot_lock.release()
+
+    def _maybe_snapshot(self):
+        if (
+            self.store and not self.bulk_imports and self.unsnapshotted >= self.snapshot_every
+            and time.monotonic() - self.last_snapshot >= self.snapshot_seconds
+        ):
+            self.snapshot(wait=False)
+
+    def close(self):
+        self.flush_pending()
+        if self.store:
+            self.snapshot()
+            self.store.close()
+
+    def _get_embedding(self, text: str) -> np.ndarray:
+        return self.client.embed_many_sync([text])[0]
+
+    def add(self, item: MemoryItem):
+        if self.defer_embedding:
+            self._enqueue(item)
+        else:
+            self._insert(item, self._get_embedding(item.text))
+
+    async def aadd(self, item: MemoryItem):
+        """Like `add`, but an immediate embedding call is awaited (and batched with concurrent calls)."""
+        if self.defer_embedding:
+            self._enqueue(item)
+        else:
+            self._insert(item, await self.client.embed(item.text))
+
+    def _enqueue(self, item: MemoryItem):
+        with self.pending_lock:
+            self.pending.append(item)
+            if self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_delay, self._background_flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+    def _background_flush(self):
+        with self.pending_lock:
+            self.flush_timer = None
+        self.flush_pending()
+
+    def flush_pending(self):
+        """Embed every pending item in one batch and insert them (in the order they were added)."""
+        with self.flush_lock:
+            with self.pending_lock:
+                items, self.pending = self.pending, []
+            if not items:
+                return
+            try:
+                vectors = self.client.embed_many_sync([item.text for item in items])
+            except Exception as e:
+                with self.pending_lock:
+                    self.pending[:0] = items  # keep them for the next flush
+                print(f"[memory] ⚠️ Embedding {len(items)} pending items failed: {e}")
+                return
+            self._insert_many(items, vectors)
+
+    def _has_pending(self) -> bool:
+        return bool(self.pending) or self.flush_lock.locked()
+
+    def _new_lexical(self) -> BM25Index:
+        return BM25Index(k1=float(self.retrieval["k1"]), b=float(self.retrieval["b"]))
+
+    def _index_fields(self, item_id: int, row: Dict[str, Any]):
+        self.postings.add(
+            item_id,
+            {"type": row["type"], "session_id": row["session_id"], "namespace": row["namespace"]},
+            row["tags"]
+        )
+        self.lexical.add(item_id, row["text"])
+
+    def _insert(self, item: MemoryItem, embedding: np.ndarray):
+        self._insert_many([item], [embedding])
+
+    def _insert_many(self, items: List[MemoryItem], embeddings: List[np.ndarray], last_used: Optional[List[float]] = None):
+        rows = [item.model_dump() for item in items]
+        if last_used is not None:  # e.g. a compaction summary is only as recent as the rows it replaces
+            for row, used in zip(rows, last_used):
+                row["last_used"] = used
+        with self.index_lock:
+            start = len(self.columns)
+            self.columns.append_many(rows, np.stack(embeddings))
+            for offset, row in enumerate(rows):
+                self._index_fields(start + offset, row)
+
+            # Add to the ANN index once there is one
+            if self.index is not None:
+                self.index.add(self.columns.vectors[start:])
+
+            if self.store:
+                for item, embedding in zip(items, embeddings):
+                    self.store.append(item.model_dump_json(), embedding)
+                self.unsnapshotted += len(items)
+        self._maybe_snapshot()
+        self._maybe_rebuild()
+        self._maybe_maintain(len(items))
+
+    def _maybe_rebuild(self):
+        """Start a background (re)build when the store passes `promote_after` or an IVF index has gone stale."""
+        target = self.index_config["type"]
+        count = len(self.columns)
+        if target == "flat" or self.rebuild_failed or count < self.index_config["promote_after"]:
+            return
+        if self.rebuild_thread is not None and self.rebuild_thread.is_alive():
+            return
+
+        stale = target in TRAINED_TYPES and count >= self.trained_at * self.index_config["retrain_growth"]
+        if index_kind(self.index) == target and not stale:
+            return
+
+        self.rebuild_thread = threading.Thread(
+            target=self._rebuild, args=(target, count, self.generation, self.columns), daemon=True
+        )
+        self.rebuild_thread.start()
+
+    def _rebuild(self, kind: str, count: int, generation: int, columns: MemoryColumns):
+        t0 = time.perf_counter()
+        try:
+            vectors = columns.vectors[:count]  # rows never change, so this view survives column growth
+            index = build_index(kind, vectors.shape[1], self.index_config, vectors)
+            index.add(vectors)
+
+            # Catch up with items added while building, then swap
+            with self.index_lock:
+                if generation != self.generation:
+                    return  # items were renumbered meanwhile; the next insert starts a fresh build
+                if len(self.columns) > count:
+                    index.add(self.columns.vectors[count:])
+                self.index = index
+                self.trained_at = count
+            print(f"[memory] Built {kind} index over {count} items in {time.perf_counter() - t0:.1f}s")
+        except Exception as e:
+            self.rebuild_failed = True  # keep serving from the current index
+            print(f"[memory] ⚠️ Building {kind} index failed: {e}")
+
+    def _maybe_maintain(self, added: int):
+        self.inserts_since_maintain += added
+        if self.inserts_since_maintain >= self.retention["maintain_every"]:
+            self._start_maintenance()
+
+    def _start_maintenance(self):
+        if self.maintain_lock.locked() or (self.maintain_thread is not None and self.maintain_thread.is_alive()):
+            return
+        self.inserts_since_maintain = 0
+        self.maintain_thread = threading.Thread(target=self.maintain, daemon=True)
+        self.maintain_thread.start()
+
+    def maintain(self, now: Optional[float] = None):
+        """
+        One retention pass (normally on a background thread): expire items past their namespace TTL,
+        compact old tool outputs into summaries, evict least recently retrieved items over
+        capacity, and rewrite storage once enough rows are dead.
+        """
+        with self.maintain_lock:
+            self._maintain(now or time.time())
+
+    def _maintain(self, now: float):
+        t0 = time.perf_counter()
+        with self.index_lock:
+            expired = self._kill(expired_ids(self.columns, self.retention, now))
+            clusters = compaction_clusters(self.columns, self.retention, now)
+            summaries = [
+                summarize_cluster([self.columns.row(int(i)) for i in cluster], int(self.retention["summary_chars"]))
+                for cluster in clusters
+            ]
+            recency = [max(self.columns.last_used[int(i)] for i in cluster) for cluster in clusters]
+
+        # Summaries are embedded once, outside the lock; only maintain() renumbers items, so the ids stay valid
+        compacted = 0
+        if summaries:
+            try:
+                vectors = self.client.embed_many_sync([summary["text"] for summary in summaries])
+                with self.index_lock:
+                    compacted = sum(self._kill(cluster) for cluster in clusters)
+                    self._insert_many([MemoryItem(**summary) for summary in summaries], vectors, last_used=recency)
+            except Exception as e:
+                summaries = []
+                print(f"[memory] ⚠️ Embedding compaction summaries failed: {e}")
+
+        with self.index_lock:
+            evicted = self._kill(over_capacity_ids(self.columns, self.retention))
+            if self.columns.dead and self.columns.dead >= self.retention["dead_ratio"] * len(self.columns):
+                self._compact_storage()
+
+        if expired or compacted or evicted:
+            print(f"[memory] Maintenance: expired {expired}, compacted {compacted} into {len(summaries)} summaries, "
+                  f"evicted {evicted} ({time.perf_counter() - t0:.2f}s)")
+
+    def _kill(self, ids: np.ndarray) -> int:
+        """Tombstone rows in memory and in the store's delete log, so they stay dead across a restart."""
+        if self.store:
+            self.store.delete(ids)
+        return self.columns.kill(ids)
+
+    def _compact_storage(self):
+        """Drop dead rows: renumber items, rebuild postings, rewrite the store, rebuild the ANN index in the background."""
+        keep = np.flatnonzero(self.columns.live_mask())
+        self.columns = self.columns.select(keep)
+        self.postings = Postings()
+        self.lexical = self._new_lexical()
+        rows = [self.columns.row(i) for i in range(len(self.columns))]
+        for item_id, row in enumerate(rows):
+            self._index_fields(item_id, row)
+
+        self.generation += 1
+        self.index = None  # exact search over the compacted columns until the rebuild swaps in
+        self.trained_at = 0
+        if self.store:
+            self.store.rewrite([MemoryItem(**row).model_dump_json() for row in rows], self.columns.vectors)
+            self.unsnapshotted = 0
+        self._maybe_rebuild()
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 3,
+        type_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        session_filter: Optional[str] = None,
+        namespace_filter: Optional[str] = None
+    ) -> List[MemoryItem]:
+        if self._has_pending():
+            self.flush_pending()
+        if len(self.columns) == 0:
+            return []
+
+        filters = (type_filter, tag_filter, session_filter, namespace_filter)
+        lexical = self._lexical_only(query, top_k, *filters)
+        if lexical is not None:
+            return lexical
+        query_vec = self._get_embedding(query)
+        return self._search(query_vec, top_k, *filters, query=query)
+
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 3,
+        type_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        session_filter: Optional[str] = None,
+        namespace_filter: Optional[str] = None
+    ) -> List[MemoryItem]:
+        """Like `retrieve`, but the query embedding (and any pending flush) is awaited instead of blocking the event loop."""
+        if self._has_pending():
+            await asyncio.to_thread(self.flush_pending)
+        if len(self.columns) == 0:
+            return []
+
+        filters = (type_filter, tag_filter, session_filter, namespace_filter)
+        lexical = self._lexical_only(query, top_k, *filters)
+        if lexical is not None:
+            return lexical
+        query_vec = await self.client.embed(query)
+        return self._search(query_vec, top_k, *filters, query=query)
+
+    def _candidates(
+        self,
+        type_filter: Optional[str],
+        tag_filter: Optional[List[str]],
+        session_filter: Optional[str],
+        namespace_filter: Optional[str]
+    ) -> Optional[np.ndarray]:
+        """Live ids passing every filter (None = all items, nothing filtered or evicted)."""
+        candidates = self.postings.candidates(
+            {"type": type_filter, "session_id": session_filter, "namespace": namespace_filter},
+            tag_filter
+        )
+        if self.columns.dead:  # skip evicted rows until the next compaction drops them
+            live = self.columns.live_mask()
+            candidates = np.flatnonzero(live) if candidates is None else candidates[live[candidates]]
+        return candidates
+
+    def _allowed(self, candidates: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if candidates is None:
+            return None
+        mask = np.zeros(len(self.columns), dtype=bool)
+        mask[candidates] = True
+        return mask
+
+    def _lexical_only(
+        self,
+        query: str,
+        top_k: int,
+        type_filter: Optional[str],
+        tag_filter: Optional[List[str]],
+        session_filter: Optional[str],
+        namespace_filter: Optional[str]
+    ) -> Optional[List[MemoryItem]]:
+        """
+        BM25-only results when the query names something rare (a high-IDF term that some
+        allowed item contains), e.g. an entity or a number; None means embed and search as usual.
+        """
+        if self.retrieval["mode"] != "hybrid":
+            return None
+        terms = tokenize(query)
+        with self.index_lock:
+            n_docs = len(self.columns) - self.columns.dead
+            rare = self.lexical.rare_terms(terms, n_docs, float(self.retrieval["lexical_min_idf"]))
+            if not rare:
+                return None
+            candidates = self._candidates(type_filter, tag_filter, session_filter, namespace_filter)
+            allowed = self._allowed(candidates)
+            if not self.lexical.search(rare, 1, n_docs, allowed):
+                return None
+            ids = self.lexical.search(terms, top_k, n_docs, allowed)
+            if len(ids) < min(top_k, n_docs if candidates is None else len(candidates)):
+                return None  # too few keyword matches to fill top_k; let the vectors rank
+            return self._results(ids)
+
+    def _results(self, ids: List[int]) -> List[MemoryItem]:
+        self.columns.touch(ids, time.time())  # recency for LRU eviction
+        return [MemoryItem(**self.columns.row(i)) for i in ids]
+
+    def _search(
+        self,
+        query_vec: np.ndarray,
+        top_k: int,
+        type_filter: Optional[str],
+        tag_filter: Optional[List[str]],
+        session_filter: Optional[str],
+        namespace_filter: Optional[str],
+        query: Optional[str] = None
+    ) -> List[MemoryItem]:
+        # Exact filtered top-k: search only the ids that pass every filter
+        with self.index_lock:
+            candidates = self._candidates(type_filter, tag_filter, session_filter, namespace_filter)
+            hybrid = query is not None and self.retrieval["mode"] == "hybrid"
+            fetch = top_k * int(self.retrieval["fanout"]) if hybrid else top_k
+            ids = filtered_search(
+                self.index,
+                query_vec,
+                fetch,
+                candidates,
+                self.columns.vectors,
+                self.columns.sq_norms
+            )
+            if hybrid:
+                n_docs = len(self.columns) - self.columns.dead
+                lexical = self.lexical.search(tokenize(query), fetch, n_docs, self._allowed(candidates))
+                ids = reciprocal_rank_fusion([ids, lexical], top_k, int(self.retrieval["rrf_k"])) if lexical else ids[:top_k]
+            return self._results(ids)
+
+    def footprint(self) -> Dict[str, Any]:
+        """Bytes held by the column store and filter postings, with a bytes-per-item figure (ANN index excluded)."""
+        with self.index_lock:
+            sizes = self.columns.nbytes()
+            sizes["postings"] = self.postings.nbytes()
+            sizes["lexical"] = self.lexical.nbytes()
+            sizes["total"] += sizes["postings"] + sizes["lexical"]
+            sizes["bytes_per_item"] = sizes["total"] / sizes["items"] if sizes["items"] else 0.0
+            return sizes
+
+    def bulk_add(self, items: Iterable[MemoryItem], batch_size: int = 256) -> int:
+        """
+        Embed and insert many items: one embedding request per `max_batch` texts and one index add
+        per `batch_size` items. `items` may be a generator, which is consumed one batch at a time.
+        """
+        self.flush_pending()  # keep insertion order with earlier deferred adds
+        added = 0
+        self.bulk_imports += 1
+        try:
+            for batch in _batches(items, batch_size):
+                self._insert_many(batch, self.client.embed_many_sync([item.text for item in batch]))
+                added += len(batch)
+        finally:
+            self.bulk_imports -= 1
+        self.snapshot()  # once for the whole import
+        return added
+
+    async def abulk_add(
+        self,
+        items: Union[Iterable[MemoryItem], AsyncIterable[MemoryItem]],
+        batch_size: int = 256,
+        concurrency: int = 2
+    ) -> int:
+        """
+        Async `bulk_add` for lists, iterators or async iterators (e.g. a conversation export being parsed):
+        up to `concurrency` batches are embedding at once, and batches are inserted in order.
+        """
+        await asyncio.to_thread(self.flush_pending)
+        in_flight: deque[Tuple[List[MemoryItem], asyncio.Task]] = deque()
+        added = 0
+        self.bulk_imports += 1
+        try:
+            async for batch in _abatches(items, batch_size):
+                in_flight.append((batch, asyncio.ensure_future(self.client.embed_many([item.text for item in batch]))))
+                if len(in_flight) >= concurrency:
+                    added += await self._insert_next(in_flight)
+            while in_flight:
+                added += await self._insert_next(in_flight)
+        finally:
+            self.bulk_imports -= 1
+            for _, task in in_flight:
+                task.cancel()
+        await asyncio.to_thread(self.snapshot)  # once for the whole import
+        return added
+
+    async def _insert_next(self, in_flight: deque) -> int:
+        batch, task = in_flight.popleft()
+        vectors = await task
+        await asyncio.to_thread(self._insert_many, batch, vectors)
+        return len(batch)
+
+
+def _batches(items: Iterable[MemoryItem], size: int) -> Iterator[List[MemoryItem]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def _abatches(items: Union[Iterable[MemoryItem], AsyncIterable[MemoryItem]], size: int):
+    if not hasattr(items, "__aiter__"):
+        for batch in _batches(items, size):
+            yield batch
+        return
+    batch: List[MemoryItem] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_memory_manager: Optional[MemoryManager] = None
+_memory_manager_lock = threading.Lock()
+
+
+def get_memory_manager() -> MemoryManager:
+    """
+    Process-wide memory, opened from disk on first use (bot startup) and shared by all sessions.
+    Configured by the `memory:` section of profiles.yaml.
+    """
+    global _memory_manager
+    if _memory_manager is None:
+        with _memory_manager_lock:
+            if _memory_manager is None:
+                from agentic_backend.core.config import get_config
+                config = get_config().profile["memory"]
+                persist_dir = config.get("persist_dir")
+                _memory_manager = MemoryManager(
+                    embedding_model_url=config["embedding_url"],
+                    model_name=config["embedding_model"],
+                    client_options=config.get("embedding_client"),
+                    persist_dir=str(ROOT / persist_dir) if persist_dir else None,
+                    snapshot_every=config.get("snapshot_every", 50),
+                    snapshot_seconds=config.get("snapshot_seconds", 30.0),
+                    index_config=config.get("index"),
+                    defer_embedding=config.get("defer_embedding", True),
+                    flush_delay=config.get("flush_delay", 0.5),
+                    retention=config.get("retention"),
+                    retrieval=config.get("retrieval")
+                )
+                atexit.register(_memory_manager.close)
+    return _memory_manager
+
+
+def set_memory_manager(manager: Optional[MemoryManager]) -> None:
+    """Install a MemoryManager (or `None` to reopen from config on next use)."""
+    global _memory_manager
+    with _memory_manager_lock:
+        _memory_manager = manager
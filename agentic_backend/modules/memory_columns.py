@@ -0,0 +1,224 @@
+# modules/memory_columns.py → Compact Columnar Memory Storage
+# Role: Holds MemoryManager's items as columns instead of one pydantic object + one numpy array per item.
+
+# Responsibilities:
+
+# Keep vectors in one contiguous float32 matrix (the only in-process copy while the index is exact)
+
+# Keep type / timestamp / squared norm as fixed-width arrays, and item text as one UTF-8 blob + offsets
+
+# Intern repeated strings (session ids, namespaces, tool names, user queries, tags) as int32 codes
+
+# Rebuild a single row as plain fields on demand, and report bytes per item
+
+# Track liveness (evicted rows are tombstoned until compaction) and last-retrieved time per row
+
+# Dependencies:
+
+# numpy
+
+# Used by: modules/memory.py, bench/memory_footprint_report.py
+
+# modules/memory_columns.py
+
+from typing import Any, Dict, List, Optional
+from array import array
+from datetime import datetime
+import math
+import sys
+import time
+import numpy as np
+
+MEMORY_TYPES = ("preference", "tool_output", "fact", "query", "system")
+TYPE_CODES = {name: code for code, name in enumerate(MEMORY_TYPES)}
+
+
+class StringPool:
+    """Interned strings ↔ dense int codes (-1 = None)."""
+
+    __slots__ = ("codes", "strings")
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(sys.intern(value))
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return None if code < 0 else self.strings[code]
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.codes) + sys.getsizeof(self.strings) + sum(sys.getsizeof(s) for s in self.strings)
+
+
+def _to_epoch(timestamp: Optional[str]) -> float:
+    if not timestamp:
+        return math.nan
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except ValueError:
+        return math.nan
+
+
+def _from_epoch(value: float) -> Optional[str]:
+    return None if math.isnan(value) else datetime.fromtimestamp(value).isoformat()
+
+
+class MemoryColumns:
+    """Append-only column store; row i is the item with FAISS id i."""
+
+    __slots__ = (
+        "dim", "count", "dead", "_vectors", "_sq_norms",
+        "types", "timestamps", "last_used", "live", "session_ids", "namespaces", "tool_names", "user_queries",
+        "text_blob", "text_offsets", "tag_codes", "tag_offsets",
+        "sessions", "namespace_pool", "tools", "queries", "tags",
+    )
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.count = 0
+        self.dead = 0
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim), rows [0, count) in use
+        self._sq_norms: Optional[np.ndarray] = None
+
+        self.types = array("B")
+        self.timestamps = array("d")  # epoch seconds, NaN = no timestamp
+        self.last_used = array("d")   # epoch seconds the row was last retrieved (or added)
+        self.live = array("B")        # 0 = evicted, dropped at the next compaction
+        self.session_ids = array("i")
+        self.namespaces = array("i")
+        self.tool_names = array("i")
+        self.user_queries = array("i")
+        self.text_blob = bytearray()
+        self.text_offsets = array("q", [0])
+        self.tag_codes = array("i")
+        self.tag_offsets = array("q", [0])
+
+        self.sessions = StringPool()
+        self.namespace_pool = StringPool()
+        self.tools = StringPool()
+        self.queries = StringPool()
+        self.tags = StringPool()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """(count, dim) view; rows never change once written, so views stay valid after growth."""
+        if self._vectors is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[: self.count]
+
+    @property
+    def sq_norms(self) -> np.ndarray:
+        if self._sq_norms is None:
+            return np.zeros(0, dtype=np.float32)
+        return self._sq_norms[: self.count]
+
+    def _reserve(self, extra: int, dim: int):
+        if self._vectors is None:
+            self.dim = dim
+            capacity = max(64, extra)
+            self._vectors = np.empty((capacity, dim), dtype=np.float32)
+            self._sq_norms = np.empty(capacity, dtype=np.float32)
+            return
+        needed = self.count + extra
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, int(len(self._vectors) * 1.5))
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[: self.count] = self._vectors[: self.count]
+        norms = np.empty(capacity, dtype=np.float32)
+        norms[: self.count] = self._sq_norms[: self.count]
+        self._vectors, self._sq_norms = vectors, norms
+
+    def append_many(self, rows: List[Dict[str, Any]], vectors: np.ndarray):
+        """Append items (MemoryItem fields as dicts) with their vectors; row ids continue from len(self)."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(rows), -1)
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match memory dimension {self.dim}")
+        self._reserve(len(rows), vectors.shape[1])
+        start = self.count
+        self._vectors[start:start + len(rows)] = vectors
+        self._sq_norms[start:start + len(rows)] = np.einsum("ij,ij->i", vectors, vectors)
+
+        now = time.time()
+        for row in rows:
+            self.live.append(1)
+            self.last_used.append(row.get("last_used") or now)
+            self.types.append(TYPE_CODES[row.get("type") or "fact"])
+            self.timestamps.append(_to_epoch(row.get("timestamp")))
+            self.session_ids.append(self.sessions.code(row.get("session_id")))
+            self.namespaces.append(self.namespace_pool.code(row.get("namespace")))
+            self.tool_names.append(self.tools.code(row.get("tool_name")))
+            self.user_queries.append(self.queries.code(row.get("user_query")))
+            self.text_blob += row["text"].encode("utf-8")
+            self.text_offsets.append(len(self.text_blob))
+            self.tag_codes.extend(self.tags.code(tag) for tag in row.get("tags") or [])
+            self.tag_offsets.append(len(self.tag_codes))
+        self.count += len(rows)
+
+    def kill(self, ids) -> int:
+        """Tombstone rows; returns how many were still live."""
+        killed = 0
+        for i in ids:
+            if self.live[i]:
+                self.live[i] = 0
+                killed += 1
+        self.dead += killed
+        return killed
+
+    def touch(self, ids, now: float):
+        for i in ids:
+            self.last_used[i] = now
+
+    def live_mask(self) -> np.ndarray:
+        return np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+
+    def column(self, name: str) -> np.ndarray:
+        """Copy of a fixed-width column (e.g. "timestamps", "namespaces") as a NumPy array."""
+        values = getattr(self, name)
+        return np.frombuffer(values, dtype=np.dtype(values.typecode)).copy()
+
+    def select(self, keep: np.ndarray) -> "MemoryColumns":
+        """New column store with only rows `keep` (in order), renumbered from 0; LRU times are kept."""
+        compacted = MemoryColumns(self.dim)
+        if len(keep):
+            rows = [{**self.row(int(i)), "last_used": self.last_used[int(i)]} for i in keep]
+            compacted.append_many(rows, self.vectors[keep])
+        return compacted
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Fields of item `i`, ready for MemoryItem(**row)."""
+        return {
+            "text": self.text_blob[self.text_offsets[i]:self.text_offsets[i + 1]].decode("utf-8"),
+            "type": MEMORY_TYPES[self.types[i]],
+            "timestamp": _from_epoch(self.timestamps[i]),
+            "tool_name": self.tools.value(self.tool_names[i]),
+            "user_query": self.queries.value(self.user_queries[i]),
+            "tags": [self.tags.value(c) for c in self.tag_codes[self.tag_offsets[i]:self.tag_offsets[i + 1]]],
+            "session_id": self.sessions.value(self.session_ids[i]),
+            "namespace": self.namespace_pool.value(self.namespaces[i]),
+        }
+
+    def nbytes(self) -> Dict[str, Any]:
+        """Bytes held per column (allocated capacity, not just used rows) and the per-item average."""
+        sizes = {
+            "vectors": 0 if self._vectors is None else self._vectors.nbytes + self._sq_norms.nbytes,
+            "text": sys.getsizeof(self.text_blob) + sys.getsizeof(self.text_offsets),
+            "fields": sum(sys.getsizeof(a) for a in (
+                self.types, self.timestamps, self.last_used, self.live, self.session_ids, self.namespaces,
+                self.tool_names, self.user_queries, self.tag_codes, self.tag_offsets,
+            )),
+            "strings": sum(p.nbytes() for p in (self.sessions, self.namespace_pool, self.tools, self.queries, self.tags)),
+        }
+        total = sum(sizes.values())
+        return {**sizes, "total": total, "items": self.count, "bytes_per_item": total / self.count if self.count else 0.0}
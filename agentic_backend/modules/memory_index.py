@@ -0,0 +1,210 @@
+# modules/memory_index.py → Memory Vector Index Helpers
+# Role: Filter-aware nearest-neighbour search and configurable index backends for MemoryManager.
+
+# Responsibilities:
+
+# Keep inverted postings (type / session / namespace value → item ids, tag → item ids)
+
+# Resolve retrieve() filters to the exact candidate id set
+
+# Search only inside that set: brute force for small sets, FAISS ID selector for large ones
+
+# Exact search straight from the column store's vector matrix while no ANN index has been built
+
+# Build the index type selected in profiles.yaml (flat, hnsw, ivf_flat, ivf_pq) and its search parameters
+
+# Dependencies:
+
+# faiss, numpy
+
+# Used by: modules/memory.py
+
+# modules/memory_index.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from array import array
+import sys
+import numpy as np
+import faiss
+
+FIELDS = ("type", "session_id", "namespace")
+BRUTE_FORCE_LIMIT = 4096  # candidates up to this many are scored directly with NumPy
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+TRAINED_TYPES = ("ivf_flat", "ivf_pq")
+
+DEFAULT_INDEX_CONFIG: Dict[str, Any] = {
+    "type": "flat",            # target index type
+    "promote_after": 50_000,   # stay flat (exact) until this many items, then build `type` in the background
+    "retrain_growth": 2.0,     # retrain IVF indexes once the store has grown by this factor since training
+    "hnsw": {"M": 32, "ef_construction": 200, "ef_search": 64},
+    "ivf": {"nlist": 1024, "nprobe": 16},
+    "pq": {"m": 16, "nbits": 8},
+}
+
+
+def resolve_index_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """`memory.index` from profiles.yaml merged over the defaults (one level deep)."""
+    merged = {k: (dict(v) if isinstance(v, dict) else v) for k, v in DEFAULT_INDEX_CONFIG.items()}
+    for key, value in (config or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    if merged["type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown memory index type: {merged['type']} (options: {', '.join(INDEX_TYPES)})")
+    return merged
+
+
+def index_kind(index: Optional[faiss.Index]) -> str:
+    """Type of a built index; None (exact search over the stored vectors) counts as flat."""
+    if index is None:
+        return "flat"
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    return "flat"
+
+
+def build_index(kind: str, dim: int, config: Dict[str, Any], vectors: Optional[np.ndarray] = None) -> faiss.Index:
+    """Empty index of `kind`; trained on `vectors` for IVF types (vectors are not added)."""
+    if kind == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if kind == "hnsw":
+        params = config["hnsw"]
+        index = faiss.IndexHNSWFlat(dim, int(params["M"]))
+        index.hnsw.efConstruction = int(params["ef_construction"])
+        index.hnsw.efSearch = int(params["ef_search"])
+        return index
+
+    if vectors is None or len(vectors) == 0:
+        raise ValueError(f"{kind} index needs training vectors")
+    # ~39 training points per centroid is FAISS's minimum for a stable k-means
+    nlist = max(1, min(int(config["ivf"]["nlist"]), len(vectors) // 39))
+    quantizer = faiss.IndexFlatL2(dim)
+    if kind == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        m = int(config["pq"]["m"])
+        if dim % m:
+            raise ValueError(f"ivf_pq needs pq.m ({m}) to divide the embedding dimension ({dim})")
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, int(config["pq"]["nbits"]))
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+    index.nprobe = min(int(config["ivf"]["nprobe"]), nlist)
+    return index
+
+
+def configure_search(index: faiss.Index, config: Dict[str, Any]):
+    """Apply query-time parameters (efSearch / nprobe) to an index, e.g. one loaded from a snapshot."""
+    kind = index_kind(index)
+    index = faiss.downcast_index(index)
+    if kind == "hnsw":
+        index.hnsw.efSearch = int(config["hnsw"]["ef_search"])
+    elif kind in TRAINED_TYPES:
+        index.nprobe = min(int(config["ivf"]["nprobe"]), index.nlist)
+
+
+def _search_params(index: faiss.Index, selector) -> faiss.SearchParameters:
+    kind = index_kind(index)
+    real = faiss.downcast_index(index)
+    if kind == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=real.hnsw.efSearch)
+    if kind in TRAINED_TYPES:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=real.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+class Postings:
+    """Inverted index from field values and tags to item ids (ids are appended in increasing order)."""
+
+    def __init__(self):
+        self.fields: Dict[Tuple[str, str], array] = {}
+        self.tags: Dict[str, array] = {}
+
+    def add(self, item_id: int, values: Dict[str, Optional[str]], tags: List[str]):
+        for field in FIELDS:
+            value = values.get(field)
+            if value is not None:
+                self.fields.setdefault((field, value), array("q")).append(item_id)
+        for tag in set(tags):
+            self.tags.setdefault(tag, array("q")).append(item_id)
+
+    def nbytes(self) -> int:
+        return sum(sys.getsizeof(ids) for ids in self.fields.values()) + sum(sys.getsizeof(ids) for ids in self.tags.values())
+
+    def _ids(self, postings: Optional[array]) -> np.ndarray:
+        # A copy: a view would pin the array's buffer, and the next add() to it would raise BufferError
+        return np.array(postings, dtype=np.int64) if postings else np.empty(0, dtype=np.int64)
+
+    def candidates(self, filters: Dict[str, Optional[str]], tag_filter: Optional[List[str]] = None) -> Optional[np.ndarray]:
+        """Sorted ids matching every field filter and any of `tag_filter`; None when nothing is filtered."""
+        result: Optional[np.ndarray] = None
+        for field in FIELDS:
+            value = filters.get(field)
+            if value is None:
+                continue
+            ids = self._ids(self.fields.get((field, value)))
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+
+        if tag_filter:
+            tagged = np.unique(np.concatenate([self._ids(self.tags.get(tag)) for tag in tag_filter]))
+            result = tagged if result is None else np.intersect1d(result, tagged, assume_unique=True)
+        return result
+
+
+def exact_search(
+    vectors: np.ndarray,
+    sq_norms: np.ndarray,
+    query: np.ndarray,
+    top_k: int,
+    ids: Optional[np.ndarray] = None,
+) -> List[int]:
+    """Exact L2 top-k over `vectors` (restricted to rows `ids`), using ‖x‖² − 2x·q with precomputed norms."""
+    if ids is not None and len(ids) * 4 < len(vectors):
+        distances = sq_norms[ids] - 2.0 * (vectors[ids] @ query.reshape(-1))
+    else:
+        # Large id sets: score every row in place rather than copying most of the matrix
+        distances = sq_norms - 2.0 * (vectors @ query.reshape(-1))
+        if ids is not None:
+            distances = distances[ids]
+    if len(distances) == 0:
+        return []
+    k = min(top_k, len(distances))
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+    return [int(ids[i]) if ids is not None else int(i) for i in nearest]
+
+
+def filtered_search(
+    index: Optional[faiss.Index],
+    query_vec: np.ndarray,
+    top_k: int,
+    candidates: Optional[np.ndarray],
+    vectors: np.ndarray,
+    sq_norms: np.ndarray,
+) -> List[int]:
+    """
+    Top-k item ids among `candidates` (all items if None), nearest first.
+    `vectors`/`sq_norms` are the stored rows; with `index` None (not yet promoted) every search is exact over them.
+    """
+    query = query_vec.reshape(1, -1).astype(np.float32)
+    if candidates is None:
+        if index is None:
+            return exact_search(vectors, sq_norms, query, top_k)
+        _, I = index.search(query, min(top_k, index.ntotal))
+        return [int(i) for i in I[0] if i >= 0]
+
+    if len(candidates) == 0:
+        return []
+
+    if index is None or len(candidates) <= BRUTE_FORCE_LIMIT:
+        return exact_search(vectors, sq_norms, query, top_k, ids=candidates)
+
+    selector = faiss.IDSelectorBatch(candidates)
+    _, I = index.search(query, min(top_k, len(candidates)), params=_search_params(index, selector))
+    return [int(i) for i in I[0] if i >= 0]
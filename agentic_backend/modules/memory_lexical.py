@@ -0,0 +1,120 @@
+# modules/memory_lexical.py → BM25 Lexical Memory Index
+# Role: Keyword retrieval over memory items, kept alongside the vector index in MemoryManager.
+
+# Responsibilities:
+
+# Tokenize item text and keep an inverted index (term → item ids + term frequencies) in compact arrays
+
+# Score queries with BM25, restricted to the ids that pass retrieve() filters
+
+# Tell MemoryManager when a query has rare (high-IDF) terms, so it can skip the embedding call
+
+# Fuse lexical and vector rankings with reciprocal rank fusion
+
+# Dependencies:
+
+# numpy
+
+# Used by: modules/memory.py
+
+# modules/memory_lexical.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from array import array
+from collections import Counter
+import math
+import re
+import sys
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+
+DEFAULT_RETRIEVAL: Dict[str, Any] = {
+    "mode": "hybrid",        # vector | hybrid
+    "rrf_k": 60,             # reciprocal rank fusion constant
+    "fanout": 4,             # each ranker contributes top_k * fanout candidates to the fusion
+    "lexical_min_idf": 3.0,  # a query term at least this rare answers lexically, without embedding
+    "k1": 1.2,
+    "b": 0.75,
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Append-only BM25 index; document ids are the memory item ids (0, 1, 2, ...)."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, Tuple[array, array]] = {}  # term → (item ids, term frequencies)
+        self.doc_lens = array("I")
+        self.total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    def add(self, doc_id: int, text: str):
+        if doc_id != len(self.doc_lens):
+            raise ValueError(f"BM25 ids must be appended in order (expected {len(self.doc_lens)}, got {doc_id})")
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            postings = self.terms.get(term)
+            if postings is None:
+                postings = self.terms[term] = (array("i"), array("H"))
+            postings[0].append(doc_id)
+            postings[1].append(min(tf, 65535))
+        length = sum(counts.values())
+        self.doc_lens.append(length)
+        self.total_len += length
+
+    def idf(self, term: str, n_docs: int) -> float:
+        postings = self.terms.get(term)
+        df = len(postings[0]) if postings else 0
+        return math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def rare_terms(self, terms: List[str], n_docs: int, min_idf: float) -> List[str]:
+        """Query terms that occur in the index with IDF ≥ `min_idf`."""
+        return [t for t in set(terms) if t in self.terms and self.idf(t, n_docs) >= min_idf]
+
+    def search(self, terms: List[str], top_k: int, n_docs: int, allowed: Optional[np.ndarray] = None) -> List[int]:
+        """Top-k ids by BM25 among `allowed` (bool mask over ids; None = all), best first; only ids matching a term."""
+        if not terms or not len(self.doc_lens):
+            return []
+        avgdl = self.total_len / len(self.doc_lens) or 1.0
+        scores = np.zeros(len(self.doc_lens), dtype=np.float32)
+        for term in set(terms):
+            postings = self.terms.get(term)
+            if postings is None:
+                continue
+            ids = np.frombuffer(postings[0], dtype=np.int32).copy()
+            tf = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+            dl = np.frombuffer(self.doc_lens, dtype=np.uint32)[ids].astype(np.float32)
+            norm = tf + self.k1 * (1.0 - self.b + self.b * dl / avgdl)
+            scores[ids] += self.idf(term, n_docs) * tf * (self.k1 + 1.0) / norm
+
+        if allowed is not None:
+            scores[~allowed] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) == 0:
+            return []
+        k = min(top_k, len(matched))
+        best = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        return [int(i) for i in best[np.argsort(-scores[best], kind="stable")]]
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.terms) + sys.getsizeof(self.doc_lens)
+            + sum(sys.getsizeof(t) + sys.getsizeof(ids) + sys.getsizeof(tfs) for t, (ids, tfs) in self.terms.items())
+        )
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], top_k: int, k: int = 60) -> List[int]:
+    """Ids ordered by Σ 1 / (k + rank) over the rankings they appear in."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda i: (-scores[i], i))[:top_k]
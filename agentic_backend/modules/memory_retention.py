@@ -0,0 +1,147 @@
+# modules/memory_retention.py → Memory Retention Policy
+# Role: Decides which memory items to expire, evict or compact so persistent memory stays bounded.
+
+# Responsibilities:
+
+# Resolve per-namespace capacity / TTL (defaults plus per-namespace overrides from profiles.yaml)
+
+# Select items past their namespace's TTL
+
+# Select least-recently-retrieved items over their namespace's capacity
+
+# Group old tool_output items into clusters (one agent run: same namespace + session) and summarize each into one short
+# tool_output item tagged "compacted" (still found by the agent's tool_output retrieval, never compacted again)
+
+# Dependencies:
+
+# numpy, modules/memory_columns.py
+
+# Used by: modules/memory.py
+
+# modules/memory_retention.py
+
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from agentic_backend.modules.memory_columns import MemoryColumns, TYPE_CODES
+
+DEFAULT_RETENTION: Dict[str, Any] = {
+    "max_items": 5000,           # live items per namespace; least recently retrieved are evicted first
+    "ttl_days": 90,              # 0 = never expire
+    "namespaces": {},            # per-namespace overrides of max_items / ttl_days
+    "compact_after_hours": 24,   # tool_output items older than this are compacted into summaries
+    "compact_min_cluster": 1,    # smallest cluster worth compacting
+    "summary_chars": 600,
+    "maintain_every": 200,       # inserts between background maintenance passes
+    "dead_ratio": 0.2,           # rewrite store + rebuild index once this fraction of rows is evicted
+}
+
+
+class RetentionPolicy:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_RETENTION, **(config or {})}
+
+    def __getitem__(self, key: str) -> Any:
+        return self.config[key]
+
+    def limits(self, namespace: Optional[str]) -> Tuple[int, float]:
+        """(max_items, ttl seconds) for a namespace; 0 means unlimited."""
+        override = self.config["namespaces"].get(namespace or "default", {})
+        max_items = int(override.get("max_items", self.config["max_items"]) or 0)
+        ttl_days = float(override.get("ttl_days", self.config["ttl_days"]) or 0)
+        return max_items, ttl_days * 86400.0
+
+
+def _namespace_groups(columns: MemoryColumns, live: np.ndarray) -> Dict[int, np.ndarray]:
+    namespaces = columns.column("namespaces")
+    return {int(code): np.flatnonzero(live & (namespaces == code)) for code in np.unique(namespaces[live])}
+
+
+def expired_ids(columns: MemoryColumns, policy: RetentionPolicy, now: float) -> np.ndarray:
+    """Live rows older than their namespace's TTL (rows without a timestamp never expire)."""
+    live = columns.live_mask()
+    timestamps = columns.column("timestamps")
+    expired = []
+    for code, ids in _namespace_groups(columns, live).items():
+        _, ttl = policy.limits(columns.namespace_pool.value(code))
+        if ttl:
+            expired.append(ids[timestamps[ids] < now - ttl])
+    return np.concatenate(expired) if expired else np.empty(0, dtype=np.int64)
+
+
+def over_capacity_ids(columns: MemoryColumns, policy: RetentionPolicy) -> np.ndarray:
+    """Least recently retrieved live rows beyond each namespace's capacity."""
+    live = columns.live_mask()
+    last_used = columns.column("last_used")
+    evicted = []
+    for code, ids in _namespace_groups(columns, live).items():
+        max_items, _ = policy.limits(columns.namespace_pool.value(code))
+        if max_items and len(ids) > max_items:
+            oldest_first = ids[np.argsort(last_used[ids], kind="stable")]
+            evicted.append(oldest_first[: len(ids) - max_items])
+    return np.concatenate(evicted) if evicted else np.empty(0, dtype=np.int64)
+
+
+def tagged_mask(columns: MemoryColumns, tag: str) -> np.ndarray:
+    """Rows carrying `tag`."""
+    mask = np.zeros(len(columns), dtype=bool)
+    code = columns.tags.codes.get(tag)
+    if code is not None:
+        positions = np.flatnonzero(columns.column("tag_codes") == code)
+        mask[np.searchsorted(columns.column("tag_offsets"), positions, side="right") - 1] = True
+    return mask
+
+
+def compaction_clusters(columns: MemoryColumns, policy: RetentionPolicy, now: float) -> List[np.ndarray]:
+    """
+    Old live tool_output rows (not summaries) grouped by run: (namespace, session), each group in insertion
+    order. The loop's follow-up queries embed the previous tool result, so user_query is nearly unique per row;
+    rows without a session fall back to grouping by it.
+    """
+    cutoff = now - float(policy["compact_after_hours"]) * 3600.0
+    old = (
+        columns.live_mask()
+        & (columns.column("types") == TYPE_CODES["tool_output"])
+        & (columns.column("timestamps") < cutoff)
+        & ~tagged_mask(columns, "compacted")
+    )
+    ids = np.flatnonzero(old)
+    if len(ids) == 0:
+        return []
+
+    sessions = columns.column("session_ids")[ids]
+    queries = np.where(sessions < 0, columns.column("user_queries")[ids], -1)
+    keys = np.stack([columns.column("namespaces")[ids], sessions, queries], axis=1)
+    _, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    clusters = [ids[group == g] for g in range(group.max() + 1)]
+    return [c for c in clusters if len(c) >= int(policy["compact_min_cluster"])]
+
+
+def summarize_cluster(rows: List[Dict[str, Any]], summary_chars: int) -> Dict[str, Any]:
+    """
+    One short `tool_output` row tagged "compacted" standing in for a cluster of tool outputs: an extractive
+    summary (the head of each output, sharing `summary_chars`) with the cluster's shared fields. It keeps the
+    type so retrieval filtered to tool_output (the agent loop's memory.type_filter) still finds it.
+    """
+    query = rows[0]["user_query"]  # the run's first step: the user's own task
+    header = f"Earlier tool results for \"{query}\": " if query else "Earlier tool results: "
+    share = max(40, (summary_chars - len(header)) // len(rows))
+    parts = []
+    for row in rows:
+        text = " ".join(row["text"].split())
+        snippet = text if len(text) <= share else text[: share - 1].rstrip() + "…"
+        parts.append(f"{row['tool_name']}: {snippet}" if row["tool_name"] else snippet)
+
+    sessions = {row["session_id"] for row in rows}
+    tags = sorted({tag for row in rows for tag in row["tags"]} | {"compacted"})
+    return {
+        "text": (header + " | ".join(parts))[:summary_chars],
+        "type": "tool_output",
+        "timestamp": max((row["timestamp"] for row in rows if row["timestamp"]), default=None),
+        "tool_name": None,
+        "user_query": query,
+        "tags": tags,
+        "session_id": sessions.pop() if len(sessions) == 1 else None,
+        "namespace": rows[0]["namespace"],
+    }
@@ -0,0 +1,187 @@
+# modules/memory_store.py → Durable Memory Store
+# Role: Keeps MemoryManager's items and vectors on disk so memory survives queries and restarts.
+
+# Responsibilities:
+
+# Append each new item (items.jsonl) and its vector (vectors.f32) as it is added
+
+# Periodically fsync the append logs and snapshot the FAISS index atomically (tmp file + rename), the slow write
+# outside the manager's lock
+
+# On open, load items + vectors and restore the index from the snapshot plus the vectors added after it
+
+# Log deleted (expired / evicted / compacted) item ids, so they stay deleted across restarts until the next rewrite
+
+# Rewrite both logs after eviction as a new generation, switched to atomically via meta.json
+
+# Dependencies:
+
+# faiss, numpy, pydantic (MemoryItem)
+
+# Used by: modules/memory.py
+
+# modules/memory_store.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import json
+import os
+import numpy as np
+import faiss
+
+
+class MemoryStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.path / "index.faiss"
+        self.meta_path = self.path / "meta.json"
+
+        self.meta: Dict[str, Any] = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+        self.items_path, self.vectors_path = self._log_paths(self.generation)
+        self.deleted_path = self._deleted_path(self.generation)
+        self._items_file = None
+        self._vectors_file = None
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.meta.get("dim")
+
+    @property
+    def generation(self) -> int:
+        return self.meta.get("generation", 0)
+
+    def _log_paths(self, generation: int) -> Tuple[Path, Path]:
+        suffix = f".{generation}" if generation else ""
+        return self.path / f"items{suffix}.jsonl", self.path / f"vectors{suffix}.f32"
+
+    def _deleted_path(self, generation: int) -> Path:
+        return self.path / (f"deleted.{generation}.i64" if generation else "deleted.i64")
+
+    def load(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Raw item JSON lines and their vectors. A crash between the two appends can leave
+        one log a record ahead of the other, so both are cut to the shorter length.
+        """
+        lines = self.items_path.read_text(encoding="utf-8").splitlines() if self.items_path.exists() else []
+        lines = [line for line in lines if line.strip()]
+
+        if self.dim and self.vectors_path.exists():
+            vectors = np.fromfile(self.vectors_path, dtype=np.float32)
+            vectors = vectors[: (len(vectors) // self.dim) * self.dim].reshape(-1, self.dim)
+        else:
+            vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        count = min(len(lines), len(vectors))
+        if count < len(lines) or count < len(vectors):
+            self._truncate(lines[:count], count)
+        return lines[:count], vectors[:count]
+
+    def deleted(self, count: int) -> np.ndarray:
+        """Ids of the first `count` items that were deleted since the last rewrite."""
+        if not self.deleted_path.exists():
+            return np.empty(0, dtype=np.int64)
+        ids = np.fromfile(self.deleted_path, dtype=np.int64)
+        return np.unique(ids[(ids >= 0) & (ids < count)])
+
+    def delete(self, ids: np.ndarray):
+        """Record deleted item ids (made durable now; they are rare next to appends)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        with open(self.deleted_path, "ab") as f:
+            f.write(ids.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load_index(self, vectors: np.ndarray) -> Optional[faiss.Index]:
+        """Snapshot index topped up with the vectors appended after it, or None to rebuild."""
+        if not self.index_path.exists():
+            return None
+        index = faiss.read_index(str(self.index_path))
+        if index.ntotal > len(vectors) or index.d != vectors.shape[1]:
+            return None  # snapshot ahead of the logs (or from another model): rebuild
+        if index.ntotal < len(vectors):
+            index.add(vectors[index.ntotal:])
+        return index
+
+    def append(self, item_json: str, vector: np.ndarray):
+        if self.dim is None:
+            self.meta["dim"] = int(len(vector))
+            self._write_meta()
+        if self._items_file is None:
+            self._items_file = open(self.items_path, "a", encoding="utf-8")
+            self._vectors_file = open(self.vectors_path, "ab")
+
+        self._items_file.write(item_json.replace("\n", " ") + "\n")
+        self._items_file.flush()
+        self._vectors_file.write(np.asarray(vector, dtype=np.float32).tobytes())
+        self._vectors_file.flush()
+
+    def sync_logs(self):
+        """Make the append logs durable (fsync)."""
+        for f in (self._items_file, self._vectors_file):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def write_index(self, data: np.ndarray) -> Path:
+        """
+        Write a serialized index (faiss.serialize_index) to a temporary file and fsync it. Slow for a large
+        index, so it runs without the manager's lock; `publish_index` then swaps it in.
+        """
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(memoryview(data))
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp
+
+    def publish_index(self, tmp: Path):
+        """Atomically replace the index snapshot with a file from `write_index`."""
+        os.replace(tmp, self.index_path)
+
+    def rewrite(self, lines: List[str], vectors: np.ndarray):
+        """
+        Replace both logs (e.g. after eviction renumbered the items). The next generation's files
+        are written and fsync'd first; meta.json then switches to them in one atomic rename.
+        """
+        self.close()
+        old_paths = (self.items_path, self.vectors_path, self.deleted_path)
+        generation = self.generation + 1
+        items_path, vectors_path = self._log_paths(generation)
+
+        with open(items_path, "w", encoding="utf-8") as f:
+            f.write("".join(line.replace("\n", " ") + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        with open(vectors_path, "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        # The snapshot's ids refer to the old numbering
+        self.index_path.unlink(missing_ok=True)
+        self.meta["generation"] = generation
+        self._write_meta()
+        self.items_path, self.vectors_path = items_path, vectors_path
+        self.deleted_path = self._deleted_path(generation)  # the rewrite dropped every deleted item
+        for path in old_paths:
+            path.unlink(missing_ok=True)
+
+    def close(self):
+        for f in (self._items_file, self._vectors_file):
+            if f is not None:
+                f.close()
+        self._items_file = self._vectors_file = None
+
+    def _truncate(self, lines: List[str], count: int):
+        self.items_path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+        if self.dim and self.vectors_path.exists():
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(count * self.dim * 4)
+
+    def _write_meta(self):
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.meta))
+        os.replace(tmp, self.meta_path)
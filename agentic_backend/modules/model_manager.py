@@ -1,59 +1,128 @@
-import os
-import json
-import yaml
-import requests
-from pathlib import Path
-from google import genai
-from dotenv import load_dotenv
-
-load_dotenv()
-
-ROOT = Path(__file__).parent.parent
-MODELS_JSON = ROOT / "config" / "models.json"
-PROFILE_YAML = ROOT / "config" / "profiles.yaml"
-
-class ModelManager:
-    def __init__(self):
-        self.config = json.loads(MODELS_JSON.read_text())
-        self.profile = yaml.safe_load(PROFILE_YAML.read_text())
-
-        self.text_model_key = self.profile["llm"]["text_generation"]
-        self.model_info = self.config["models"][self.text_model_key]
-        self.model_type = self.model_info["type"]
-
-        # ✅ Gemini initialization (your style)
-        if self.model_type == "gemini":
-            api_key = os.getenv("GEMINI_API_KEY")
-            self.client = genai.Client(api_key=api_key)
-
-    async def generate_text(self, prompt: str) -> str:
-        if self.model_type == "gemini":
-            return self._gemini_generate(prompt)
-
-        elif self.model_type == "ollama":
-            return self._ollama_generate(prompt)
-
-        raise NotImplementedError(f"Unsupported model type: {self.model_type}")
-
-    def _gemini_generate(self, prompt: str) -> str:
-        response = self.client.models.generate_content(
-            model=self.model_info["model"],
-            contents=prompt
-        )
-
-        # ✅ Safely extract response text
-        try:
-            return response.text.strip()
-        except AttributeError:
-            try:
-                return response.candidates[0].content.parts[0].text.strip()
-            except Exception:
-                return str(response)
-
-    def _ollama_generate(self, prompt: str) -> str:
-        response = requests.post(
-            self.model_info["url"]["generate"],
-            json={"model": self.model_info["model"], "prompt": prompt, "stream": False}
-        )
-        response.raise_for_status()
-        return response.json()["response"].strip()
+import os
+import threading
+import requests
+from typing import Any, Optional, Type, TypeVar
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from agentic_backend.core.config import AppConfig, get_config
+from agentic_backend.modules.scheduler import LLMScheduler
+from agentic_backend.modules.budget import TokenBudget
+
+load_dotenv()
+
+T = TypeVar("T", bound=BaseModel)
+
+class ModelManager:
+    def __init__(self, config: Optional[AppConfig] = None, client: Any = None):
+        self.config = config or get_config()
+        self.profile = self.config.profile
+
+        self.text_model_key = self.profile["llm"]["text_generation"]
+        self.model_info = self.config.model_info(self.text_model_key)
+        self.model_type = self.model_info["type"]
+
+        self._client = client  # pre-built Gemini(-shaped) client, e.g. bench/fake_llm_server.py
+        self._client_lock = threading.Lock()
+        self.session = requests.Session()  # pooled connections for Ollama
+
+        # Rate limits per backend (models.json), retry policy (profiles.yaml llm.scheduler)
+        self.scheduler = LLMScheduler(self.profile["llm"].get("scheduler"))
+        self.token_counter = TokenBudget()
+
+    @property
+    def client(self):
+        # ✅ Gemini initialization (your style), deferred until the first call
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from google import genai
+                    api_key = os.getenv(self.model_info.get("api_key_env", "GEMINI_API_KEY"))
+                    self._client = genai.Client(api_key=api_key)
+        return self._client
+
+    @property
+    def structured_output(self) -> bool:
+        return bool(self.profile["llm"].get("structured_output", True))
+
+    async def generate_text(self, prompt: str, priority: int = 0) -> str:
+        """
+        `priority` is the agent step number: later steps of in-progress queries
+        are admitted before the first step of new ones when the backend is saturated.
+        """
+        return await self._submit(prompt, priority)
+
+    async def generate_structured(self, prompt: str, schema: Type[T], priority: int = 0) -> T:
+        """
+        Constrain the reply to the JSON schema of `schema` (Gemini `response_schema`,
+        Ollama `format`) and return it parsed. Raises if the reply still does not validate.
+        """
+        raw = await self._submit(prompt, priority, schema=schema)
+        return schema.model_validate_json(raw)
+
+    async def _submit(self, prompt: str, priority: int, schema: Optional[Type[BaseModel]] = None) -> str:
+        if self.model_type == "gemini":
+            call = lambda: self._gemini_generate(prompt, schema)
+
+        elif self.model_type == "ollama":
+            call = lambda: self._ollama_generate(prompt, schema)
+
+        else:
+            raise NotImplementedError(f"Unsupported model type: {self.model_type}")
+
+        return await self.scheduler.submit(
+            self.text_model_key,
+            call,
+            tokens=self.token_counter.count(prompt),
+            priority=priority,
+            limits=self.model_info.get("rate_limits"),
+        )
+
+    def _gemini_generate(self, prompt: str, schema: Optional[Type[BaseModel]] = None) -> str:
+        config = None
+        if schema is not None:
+            config = {"response_mime_type": "application/json", "response_schema": schema}
+
+        response = self.client.models.generate_content(
+            model=self.model_info["model"],
+            contents=prompt,
+            config=config
+        )
+
+        # ✅ Safely extract response text
+        try:
+            return response.text.strip()
+        except AttributeError:
+            try:
+                return response.candidates[0].content.parts[0].text.strip()
+            except Exception:
+                return str(response)
+
+    def _ollama_generate(self, prompt: str, schema: Optional[Type[BaseModel]] = None) -> str:
+        payload = {"model": self.model_info["model"], "prompt": prompt, "stream": False}
+        if schema is not None:
+            payload["format"] = schema.model_json_schema()
+
+        response = self.session.post(self.model_info["url"]["generate"], json=payload)
+        response.raise_for_status()
+        return response.json()["response"].strip()
+
+
+_model_manager: Optional[ModelManager] = None
+_model_manager_lock = threading.Lock()
+
+
+def get_model_manager() -> ModelManager:
+    """Process-wide ModelManager, created on first use and reused for the bot's lifetime."""
+    global _model_manager
+    if _model_manager is None:
+        with _model_manager_lock:
+            if _model_manager is None:
+                _model_manager = ModelManager()
+    return _model_manager
+
+
+def set_model_manager(manager: Optional[ModelManager]) -> None:
+    """Install a ModelManager (or `None` to rebuild from config on next use)."""
+    global _model_manager
+    with _model_manager_lock:
+        _model_manager = manager
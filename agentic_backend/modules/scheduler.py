@@ -0,0 +1,204 @@
+# modules/scheduler.py → LLM Request Scheduler
+# Role: Sits in front of ModelManager so bursts queue instead of failing on provider quotas.
+
+# Responsibilities:
+
+# Enforce per-backend requests-per-minute / tokens-per-minute limits and a concurrency cap
+
+# Admit waiting requests by priority: later steps of in-progress queries before brand-new queries
+
+# Retry 429 / 5xx / connection errors with jittered exponential backoff (and pause the backend meanwhile)
+
+# Run blocking client calls off the event loop
+
+# Dependencies:
+
+# config/models.json (rate_limits per model), config/profiles.yaml (llm.scheduler)
+
+# Used by: modules/model_manager.py
+
+# modules/scheduler.py
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import deque
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import requests
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+DEFAULT_SCHEDULER = {
+    "max_retries": 4,
+    "base_delay": 1.0,    # seconds, doubled per attempt
+    "max_delay": 30.0,
+}
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a Gemini (`code`) or requests/httpx (`response.status_code`) error."""
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (TimeoutError, ConnectionError, requests.ConnectionError, requests.Timeout)):
+        return True
+    return error_status(exc) in RETRYABLE_STATUS
+
+
+class RateLimit:
+    """Sliding one-minute window over requests and tokens, plus a pause set after 429s."""
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window: deque[Tuple[float, int]] = deque()  # (time, tokens)
+        self.window_tokens = 0
+        self.paused_until = 0.0
+
+    def _expire(self, now: float):
+        while self.window and now - self.window[0][0] >= 60.0:
+            _, tokens = self.window.popleft()
+            self.window_tokens -= tokens
+
+    def delay_for(self, tokens: int, now: float) -> float:
+        """Seconds to wait before a request of `tokens` fits the limits (0 if it fits now)."""
+        self._expire(now)
+        delay = max(0.0, self.paused_until - now)
+
+        if self.rpm and len(self.window) >= self.rpm:
+            delay = max(delay, self.window[len(self.window) - self.rpm][0] + 60.0 - now)
+
+        if self.tpm and self.window and self.window_tokens + tokens > self.tpm:
+            # Wait until enough old requests leave the window (a single oversized request goes alone)
+            freed = 0
+            for ts, used in self.window:
+                freed += used
+                if self.window_tokens - freed + tokens <= self.tpm:
+                    break
+            delay = max(delay, ts + 60.0 - now)
+        return delay
+
+    def record(self, tokens: int, now: float):
+        self.window.append((now, tokens))
+        self.window_tokens += tokens
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class BackendLane:
+    """
+    Priority admission for one backend: a request is admitted once it is the highest-priority waiter,
+    a concurrency slot is free and the rate limit fits it. Nothing holds a slot while waiting on the
+    rate limit, so a later high-priority request still goes ahead of queued low-priority ones.
+    """
+
+    def __init__(self, limits: Dict[str, Any]):
+        self.limit = RateLimit(limits.get("rpm"), limits.get("tpm"))
+        self.max_concurrency = int(limits.get("max_concurrency", 4))
+        self.active = 0
+        self.waiters: List[Tuple[int, int, int, asyncio.Future]] = []  # (-priority, seq, tokens, future)
+        self.seq = itertools.count()
+        self.timer: Optional[asyncio.TimerHandle] = None  # re-checks the rate limit for the head waiter
+
+    def _wake(self):
+        while self.waiters and self.active < self.max_concurrency:
+            _, _, tokens, future = self.waiters[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self.waiters)
+                continue
+            now = time.monotonic()
+            delay = self.limit.delay_for(tokens, now)
+            if delay > 0:
+                self._wake_in(delay)
+                return
+            heapq.heappop(self.waiters)
+            self.limit.record(tokens, now)
+            self.active += 1
+            future.set_result(None)
+
+    def _wake_in(self, delay: float):
+        loop = asyncio.get_running_loop()
+        if self.timer is not None:
+            if self.timer.when() <= loop.time() + delay:
+                return
+            self.timer.cancel()
+        self.timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self._wake()
+
+    async def enter(self, priority: int, tokens: int = 0):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (-priority, next(self.seq), tokens, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.leave()
+            raise
+
+    def leave(self):
+        self.active -= 1
+        self._wake()
+
+
+class LLMScheduler:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_SCHEDULER, **(config or {})}
+        self.lanes: Dict[str, BackendLane] = {}
+
+    def lane(self, backend: str, limits: Optional[Dict[str, Any]] = None) -> BackendLane:
+        if backend not in self.lanes:
+            self.lanes[backend] = BackendLane(limits or {})
+        return self.lanes[backend]
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        if retry_after and str(retry_after).isdigit():
+            return float(retry_after)
+        delay = min(self.config["max_delay"], self.config["base_delay"] * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def submit(
+        self,
+        backend: str,
+        call: Callable[[], Any],
+        tokens: int = 0,
+        priority: int = 0,
+        limits: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Run blocking `call()` on `backend` once rate limits allow, highest `priority` first.
+        Retryable failures are retried with jittered backoff; others propagate immediately.
+        """
+        lane = self.lane(backend, limits)
+        max_retries = int(self.config["max_retries"])
+
+        for attempt in range(max_retries + 1):
+            await lane.enter(priority, tokens)  # waits out rate limits in priority order, without a slot
+            try:
+                return await asyncio.to_thread(call)
+            except Exception as e:
+                if attempt == max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                if error_status(e) == 429:
+                    lane.limit.pause(delay)  # hold the whole backend, not just this request
+                print(f"[scheduler] {backend} call failed ({error_status(e) or type(e).__name__}), "
+                      f"retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            finally:
+                lane.leave()
+            await asyncio.sleep(delay)
@@ -59,7 +59,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.chat.send_action(action="typing")
         
         # Process the query through the agent
-        response = await agent.process_query(user_message)
+        response = await agent.process_query(user_message, user_id=user_id)
         
         # Format the response
         formatted_response = await agent.format_response(response)
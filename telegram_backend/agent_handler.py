@@ -1,19 +1,22 @@
+from typing import Optional
 from agentic_backend.agent import agent_main
+from agentic_backend.modules.memory import get_memory_manager
 
 Output_response = ""
 
 class AgentHandler:
     def __init__(self):
         """Initialize the agent handler with any necessary setup"""
-        # Add your agent system initialization here
-        pass
+        # Open the persistent memory store once, at bot startup
+        get_memory_manager()
 
-    async def process_query(self, user_query: str) -> str:
+    async def process_query(self, user_query: str, user_id: Optional[str] = None) -> str:
         """
         Process a user query through the agentic system
         
         Args:
             user_query (str): The query text from the user
+            user_id (str, optional): Telegram user ID, used to namespace memory
             
         Returns:
             str: The response from the agentic system
@@ -23,7 +26,7 @@ class AgentHandler:
             # This is just a placeholder response
             print(f"Agent received query: {user_query}")
             global Output_response
-            Output_response = await agent_main(user_query)
+            Output_response = await agent_main(user_query, user_id=user_id)
             print(f"Agent response has been generated")
             return Output_response
         except Exception as e:
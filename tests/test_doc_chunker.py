@@ -0,0 +1,25 @@
+import hashlib
+
+import numpy as np
+
+from agentic_backend.modules.doc_chunker import HEADING_RE, LocalChunker
+
+
+def fake_embed(texts):
+    """Deterministic vectors per text, no embedding server."""
+    return np.stack([
+        np.random.default_rng(int(hashlib.md5(t.encode("utf-8")).hexdigest()[:8], 16)).standard_normal(16)
+        for t in texts
+    ])
+
+
+def test_heading_stays_with_a_long_paragraph():
+    paragraph = " ".join(f"word{i}" for i in range(70))
+    markdown = f"# Title\n\nA short intro.\n\n## Sec\n\n{paragraph}\n\n## Next\n\nClosing words here."
+    chunks = LocalChunker(fake_embed, {"max_words": 30, "min_words": 5})(markdown)
+
+    assert not any(all(HEADING_RE.match(line) for line in chunk.splitlines() if line.strip()) for chunk in chunks)
+    assert all(len(chunk.split()) <= 30 for chunk in chunks)
+    section = next(chunk for chunk in chunks if chunk.startswith("## Sec"))
+    assert section.startswith("## Sec\n\nword0 word1")
+    assert " ".join(chunks).split().count("word69") == 1
@@ -0,0 +1,77 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from agentic_backend.modules.memory import MemoryItem, MemoryManager
+
+
+class FakeEmbeddings:
+    """Deterministic vectors per text, no embedding server."""
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+
+    def embed_many_sync(self, texts):
+        return [self._vector(text) for text in texts]
+
+    async def embed(self, text):
+        return self._vector(text)
+
+
+def make_manager(**retention) -> MemoryManager:
+    manager = MemoryManager(
+        "http://localhost:0",
+        defer_embedding=False,
+        retention={"maintain_every": 10**9, **retention},
+    )
+    manager.client = FakeEmbeddings()
+    return manager
+
+
+def add_old_run(manager: MemoryManager, session_id: str, steps: int, hours_ago: float):
+    timestamp = (datetime.now() - timedelta(hours=hours_ago)).isoformat()
+    start = len(manager.columns)
+    for step in range(steps):
+        manager.add(MemoryItem(
+            text=f"{session_id} step {step} output",
+            type="tool_output",
+            tool_name="search_documents",
+            user_query=f"task of {session_id}" if step == 0 else f"templated follow-up {step} for {session_id}",
+            session_id=session_id,
+            namespace="user-1",
+        ))
+        manager.columns.timestamps[start + step] = datetime.fromisoformat(timestamp).timestamp()
+        manager.columns.last_used[start + step] = time.time() - hours_ago * 3600.0
+
+
+def live_texts(manager: MemoryManager):
+    return [manager.columns.row(i)["text"] for i in np.flatnonzero(manager.columns.live_mask())]
+
+
+def test_compaction_merges_one_run_into_one_summary():
+    manager = make_manager(compact_after_hours=24)
+    add_old_run(manager, "session-a", steps=3, hours_ago=48)
+    add_old_run(manager, "session-b", steps=2, hours_ago=48)
+
+    manager.maintain()
+
+    summaries = manager.retrieve("output", top_k=10, type_filter="tool_output")
+    assert len(summaries) == 2
+    assert all("compacted" in item.tags for item in summaries)
+    assert {item.session_id for item in summaries} == {"session-a", "session-b"}
+    assert all(item.user_query.startswith("task of") for item in summaries)
+
+
+def test_eviction_after_compaction_keeps_recent_items():
+    manager = make_manager(compact_after_hours=24, max_items=3)
+    add_old_run(manager, "session-old", steps=3, hours_ago=48)
+    for i in range(3):
+        manager.add(MemoryItem(text=f"fresh fact {i}", type="fact", namespace="user-1"))
+
+    manager.maintain()
+
+    # The summary inherits the old rows' last use, so it (not a fresh fact) is the LRU row evicted
+    assert sorted(live_texts(manager)) == ["fresh fact 0", "fresh fact 1", "fresh fact 2"]